@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+
+from BatchAnalyzer import analyze_source, to_record
+from Model.AnalysisResult import AnalysisResult
+from SymbolIndex import SymbolIndex, open_name_table
+
+# Longest request line accepted, source included.
+request_limit = 64 * 1024 * 1024
+
+# Name tables loaded by this process, by path, with the modification time and size they were loaded at.
+_name_tables = {}
+
+
+def _get_name_table(path):
+    # Loaded once per process and reloaded only when the file changes, so requests find it warm.
+    status = os.stat(path)
+    version = (status.st_mtime_ns, status.st_size)
+    loaded = _name_tables.get(path)
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+    if loaded is not None and isinstance(loaded[1], SymbolIndex):
+        loaded[1].close()
+    name_table = open_name_table(path)
+    _name_tables[path] = (version, name_table)
+    return name_table
+
+
+def warm_up(name_table_path):
+    # Runs once in each worker as it starts: loads the daemon's name table and runs the analyzers over
+    # a small program, so the first request doesn't pay for either.
+    if name_table_path is not None:
+        _get_name_table(name_table_path)
+    analyze_source("-", b"x = 1 + 2\nwhile x < 3 do\nx = x + 1\nend\n")
+
+
+def analyze_request(path, source, name_table_path, recover, keep_tree):
+    # Runs in a worker. source is None to read the file at path. Returns the JSON record of the result,
+    # as BatchAnalyzer writes it, so only plain data crosses back to the daemon.
+    start = time.perf_counter()
+    try:
+        if source is None:
+            with open(path, "rb") as source_file:
+                source = source_file.read()
+        name_table = _get_name_table(name_table_path) if name_table_path is not None else None
+    except Exception as error:
+        result = AnalysisResult(path, errors=["%s: %s" % (type(error).__name__, error)])
+    else:
+        result = analyze_source(path, source, name_table, recover)
+    result.elapsed = time.perf_counter() - start
+    if not keep_tree:
+        result.tree = None
+    return to_record(result)
+
+
+def _is_pipe(stream):
+    # asyncio can only watch pipes and sockets; regular files, terminals and /dev/null are read and
+    # written with blocking calls instead.
+    mode = os.fstat(stream.fileno()).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+class _FileReader(object):
+    # The part of asyncio.StreamReader a connection uses, over a file asyncio can't watch: each line is
+    # read on a thread, so the daemon keeps answering while it waits.
+    def __init__(self, stream):
+        self.__stream = stream
+        self.__eof = False
+
+    async def readline(self):
+        if self.__eof:
+            return b""
+        line = await asyncio.get_event_loop().run_in_executor(None, self.__stream.readline, request_limit + 1)
+        if len(line) > request_limit:
+            raise ValueError("REQUEST OVER %d BYTES" % request_limit)
+        return line
+
+    def feed_eof(self):
+        self.__eof = True
+
+
+class _FileWriter(object):
+    # The part of asyncio.StreamWriter a connection uses, over a file asyncio can't watch. Answers are
+    # written and flushed as they come, so a reader of the file sees each one as soon as it is done.
+    def __init__(self, stream):
+        self.__stream = stream
+        self.__closed = False
+
+    def write(self, data):
+        self.__stream.write(data)
+        self.__stream.flush()
+
+    async def drain(self):
+        pass
+
+    def is_closing(self):
+        return self.__closed
+
+    def close(self):
+        self.__closed = True
+
+
+class AnalysisDaemon(object):
+    # Serves analysis requests, one JSON object per line, and answers each with a JSON line as soon as it
+    # is done, so answers come in the order requests finish and a client can have any number in flight:
+    #   {"id": 1, "path": "a.rb"}                           analyze a file
+    #   {"id": 2, "source": "x = 1", "name_table": "a.json", "recover": true, "tree": true}
+    #   {"id": 3, "method": "cancel", "target": 1}          cancel request 1
+    #   {"id": 4, "method": "status"}                       requests in flight and workers
+    #   {"id": 5, "method": "shutdown"}                     finish the requests in flight and stop
+    # An answer is {"id": ..., "result": ...} with the record BatchAnalyzer writes for a file, or
+    # {"id": ..., "error": "..."}. A cancelled request is answered with the error CANCELLED; one a worker
+    # has already started runs to the end, but its result is dropped.
+    # A request without an id is answered with a null id. Any number of them can be in flight, but they
+    # can't be cancelled.
+    # Requests without a name_table use the daemon's, and each worker keeps the tables it has loaded.
+    # Relative paths are taken from the daemon's working directory.
+    __workers = None
+    __name_table = None
+    __recover = False
+    __executor = None
+    __stopped = None
+
+    def __init__(self, workers=None, name_table=None, recover=False):
+        # workers is the number of worker processes, one per CPU by default. With 0, requests are analyzed
+        # one at a time on a thread of the daemon, which saves passing them to another process.
+        self.__workers = (os.cpu_count() or 1) if workers is None else workers
+        self.__name_table = os.path.abspath(name_table) if name_table is not None else None
+        self.__recover = recover
+        self.__in_flight = 0
+        self.__readers = set()
+
+    def __start(self):
+        if self.__workers:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.__executor = ProcessPoolExecutor(max_workers=self.__workers, initializer=warm_up,
+                                                  initargs=(self.__name_table,))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self.__executor = ThreadPoolExecutor(max_workers=1, initializer=warm_up,
+                                                 initargs=(self.__name_table,))
+        self.__stopped = asyncio.Event()
+
+    def __stop(self):
+        self.__executor.shutdown(wait=True)
+        self.__executor = None
+
+    async def serve_stdio(self):
+        # Reads requests from standard input and answers on standard output until the input ends or a
+        # shutdown request. Either can be a pipe or a file.
+        self.__start()
+        try:
+            loop = asyncio.get_event_loop()
+            if _is_pipe(sys.stdin):
+                reader = asyncio.StreamReader(limit=request_limit)
+                await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+            else:
+                reader = _FileReader(sys.stdin.buffer)
+            if _is_pipe(sys.stdout):
+                transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+                writer = asyncio.StreamWriter(transport, protocol, None, loop)
+            else:
+                writer = _FileWriter(sys.stdout.buffer)
+            await self.__serve_connection(reader, writer)
+        finally:
+            self.__stop()
+
+    async def serve_unix(self, path):
+        # Accepts any number of clients on a Unix socket at path until a shutdown request from one of them.
+        self.__start()
+        try:
+            server = await asyncio.start_unix_server(self.__serve_connection, path, limit=request_limit)
+            try:
+                await self.__stopped.wait()
+            finally:
+                # Connections end as if their clients had stopped sending, once their requests are answered.
+                for reader in self.__readers:
+                    reader.feed_eof()
+                server.close()
+                await server.wait_closed()
+                if os.path.exists(path):
+                    os.remove(path)
+        finally:
+            self.__stop()
+
+    def stop(self):
+        # Stops a serve_unix, e.g. from a signal handler, once the requests in flight are answered.
+        if self.__stopped is not None:
+            self.__stopped.set()
+
+    async def __serve_connection(self, reader, writer):
+        tasks = {}
+        self.__readers.add(reader)
+        try:
+            while not self.__stopped.is_set():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    self.__send(writer, {"id": None, "error": "REQUEST OVER %d BYTES" % request_limit})
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    self.__dispatch(line, tasks, writer)
+                await writer.drain()
+            if tasks:
+                await asyncio.wait(list(tasks.values()))
+            await writer.drain()
+        except ConnectionError:
+            for task in tasks.values():
+                task.cancel()
+        finally:
+            self.__readers.discard(reader)
+            writer.close()
+
+    def __dispatch(self, line, tasks, writer):
+        try:
+            request = json.loads(line.decode("utf-8"))
+        except ValueError as error:
+            self.__send(writer, {"id": None, "error": "INVALID REQUEST " + str(error)})
+            return
+        if not isinstance(request, dict):
+            self.__send(writer, {"id": None, "error": "INVALID REQUEST " + line.decode("utf-8").strip()})
+            return
+
+        request_id = request.get("id")
+        if not isinstance(request_id, (str, int, type(None))) or \
+                not isinstance(request.get("target"), (str, int, type(None))):
+            self.__send(writer, {"id": None, "error": "REQUEST IDS MUST BE STRINGS OR NUMBERS"})
+            return
+        method = request.get("method", "analyze")
+        if method == "analyze":
+            if request_id is not None and request_id in tasks:
+                self.__send(writer, {"id": request_id, "error": "DUPLICATE REQUEST ID " + json.dumps(request_id)})
+                return
+            path = request.get("path")
+            source = request.get("source")
+            if not isinstance(path, str) and not isinstance(source, str):
+                self.__send(writer, {"id": request_id, "error": "REQUEST NEEDS A PATH OR A SOURCE"})
+                return
+            name_table = request.get("name_table")
+            if name_table is not None and not isinstance(name_table, str):
+                self.__send(writer, {"id": request_id, "error": "NAME TABLE MUST BE A PATH"})
+                return
+            task = asyncio.ensure_future(self.__analyze(request_id, path if isinstance(path, str) else "-",
+                                                        source.encode("utf-8") if isinstance(source, str)
+                                                        else None,
+                                                        os.path.abspath(name_table) if name_table is not None
+                                                        else self.__name_table,
+                                                        bool(request.get("recover", self.__recover)),
+                                                        bool(request.get("tree", False)), writer))
+            # A request without an id can't be cancelled, so it gets a key no cancel can name, and any
+            # number of them can be in flight.
+            key = object() if request_id is None else request_id
+            tasks[key] = task
+            self.__in_flight += 1
+
+            def finish(task):
+                # A task cancelled before it first ran never entered __analyze, so it is answered here.
+                tasks.pop(key, None)
+                self.__in_flight -= 1
+                if task.cancelled() and not writer.is_closing():
+                    self.__send(writer, {"id": request_id, "error": "CANCELLED"})
+
+            task.add_done_callback(finish)
+        elif method == "cancel":
+            task = tasks.get(request.get("target"))
+            self.__send(writer, {"id": request_id, "result": {"cancelled": task is not None and task.cancel()}})
+        elif method == "status":
+            self.__send(writer, {"id": request_id, "result": {"in_flight": self.__in_flight,
+                                                              "workers": self.__workers,
+                                                              "name_table": self.__name_table}})
+        elif method == "shutdown":
+            self.__send(writer, {"id": request_id, "result": {"stopping": True}})
+            self.__stopped.set()
+        else:
+            self.__send(writer, {"id": request_id, "error": "UNKNOWN METHOD " + str(method)})
+
+    async def __analyze(self, request_id, path, source, name_table, recover, keep_tree, writer):
+        try:
+            record = await asyncio.get_event_loop().run_in_executor(self.__executor, analyze_request, path, source,
+                                                                    name_table, recover, keep_tree)
+            response = {"id": request_id, "result": record}
+        except Exception as error:
+            # Only reached when the worker itself died, e.g. out of memory or a broken pool.
+            response = {"id": request_id, "error": "%s: %s" % (type(error).__name__, error)}
+        if not writer.is_closing():
+            self.__send(writer, response)
+
+    def __send(self, writer, response):
+        writer.write(json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n")
+
+
+def main(argv=None):
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Serve analysis requests as JSON lines over standard input "
+                                                 "and output or a Unix socket.")
+    parser.add_argument("--socket", help="Unix socket to listen on instead of standard input and output")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default, 0 for none")
+    parser.add_argument("--name-table", help="name table, JSON or a symbol index, for requests that name none")
+    parser.add_argument("--recover", action="store_true",
+                        help="report every problem in a file instead of the first, unless a request says otherwise")
+    arguments = parser.parse_args(argv)
+
+    daemon = AnalysisDaemon(workers=arguments.workers, name_table=arguments.name_table, recover=arguments.recover)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        if arguments.socket is not None:
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signal_number, daemon.stop)
+            loop.run_until_complete(daemon.serve_unix(arguments.socket))
+        else:
+            loop.run_until_complete(daemon.serve_stdio())
+    finally:
+        loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
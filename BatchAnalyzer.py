@@ -0,0 +1,324 @@
+import os
+import sys
+import time
+
+from Lexer import Lexer
+from Model.AnalysisResult import AnalysisResult
+from Model.BinaryTree import BinaryTree, encode_tree
+from Model.Diagnostic import DiagnosticError
+from SymbolIndex import SymbolIndex, open_name_table
+from SyntaxAnalyzer import SyntaxAnalyzer, SemanticAnalyzer
+
+
+def analyze_file(path, keep_tree=False, name_table_suffix=".json", cache_directory=None,
+                 cache_bytes=256 * 1024 * 1024, recover=False):
+    # Runs in a worker process. Every failure is turned into an error on the result so it never reaches the pool.
+    # The serial paths call it directly, so the same holds there: one file can't stop the batch.
+    start = time.perf_counter()
+    try:
+        result = _analyze_path(path, keep_tree, name_table_suffix, cache_directory, cache_bytes, recover)
+    except Exception as error:
+        result = AnalysisResult(path, errors=["%s: %s" % (type(error).__name__, error)])
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _analyze_path(path, keep_tree, name_table_suffix, cache_directory, cache_bytes, recover):
+    try:
+        with open(path, "rb") as source_file:
+            source = source_file.read()
+        name_table_path = os.path.splitext(path)[0] + name_table_suffix
+        name_table = None
+        if os.path.exists(name_table_path):
+            with open(name_table_path, "rb") as name_table_file:
+                name_table = name_table_file.read()
+    except Exception as error:
+        return AnalysisResult(path, errors=["%s: %s" % (type(error).__name__, error)])
+
+    cache = None
+    if cache_directory is not None:
+        # A cache that can't be created or read is skipped, as a failed store is below.
+        try:
+            cache = _get_cache(cache_directory, cache_bytes)
+            key = cache.get_key(source, name_table, recover)
+            result = cache.load(key, keep_tree)
+        except OSError:
+            cache = result = None
+        if result is not None:
+            result.path = path
+            return result
+
+    result = analyze_source(path, source, name_table_path if name_table is not None else None, recover)
+    if cache is not None:
+        try:
+            cache.store(key, result)
+        except OSError:
+            pass
+    if not keep_tree:
+        result.tree = None
+    return result
+
+
+def analyze_file_encoded(path, *options):
+    # Trees cross the process boundary in BinaryTree format, which is smaller and faster than pickling nodes.
+    result = analyze_file(path, *options)
+    if result.tree is not None:
+        result.tree = encode_tree(result.tree)
+    return result
+
+
+# One cache per directory and worker process, so the directory is only set up once per process.
+_caches = {}
+
+
+def _get_cache(directory, max_bytes):
+    from ParseCache import ParseCache
+
+    cache = _caches.get((directory, max_bytes))
+    if cache is None:
+        cache = _caches[(directory, max_bytes)] = ParseCache(directory, max_bytes)
+    return cache
+
+
+def analyze_source(path, source, name_table=None, recover=False):
+    # source is the file's bytes. name_table is the path of one to open, or a loaded NameTable, SymbolTable
+    # or SymbolIndex, which is rewound before the check so it can be reused for any number of sources.
+    # With recover, every problem in the file is collected and the tree holds the statements that parsed.
+    # The semantic check only runs on a clean parse: a skipped statement would leave its name table
+    # records unconsumed and every later use of the same name would be checked against the wrong record.
+    result = AnalysisResult(path)
+    try:
+        lexer = Lexer(source.decode("utf-8"), recover=recover)
+        tokens = list(lexer)
+        result.token_count = len(tokens)
+
+        syntax_analyzer = SyntaxAnalyzer(recover=recover)
+        tree = syntax_analyzer.parse_tokens(tokens)
+        result.diagnostics.extend(lexer.get_diagnostics())
+        result.diagnostics.extend(syntax_analyzer.get_diagnostics())
+        result.diagnostics.sort(key=lambda diagnostic: (diagnostic.line_number, diagnostic.position_number))
+        if tree is None:
+            raise ValueError("CAN'T BUILD SYNTAX TREE")
+        result.node_count = _count_nodes(tree)
+        result.tree = tree
+
+        if name_table is not None and not result.diagnostics:
+            result.semantic_checked = True
+            if isinstance(name_table, str):
+                opened_table = open_name_table(name_table)
+                try:
+                    _check_source(tree, opened_table, recover, result)
+                finally:
+                    if isinstance(opened_table, SymbolIndex):
+                        opened_table.close()
+            else:
+                _check_source(tree, name_table, recover, result)
+    except DiagnosticError as error:
+        result.diagnostics.append(error.diagnostic)
+    except Exception as error:
+        result.errors.append("%s: %s" % (type(error).__name__, error))
+    result.errors[:0] = [str(diagnostic) for diagnostic in result.diagnostics]
+    return result
+
+
+def _check_source(tree, name_table, recover, result):
+    semantic_analyzer = SemanticAnalyzer(name_table, recover=recover)
+    semantic_analyzer.get_symbol_table().set_consumed({})
+    semantic_analyzer.check_tree(tree)
+    result.diagnostics.extend(semantic_analyzer.get_diagnostics())
+
+
+def _count_nodes(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+class BatchAnalyzer(object):
+    __workers = None
+    __keep_trees = False
+    __extension = ".rb"
+    __name_table_suffix = ".json"
+    __cache_directory = None
+    __cache_bytes = 0
+    __recover = False
+
+    def __init__(self, workers=None, keep_trees=False, extension=".rb", name_table_suffix=".json",
+                 cache_directory=None, cache_bytes=256 * 1024 * 1024, recover=False):
+        # A file's name table is read from the file next to it with the same stem, e.g. a.rb and a.json.
+        # With a cache_directory, results are reused for files whose source and name table are unchanged.
+        # With recover, a result lists every problem in its file rather than the first one.
+        self.__workers = workers or os.cpu_count() or 1
+        self.__keep_trees = keep_trees
+        self.__extension = extension
+        self.__name_table_suffix = name_table_suffix
+        self.__cache_directory = cache_directory
+        self.__cache_bytes = cache_bytes
+        self.__recover = recover
+
+    def collect_paths(self, paths):
+        return list(self.iterate_paths(paths))
+
+    def iterate_paths(self, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+
+        for path in paths:
+            if os.path.isdir(path):
+                for directory, directories, files in os.walk(path):
+                    directories.sort()
+                    for file_name in sorted(files):
+                        if file_name.endswith(self.__extension):
+                            yield os.path.join(directory, file_name)
+            else:
+                yield path
+
+    def __get_options(self):
+        return (self.__keep_trees, self.__name_table_suffix, self.__cache_directory, self.__cache_bytes,
+                self.__recover)
+
+    def analyze(self, paths):
+        paths = self.collect_paths(paths)
+        options = self.__get_options()
+
+        if self.__workers == 1 or len(paths) < 2:
+            return [analyze_file(path, *options) for path in paths]
+
+        # Imported here: concurrent.futures pulls in multiprocessing, which costs more than the rest of startup.
+        from concurrent.futures import ProcessPoolExecutor
+
+        results = []
+        with ProcessPoolExecutor(max_workers=min(self.__workers, len(paths))) as executor:
+            futures = [executor.submit(analyze_file_encoded, path, *options) for path in paths]
+            for path, future in zip(paths, futures):
+                results.append(self.__get_result(path, future))
+        return results
+
+    def analyze_stream(self, paths):
+        # Yields each file's result as soon as it is ready, so in the order files finish rather than input order.
+        # Paths are walked lazily and at most two files per worker are in flight, so memory stays bounded
+        # however many files there are.
+        paths = self.iterate_paths(paths)
+        options = self.__get_options()
+
+        if self.__workers == 1:
+            for path in paths:
+                yield analyze_file(path, *options)
+            return
+
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+            pending = {}
+            for path in paths:
+                pending[executor.submit(analyze_file_encoded, path, *options)] = path
+                if len(pending) >= self.__workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self.__get_result(pending.pop(future), future)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self.__get_result(pending.pop(future), future)
+
+    def __get_result(self, path, future):
+        try:
+            result = future.result()
+            if result.tree is not None:
+                result.tree = BinaryTree(result.tree).to_syntax_node()
+            return result
+        except Exception as error:
+            # Only reached when the worker itself died, e.g. out of memory or a broken pool.
+            return AnalysisResult(path, errors=["%s: %s" % (type(error).__name__, error)])
+
+
+def _analyze_standard_input(keep_tree, recover):
+    start = time.perf_counter()
+    result = analyze_source("-", sys.stdin.buffer.read(), None, recover)
+    result.elapsed = time.perf_counter() - start
+    if not keep_tree:
+        result.tree = None
+    return result
+
+
+def to_record(result):
+    # status is ok, diagnostics when the source has problems, or error when the file couldn't be analyzed at all.
+    if result.is_ok():
+        status = "ok"
+    elif len(result.errors) > len(result.diagnostics):
+        status = "error"
+    else:
+        status = "diagnostics"
+    record = {"path": result.path,
+              "status": status,
+              "elapsed": round(result.elapsed, 6),
+              "tokens": result.token_count,
+              "nodes": result.node_count,
+              "semantic_checked": result.semantic_checked,
+              "diagnostics": [{"code": diagnostic.code,
+                               "line": diagnostic.line_number,
+                               "position": diagnostic.position_number,
+                               "message": diagnostic.message} for diagnostic in result.diagnostics],
+              "errors": result.errors[len(result.diagnostics):]}
+    if result.tree is not None:
+        record["tree"] = _serialize_tree(result.tree)
+    return record
+
+
+def _serialize_tree(tree):
+    # Nodes in pre-order, as in Model/BinaryTree.py: [kind, child count], then the token's class, lexem,
+    # line and position for nodes that have one. Flat, so encoding doesn't recurse however deep the tree is.
+    nodes = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        token = node.token
+        if token is None:
+            nodes.append([node.kind, len(node.children)])
+        else:
+            nodes.append([node.kind, len(node.children), token.lexem_class, token.lexem, token.line_number,
+                          token.position_number])
+        stack.extend(reversed(node.children))
+    return nodes
+
+
+def main(argv=None):
+    # Writes one JSON line per file to standard output as soon as that file is done, in the order files finish.
+    # Exits with status 1 if any file had a problem.
+    import argparse
+    import itertools
+    import json
+
+    parser = argparse.ArgumentParser(description="Analyze Ruby files, writing a JSON line per file as it finishes.")
+    parser.add_argument("paths", nargs="*", default=["-"], help="files and directories, - for standard input")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    parser.add_argument("--extension", default=".rb", help="extension of the files collected from directories")
+    parser.add_argument("--name-table-suffix", default=".json",
+                        help="a file's name table, JSON or a symbol index, is the file with its extension "
+                             "replaced by this")
+    parser.add_argument("--cache-directory", help="reuse results for files unchanged since an earlier run")
+    parser.add_argument("--recover", action="store_true", help="report every problem in a file instead of the first")
+    parser.add_argument("--tree", action="store_true", help="include each file's syntax tree")
+    arguments = parser.parse_args(argv)
+
+    analyzer = BatchAnalyzer(workers=arguments.workers, keep_trees=arguments.tree, extension=arguments.extension,
+                             name_table_suffix=arguments.name_table_suffix,
+                             cache_directory=arguments.cache_directory, recover=arguments.recover)
+    paths = [path for path in arguments.paths if path != "-"]
+    results = analyzer.analyze_stream(paths)
+    if len(paths) < len(arguments.paths):
+        results = itertools.chain([_analyze_standard_input(arguments.tree, arguments.recover)], results)
+
+    failed = False
+    for result in results:
+        failed = failed or not result.is_ok()
+        print(json.dumps(to_record(result), separators=(",", ":")), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
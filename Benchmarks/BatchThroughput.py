@@ -0,0 +1,45 @@
+# Times BatchAnalyzer over a directory of generated Ruby files with a growing number of worker processes.
+# Usage: python -m Benchmarks.BatchThroughput [file_count] [kilobytes_per_file]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from BatchAnalyzer import BatchAnalyzer
+from Benchmarks.Programs import generate_source
+
+
+def main(file_count, kilobytes):
+    directory = tempfile.mkdtemp()
+    try:
+        source = generate_source(kilobytes * 1024)
+        for index in range(file_count):
+            with open(os.path.join(directory, "file_%04d.rb" % index), "w") as output:
+                output.write(source)
+
+        cpu_count = os.cpu_count() or 1
+        worker_counts = []
+        workers = 1
+        while workers < cpu_count:
+            worker_counts.append(workers)
+            workers *= 2
+        worker_counts.append(cpu_count)
+
+        print("%d files of %d KB, %d cores" % (file_count, kilobytes, cpu_count))
+        single = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            results = BatchAnalyzer(workers=workers).analyze(directory)
+            elapsed = time.perf_counter() - start
+            if single is None:
+                single = elapsed
+            failed = sum(1 for result in results if not result.is_ok())
+            print("%3d workers %8.3f s %7.2fx speedup %3d failed" % (workers, elapsed, single / elapsed, failed))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 64)
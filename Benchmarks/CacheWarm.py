@@ -0,0 +1,52 @@
+# Compares a cold and a warm ParseCache run over a directory of generated Ruby files with hashing them alone.
+# Usage: python -m Benchmarks.CacheWarm [file_count] [kilobytes_per_file]
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from BatchAnalyzer import BatchAnalyzer
+from Benchmarks.Programs import generate_source
+
+
+def timed(action):
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def hash_files(paths):
+    for path in paths:
+        with open(path, "rb") as source_file:
+            hashlib.sha256(source_file.read()).hexdigest()
+
+
+def main(file_count, kilobytes):
+    directory = tempfile.mkdtemp()
+    cache_directory = tempfile.mkdtemp()
+    try:
+        source = generate_source(kilobytes * 1024)
+        paths = []
+        for index in range(file_count):
+            # Every file differs in its first line, so each one gets its own cache entry.
+            path = os.path.join(directory, "file_%04d.rb" % index)
+            with open(path, "w") as output:
+                output.write("x = %d\n" % index + source)
+            paths.append(path)
+
+        print("%d files of %d KB" % (file_count, kilobytes))
+        print("%-14s %8.3f s" % ("no cache", timed(lambda: BatchAnalyzer(workers=1).analyze(paths))))
+        analyzer = BatchAnalyzer(workers=1, cache_directory=cache_directory)
+        print("%-14s %8.3f s" % ("cold cache", timed(lambda: analyzer.analyze(paths))))
+        print("%-14s %8.3f s" % ("warm cache", timed(lambda: analyzer.analyze(paths))))
+        print("%-14s %8.3f s" % ("hashing only", timed(lambda: hash_files(paths))))
+    finally:
+        shutil.rmtree(directory)
+        shutil.rmtree(cache_directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 16)
@@ -0,0 +1,111 @@
+# Compares analyzing a generated file with a fresh BatchAnalyzer process per file against sending it to a
+# running AnalysisDaemon over standard input and output, one request at a time and pipelined. Overhead is
+# the time a request takes beyond analyzing the file, i.e. what the daemon saves or costs.
+# Usage: python -m Benchmarks.DaemonLatency [request_count]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from Benchmarks.Generator import ProgramGenerator
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def write_program(directory):
+    # A typical file: a hundred lines and the name table that checks it.
+    generator = ProgramGenerator(seed=7, line_count=100)
+    source_path = os.path.join(directory, "program.rb")
+    name_table_path = os.path.join(directory, "program.json")
+    with open(source_path, "w", encoding="utf-8") as source_file:
+        source_file.write(generator.generate_source())
+    tree = SyntaxAnalyzer().parse_tokens(generator.generate_tokens())
+    with open(name_table_path, "w", encoding="utf-8") as name_table_file:
+        json.dump([{"name": identifier.name, "type": identifier.type, "scope": identifier.scope}
+                   for identifier in generator.name_table(tree)], name_table_file)
+    return source_path, name_table_path
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name, latencies, overheads):
+    print("%-28s %10.2f %10.2f %12.2f" % (name, percentile(latencies, 0.5) * 1000,
+                                          percentile(latencies, 0.95) * 1000, percentile(overheads, 0.5) * 1000))
+
+
+def time_processes(source_path, count):
+    latencies = []
+    overheads = []
+    for _ in range(count):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-m", "BatchAnalyzer", source_path], stdout=subprocess.PIPE,
+                                check=True).stdout
+        latencies.append(time.perf_counter() - start)
+        overheads.append(latencies[-1] - json.loads(output.decode("utf-8"))["elapsed"])
+    return latencies, overheads
+
+
+def time_daemon(source_path, name_table_path, workers, count):
+    # Returns the latencies and overheads of count requests sent one at a time, and the seconds taken by
+    # count requests sent all at once.
+    daemon = subprocess.Popen([sys.executable, "-m", "AnalysisDaemon", "--workers", str(workers),
+                               "--name-table", name_table_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        def request(request_id):
+            return json.dumps({"id": request_id, "path": source_path}).encode("utf-8") + b"\n"
+
+        def answer():
+            response = json.loads(daemon.stdout.readline().decode("utf-8"))
+            if response.get("result", {}).get("status") != "ok":
+                raise ValueError("DAEMON FAILED " + json.dumps(response))
+            return response["result"]["elapsed"]
+
+        # The first answer also waits for the workers to start and warm up.
+        daemon.stdin.write(request(-1))
+        daemon.stdin.flush()
+        answer()
+
+        latencies = []
+        overheads = []
+        for request_id in range(count):
+            start = time.perf_counter()
+            daemon.stdin.write(request(request_id))
+            daemon.stdin.flush()
+            elapsed = answer()
+            latencies.append(time.perf_counter() - start)
+            overheads.append(latencies[-1] - elapsed)
+
+        start = time.perf_counter()
+        daemon.stdin.write(b"".join(request(request_id) for request_id in range(count)))
+        daemon.stdin.flush()
+        for _ in range(count):
+            answer()
+        pipelined = time.perf_counter() - start
+    finally:
+        daemon.stdin.close()
+        daemon.wait()
+    return latencies, overheads, pipelined
+
+
+def main(request_count):
+    directory = tempfile.mkdtemp()
+    source_path, name_table_path = write_program(directory)
+    try:
+        print("%-28s %10s %10s %12s" % ("", "median ms", "p95 ms", "overhead ms"))
+        report("process per file", *time_processes(source_path, max(1, request_count // 20)))
+        for workers in (1, 0):
+            latencies, overheads, pipelined = time_daemon(source_path, name_table_path, workers, request_count)
+            report("daemon, %d workers" % workers, latencies, overheads)
+            print("%-28s %10.0f requests/s" % ("  pipelined", request_count / pipelined))
+    finally:
+        for path in (source_path, name_table_path):
+            os.remove(path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
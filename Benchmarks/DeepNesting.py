@@ -0,0 +1,31 @@
+# Times parsing one long expression, deeply nested parentheses and deeply nested while blocks,
+# sizes well past what the Python recursion limit would allow a recursive parser.
+# Usage: python -m Benchmarks.DeepNesting [max_size]
+import sys
+import time
+
+from Benchmarks.Programs import generate_long_expression_tokens, generate_nested_par_tokens, \
+    generate_nested_while_tokens
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def main(max_size):
+    print("recursion limit %d" % sys.getrecursionlimit())
+    print("%-16s %8s %8s %10s" % ("input", "size", "tokens", "ms"))
+    for title, generate in (("expression terms", generate_long_expression_tokens),
+                            ("parentheses", generate_nested_par_tokens),
+                            ("while depth", generate_nested_while_tokens)):
+        size = 1000
+        while size <= max_size:
+            tokens = generate(size)
+            start = time.perf_counter()
+            tree = SyntaxAnalyzer().parse_tokens(tokens)
+            elapsed = time.perf_counter() - start
+            if tree is None:
+                raise ValueError("CAN'T BUILD SYNTAX TREE")
+            print("%-16s %8d %8d %10.1f" % (title, size, len(tokens), elapsed * 1000))
+            size *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
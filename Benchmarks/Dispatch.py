@@ -0,0 +1,52 @@
+# Counts the handlers a common block invokes per line, with ordered trial and with predictive dispatch.
+# The packrat memo is off so that every attempted handler is counted.
+# Usage: python -m Benchmarks.Dispatch [line_count]
+import inspect
+import sys
+import time
+
+from Benchmarks.Programs import generate_tokens
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def count_handler_invocations(analyzer, tokens):
+    counts = {}
+    # Resuming a block handler's generator is reported as another call of the same frame.
+    started = set()
+
+    def profile(frame, event, argument):
+        caller = frame.f_back
+        name = frame.f_code.co_name
+        if event == "call" and caller is not None and caller.f_code.co_name == "__run" and \
+                name.startswith("__handle_") and name != "__handle_common_block" and frame not in started:
+            if frame.f_code.co_flags & inspect.CO_GENERATOR:
+                started.add(frame)
+            counts[name] = counts.get(name, 0) + 1
+
+    sys.setprofile(profile)
+    try:
+        analyzer.parse_tokens(tokens)
+    finally:
+        sys.setprofile(None)
+    return counts
+
+
+def main(line_count):
+    tokens = generate_tokens(line_count)
+    line_total = len(set(token.line_number for token in tokens))
+
+    for title, predictive in (("ordered trial", False), ("predictive", True)):
+        counts = count_handler_invocations(SyntaxAnalyzer(predictive=predictive, packrat=False), tokens)
+
+        start = time.perf_counter()
+        SyntaxAnalyzer(predictive=predictive, packrat=False).parse_tokens(tokens)
+        elapsed = time.perf_counter() - start
+
+        total = sum(counts.values())
+        print("%-13s %8d invocations %6.2f per line %8.3f s" % (title, total, total / line_total, elapsed))
+        for name in sorted(counts, key=counts.get, reverse=True):
+            print("    %-32s %8d" % (name, counts[name]))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
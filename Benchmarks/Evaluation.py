@@ -0,0 +1,191 @@
+# Runs a loop-heavy program three ways: walking its syntax tree node by node, compiled with Evaluator, and
+# as the same program written by hand in Python, and reports the time of each.
+# Usage: python -m Benchmarks.Evaluation [iteration_count]
+import operator
+import sys
+import time
+
+from Evaluator import Program, divide
+from Lexer import Lexer
+from SyntaxAnalyzer import SyntaxAnalyzer
+from Utils import Constants, Lexem
+
+source = """total = 0
+count = 0
+for i in 1..n
+  j = 0
+  while j < 10 do
+    if i % 3 == 0 && j < 5
+      total = total + i * j
+    elseif j == 7 || i % 5 == 0
+      total = total - i / 2
+    else
+      total = total + 1
+      count = count + 1
+    end
+    j = j + 1
+  end
+end
+"""
+
+
+def native(n):
+    total = 0
+    count = 0
+    for i in range(1, n + 1):
+        j = 0
+        while j < 10:
+            if i % 3 == 0 and j < 5:
+                total = total + i * j
+            elif j == 7 or i % 5 == 0:
+                total = total - i // 2
+            else:
+                total = total + 1
+                count = count + 1
+            j = j + 1
+    return {"total": total, "count": count, "n": n, "i": n, "j": 10}
+
+
+class TreeInterpreter(object):
+    # Evaluates a tree as it stands, every time: statements by node kind, expressions by collecting their
+    # operands and operators from the tree and grouping them by precedence.
+    __functions = {"||": None, "&&": None,
+                   "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+                   "==": operator.eq, "!=": operator.ne,
+                   "+": operator.add, "-": operator.sub,
+                   "*": operator.mul, "/": divide, "%": operator.mod,
+                   "**": operator.pow}
+    __precedences = {"||": 1, "&&": 2, "<": 3, "<=": 3, ">": 3, ">=": 3, "==": 3, "!=": 3,
+                     "+": 4, "-": 4, "*": 5, "/": 5, "%": 5, "**": 6}
+
+    def run(self, tree, variables=None):
+        self.__variables = dict(variables or {})
+        self.__run_block(tree)
+        return self.__variables
+
+    def __run_block(self, block):
+        statements = block.children
+        index = 0
+        while index < len(statements):
+            statement = statements[index]
+            index += 1
+            if statement.kind == Lexem.identifier_expression:
+                # Assignments whose values start on the same line are one multiple assignment.
+                assignments = [statement]
+                line_number = self.__first_token(statement.children[2]).line_number
+                while index < len(statements) and statements[index].kind == Lexem.identifier_expression and \
+                        self.__first_token(statements[index].children[2]).line_number == line_number:
+                    assignments.append(statements[index])
+                    index += 1
+                values = [self.__evaluate(assignment.children[2]) for assignment in assignments]
+                for assignment, value in zip(assignments, values):
+                    self.__variables[assignment.children[0].children[0].kind] = value
+            elif statement.kind == Constants.while_block:
+                while self.__evaluate(statement.children[1]):
+                    self.__run_block(statement.children[3])
+            elif statement.kind == Constants.for_block:
+                iterator = statement.children[3]
+                name = statement.children[1].children[0].children[0].kind
+                for value in range(self.__evaluate(iterator.children[0]), self.__evaluate(iterator.children[3]) + 1):
+                    self.__variables[name] = value
+                    self.__run_block(statement.children[4])
+            elif statement.kind == Constants.if_block:
+                children = statement.children
+                for child_index, child in enumerate(children):
+                    if child.kind == "ELSE" or \
+                            (child.kind == "IF" or child.kind == "ELSEIF") and \
+                            self.__evaluate(children[child_index + 1]):
+                        self.__run_block(children[child_index + (1 if child.kind == "ELSE" else 2)])
+                        break
+            else:
+                self.__evaluate(statement)
+
+    def __first_token(self, node):
+        while node.token is None:
+            node = node.children[0]
+        return node.token
+
+    def __evaluate(self, node):
+        items = []
+        self.__collect(node, None, items)
+        value, _ = self.__climb(items, 0, 0, True)
+        return value
+
+    def __collect(self, node, parent_kind, items):
+        if node.children:
+            for child in node.children:
+                self.__collect(child, node.kind, items)
+        elif parent_kind == Lexem.identifier:
+            items.append(("variable", node.kind))
+        elif parent_kind == Lexem.number:
+            items.append(("value", float(node.kind) if "." in node.kind else int(node.kind)))
+        elif parent_kind == Lexem.bool:
+            items.append(("value", node.kind == "true"))
+        elif parent_kind == Lexem.string:
+            items.append(("value", node.kind[1:-1]))
+        elif node.kind == "(" or node.kind == ")":
+            items.append((node.kind, None))
+        else:
+            items.append(("operator", node.kind))
+
+    def __climb(self, items, index, minimum, evaluate):
+        # Precedence climbing from items[index]; returns the value and the index after it. Without evaluate
+        # the operands are only skipped, for the right of a && or || that is already decided.
+        kind, value = items[index]
+        if kind == "(":
+            value, index = self.__climb(items, index + 1, 0, evaluate)
+        elif kind == "variable" and evaluate:
+            value = self.__variables[value]
+        index += 1
+        while index < len(items) and items[index][0] == "operator" and \
+                self.__precedences[items[index][1]] >= minimum:
+            name = items[index][1]
+            precedence = self.__precedences[name]
+            if name == "&&" or name == "||":
+                decided = evaluate and (not value if name == "&&" else value)
+                right, index = self.__climb(items, index + 1, precedence + 1, evaluate and not decided)
+                if evaluate and not decided:
+                    value = right
+            else:
+                right, index = self.__climb(items, index + 1, precedence if name == "**" else precedence + 1,
+                                            evaluate)
+                if evaluate:
+                    value = self.__functions[name](value, right)
+        return value, index
+
+
+def best_time(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(iteration_count):
+    tree = SyntaxAnalyzer().parse_tokens(list(Lexer(source)))
+    start = time.perf_counter()
+    program = Program(tree)
+    compiled = time.perf_counter() - start
+
+    native_time, expected = best_time(lambda: native(iteration_count))
+    program_time, result = best_time(lambda: program.run({"n": iteration_count}))
+    if result != expected:
+        raise ValueError("COMPILED PROGRAM DISAGREES " + repr(result) + " " + repr(expected))
+    interpreter_count = max(1, iteration_count // 20)
+    interpreter_time, result = best_time(lambda: TreeInterpreter().run(tree, {"n": interpreter_count}), 1)
+    if result != native(interpreter_count):
+        raise ValueError("TREE INTERPRETER DISAGREES " + repr(result))
+    interpreter_time *= iteration_count / interpreter_count
+
+    print("%d outer iterations, compiled in %.2f ms" % (iteration_count, compiled * 1000))
+    print("%-20s %10s %10s" % ("", "ms", "x native"))
+    for name, elapsed in (("native Python", native_time), ("compiled", program_time),
+                          ("tree interpreter", interpreter_time)):
+        print("%-20s %10.1f %10.2f" % (name, elapsed * 1000, elapsed / native_time))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,186 @@
+# Seeded random programs covering every construct the parser supports: nested while, for and
+# if/elseif/else blocks, arithmetic and logical chains, and single and multiple assignment.
+import random
+
+from Benchmarks.Programs import ProgramBuilder, render_source
+from Model.Identifier import Identifier
+from SyntaxAnalyzer import SemanticAnalyzer
+from Utils import Lexem
+
+statement_kinds = ("arithmetic", "logical", "assignment", "multiple_assignment", "while", "for", "if")
+block_kinds = ("while", "for", "if")
+
+default_weights = {"arithmetic": 2,
+                   "logical": 2,
+                   "assignment": 6,
+                   "multiple_assignment": 2,
+                   "while": 1,
+                   "for": 1,
+                   "if": 1}
+
+
+class ProgramGenerator(object):
+    # The same seed and settings always give the same program. Numeric variables are named n0, n1, ...
+    # and boolean ones b0, b1, ..., which is what lets name_table type every identifier.
+    # line_count is roughly the program's length in lines, max_depth how deep blocks nest,
+    # chain_length the most operands in an expression and block_size the most statements in a block.
+    # weights gives the relative frequency of each of statement_kinds.
+    __weights = None
+
+    def __init__(self, seed=0, line_count=1000, max_depth=3, chain_length=6, block_size=5, variable_count=20,
+                 weights=None):
+        self.__seed = seed
+        self.__line_count = line_count
+        self.__max_depth = max_depth
+        self.__chain_length = chain_length
+        self.__block_size = block_size
+        self.__variable_count = variable_count
+        self.__weights = dict(default_weights)
+        self.__weights.update(weights or {})
+
+    def generate_tokens(self):
+        self.__random = random.Random(self.__seed)
+        builder = ProgramBuilder()
+        while builder.line_number < self.__line_count:
+            self.__add_statement(builder, 0)
+        return builder.tokens
+
+    def generate_source(self):
+        return render_source(self.generate_tokens())
+
+    def name_table(self, tree):
+        # Exactly the records check_tree consumes on tree, so the check passes.
+        counts = SemanticAnalyzer([]).count_identifiers(tree)
+        identifiers = []
+        for (name, scope), count in sorted(counts.items()):
+            identifier_type = Lexem.bool if name.startswith("b") else Lexem.number
+            identifiers.extend(Identifier(name, identifier_type, scope) for _ in range(count))
+        return identifiers
+
+    def __choose_kind(self, depth):
+        kinds = [kind for kind in statement_kinds if depth < self.__max_depth or kind not in block_kinds]
+        total = sum(self.__weights[kind] for kind in kinds)
+        choice = self.__random.random() * total
+        for kind in kinds:
+            choice -= self.__weights[kind]
+            if choice < 0:
+                return kind
+        return kinds[-1]
+
+    def __add_statement(self, builder, depth):
+        kind = self.__choose_kind(depth)
+        if kind == "arithmetic":
+            builder.add_line(*self.__arithmetic(self.__chain_length, True))
+        elif kind == "logical":
+            builder.add_line(*self.__logical(self.__chain_length, True))
+        elif kind == "assignment":
+            if self.__random.random() < 0.5:
+                builder.add_line(self.__variable("n"), (Lexem.assign, "="),
+                                 *self.__arithmetic(self.__chain_length, False))
+            else:
+                builder.add_line(self.__variable("b"), (Lexem.assign, "="),
+                                 *self.__logical(self.__chain_length, True))
+        elif kind == "multiple_assignment":
+            count = self.__random.randint(2, 4)
+            targets = []
+            values = []
+            for index in range(count):
+                if index:
+                    targets.append((Lexem.comma, ","))
+                    values.append((Lexem.comma, ","))
+                if self.__random.random() < 0.5:
+                    targets.append(self.__variable("n"))
+                    values.extend(self.__arithmetic(3, False))
+                else:
+                    targets.append(self.__variable("b"))
+                    values.extend(self.__logical(3, True))
+            builder.add_line(*(targets + [(Lexem.assign, "=")] + values))
+        elif kind == "while":
+            builder.add_line((Lexem.while_keyword, "while"), *(self.__logical(self.__chain_length, False) +
+                                                               [(Lexem.do_keyword, "do")]))
+            self.__add_block(builder, depth + 1)
+            builder.add_line((Lexem.end_keyword, "end"))
+        elif kind == "for":
+            builder.add_line((Lexem.for_keyword, "for"), self.__variable("n"), (Lexem.in_keyword, "in"),
+                             self.__operand(), (Lexem.dot, "."), (Lexem.dot, "."), self.__operand())
+            self.__add_block(builder, depth + 1)
+            builder.add_line((Lexem.end_keyword, "end"))
+        else:
+            builder.add_line((Lexem.if_keyword, "if"), *self.__logical(self.__chain_length, False))
+            self.__add_block(builder, depth + 1)
+            for _ in range(self.__random.randint(0, 2)):
+                builder.add_line((Lexem.elseif_keyword, "elseif"), *self.__logical(self.__chain_length, False))
+                self.__add_block(builder, depth + 1)
+            if self.__random.random() < 0.5:
+                builder.add_line((Lexem.else_keyword, "else"))
+                self.__add_block(builder, depth + 1)
+            builder.add_line((Lexem.end_keyword, "end"))
+
+    def __add_block(self, builder, depth):
+        for _ in range(self.__random.randint(1, self.__block_size)):
+            self.__add_statement(builder, depth)
+
+    def __variable(self, prefix):
+        return Lexem.identifier, "%s%d" % (prefix, self.__random.randrange(self.__variable_count))
+
+    def __operand(self):
+        if self.__random.random() < 0.5:
+            return Lexem.number, str(self.__random.randint(0, 99))
+        return self.__variable("n")
+
+    def __group_chance(self, length):
+        # About two parenthesized groups per chain at most, so a program grows linearly with chain_length
+        # rather than each group's own groups multiplying it.
+        return min(0.2, 2.0 / length)
+
+    def __arithmetic(self, length, parentheses):
+        return self.__arithmetic_chain(self.__random.randint(1, length), parentheses)
+
+    def __arithmetic_chain(self, count, parentheses):
+        # count operands, a parenthesized group counting as the operands inside it, so a chain stays as
+        # long as asked however its groups nest. Groups only go where the grammar takes them: in
+        # statements of their own, not on the right of an assignment or inside a comparison.
+        lexems = []
+        while count:
+            if lexems:
+                lexems.append((Lexem.arithmetic_operation, self.__random.choice("+-*/")))
+            if parentheses and count > 1 and self.__random.random() < 0.2:
+                size = self.__random.randint(1, count // 2)
+                lexems.append((Lexem.l_par, "("))
+                lexems.extend(self.__arithmetic_chain(size, True))
+                lexems.append((Lexem.r_par, ")"))
+            else:
+                size = 1
+                lexems.append(self.__operand())
+            count -= size
+        return lexems
+
+    def __logical(self, length, assigned):
+        return self.__logical_chain(self.__random.randint(2 if assigned else 1, max(2, length)), assigned)
+
+    def __logical_chain(self, count, assigned):
+        # As __arithmetic_chain, with a comparison counting as one operand. A chain standing as a statement
+        # or assigned has at least two operands and starts with a boolean, since both places are tried as
+        # arithmetic first and a lone identifier would be taken as a number.
+        lexems = []
+        while count:
+            if lexems:
+                lexems.append((Lexem.logical_operation, self.__random.choice(("&&", "||"))))
+            choice = self.__random.random()
+            size = 1
+            if assigned and not lexems or choice < 0.4:
+                if self.__random.random() < 0.2:
+                    lexems.append((Lexem.bool, self.__random.choice(("true", "false"))))
+                else:
+                    lexems.append(self.__variable("b"))
+            elif choice < 0.8 or count < 2:
+                lexems.extend(self.__arithmetic(2, False))
+                lexems.append((Lexem.comparison_operation, self.__random.choice(("<", "<=", ">", ">=", "==", "!="))))
+                lexems.extend(self.__arithmetic(2, False))
+            else:
+                size = self.__random.randint(1, count // 2)
+                lexems.append((Lexem.l_par, "("))
+                lexems.extend(self.__logical_chain(size, False))
+                lexems.append((Lexem.r_par, ")"))
+            count -= size
+        return lexems
@@ -0,0 +1,50 @@
+# Measures how long each analyzer module takes to import in a fresh interpreter, using python -X importtime,
+# and checks the times against a budget. Exits with status 1 if any module is over its budget.
+# Usage: python -m Benchmarks.ImportTime [repeat]
+import os
+import subprocess
+import sys
+
+# Milliseconds, cumulative over everything the module imports that the interpreter hadn't already.
+budgets = (("SyntaxAnalyzer", 15),
+           ("Lexer", 25),
+           ("TreeBuilder", 25),
+           ("ParseCache", 25),
+           ("IncrementalAnalyzer", 35),
+           ("ParallelParser", 25),
+           ("BatchAnalyzer", 35))
+
+
+def measure(module, repeat):
+    # Best of repeat runs, after one run to write the bytecode, so compiling the sources isn't counted.
+    environment = dict(os.environ)
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    command = [sys.executable, "-X", "importtime", "-c", "import " + module]
+    best = None
+    for run in range(repeat + 1):
+        output = subprocess.run(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                universal_newlines=True, check=True).stderr
+        for line in output.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                microseconds = int(fields[1])
+        if run and (best is None or microseconds < best):
+            best = microseconds
+    return best / 1000
+
+
+def main(repeat):
+    print("%-20s %10s %10s" % ("module", "ms", "budget"))
+    over = []
+    for module, budget in budgets:
+        elapsed = measure(module, repeat)
+        print("%-20s %10.1f %10d%s" % (module, elapsed, budget, "  OVER" if elapsed > budget else ""))
+        if elapsed > budget:
+            over.append(module)
+    if over:
+        print("over budget: " + ", ".join(over))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
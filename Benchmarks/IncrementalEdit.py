@@ -0,0 +1,50 @@
+# Times single-line edits through IncrementalAnalyzer against a full parse of the same file.
+# Usage: python -m Benchmarks.IncrementalEdit [line_count] [edit_count]
+import random
+import sys
+import time
+
+from Benchmarks.Programs import generate_tokens
+from IncrementalAnalyzer import IncrementalAnalyzer
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def report(title, timings):
+    timings.sort()
+    print("%-26s median %9.3f ms   max %9.3f ms" %
+          (title, timings[len(timings) // 2] * 1000, timings[-1] * 1000))
+
+
+def main(line_count, edit_count):
+    start = time.perf_counter()
+    SyntaxAnalyzer().parse_tokens(generate_tokens(line_count))
+    print("%-26s        %9.3f ms" % ("full parse, %d lines" % line_count, (time.perf_counter() - start) * 1000))
+
+    analyzer = IncrementalAnalyzer(generate_tokens(line_count))
+    generator = random.Random(0)
+
+    # Rewrites one line in place, the way a keystroke inside an expression would.
+    replace_timings = []
+    for _ in range(edit_count):
+        line_number = generator.randrange(analyzer.get_line_count())
+        text = " ".join(token.lexem for token in analyzer.get_line_tokens(line_number))
+        edited = text.replace("+", "-") if "+" in text else text.replace("-", "+")
+        start = time.perf_counter()
+        analyzer.update_source(line_number, line_number, edited)
+        replace_timings.append(time.perf_counter() - start)
+
+    # Inserting a line renumbers every line below it, which costs a pass over the tokens after the edit.
+    insert_timings = []
+    for _ in range(edit_count):
+        line_number = generator.randrange(analyzer.get_line_count())
+        start = time.perf_counter()
+        analyzer.update_source(line_number, line_number - 1, "x = x + 1")
+        insert_timings.append(time.perf_counter() - start)
+
+    report("replace one line", replace_timings)
+    report("insert one line", insert_timings)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 200)
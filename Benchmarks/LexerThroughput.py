@@ -0,0 +1,28 @@
+# Measures Lexer throughput in MB/s and tokens/s on generated Ruby source.
+# Usage: python -m Benchmarks.LexerThroughput [megabytes ...]
+import io
+import sys
+import time
+
+from Benchmarks.Programs import generate_source
+from Lexer import Lexer
+
+
+def main(sizes):
+    print("%8s %12s %10s %14s" % ("size", "tokens", "MB/s", "tokens/s"))
+    for megabytes in sizes:
+        source = generate_source(megabytes * 1024 * 1024)
+        size = len(source.encode("utf-8"))
+
+        start = time.perf_counter()
+        token_count = 0
+        for _ in Lexer(io.StringIO(source)):
+            token_count += 1
+        elapsed = time.perf_counter() - start
+
+        print("%6d MB %12d %10.2f %14.0f" %
+              (megabytes, token_count, size / 1024.0 / 1024.0 / elapsed, token_count / elapsed))
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [1, 10, 100])
@@ -0,0 +1,25 @@
+# Times SyntaxAnalyzer.parse_tokens on generated programs of growing length.
+# Usage: python -m Benchmarks.LineIndex [line_count ...]
+import sys
+import time
+
+from Benchmarks.Programs import generate_tokens
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def main(line_counts):
+    previous = None
+    for line_count in line_counts:
+        tokens = generate_tokens(line_count)
+        start = time.perf_counter()
+        SyntaxAnalyzer().parse_tokens(tokens)
+        elapsed = time.perf_counter() - start
+
+        per_line = elapsed / line_count * 1e6
+        ratio = "" if previous is None else " (x%.2f per line vs previous)" % (per_line / previous)
+        print("%8d lines %8d tokens %9.3f s %8.2f us/line%s" % (line_count, len(tokens), elapsed, per_line, ratio))
+        previous = per_line
+
+
+if __name__ == "__main__":
+    main([int(argument) for argument in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,76 @@
+# Compares load time and peak memory of TreeBuilder.build_name_table against loading the whole file with
+# json.load first, on generated name tables written as a JSON array and as JSON lines.
+# Each load runs in a fresh interpreter so its peak RSS is its own.
+# Usage: python -m Benchmarks.NameTableLoad [record_count]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Prints the seconds taken and the peak RSS in KB.
+loaders = (("json.load", """
+import json
+from NameTable import NameTable
+from Model.Identifier import Identifier
+with open(path, encoding="utf-8") as data_file:
+    raw_identifiers = json.load(data_file)
+identifiers = [Identifier(name=raw["name"], type=raw["type"], scope=raw["scope"]) for raw in raw_identifiers]
+name_table = NameTable(identifiers)
+"""), ("build_name_table", """
+from TreeBuilder import TreeBuilder
+name_table = TreeBuilder(path).build_name_table()
+"""))
+
+measure = """
+import resource, sys, time
+path = sys.argv[1]
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(name_table.get_symbol_table()))
+"""
+
+types = ("int", "float", "bool", "string", "array")
+
+
+def write_table(path, record_count, json_lines):
+    # Names repeat across scopes, as in generated tables where each scope declares its own variables.
+    with open(path, "w", encoding="utf-8") as data_file:
+        if not json_lines:
+            data_file.write("[\n")
+        for index in range(record_count):
+            record = json.dumps({"name": "variable_%d" % (index % 50000), "type": types[index % len(types)],
+                                 "scope": index // 50000}, indent=None if json_lines else 2)
+            if json_lines:
+                data_file.write(record + "\n")
+            else:
+                data_file.write(record + (",\n" if index + 1 < record_count else "\n"))
+        if not json_lines:
+            data_file.write("]\n")
+
+
+def main(record_count):
+    directory = tempfile.mkdtemp()
+    print("%-8s %-18s %10s %10s %10s" % ("format", "loader", "file MB", "seconds", "peak MB"))
+    try:
+        for title, json_lines in (("array", False), ("lines", True)):
+            path = os.path.join(directory, "table" + (".jsonl" if json_lines else ".json"))
+            write_table(path, record_count, json_lines)
+            file_size = os.path.getsize(path) / (1 << 20)
+            for loader, code in loaders:
+                if json_lines and loader == "json.load":
+                    continue
+                output = subprocess.run([sys.executable, "-c", measure % code, path], stdout=subprocess.PIPE,
+                                        universal_newlines=True, check=True).stdout.split()
+                elapsed, peak, count = float(output[0]), int(output[1]) / 1024, int(output[2])
+                if count != record_count:
+                    raise ValueError("LOADED %d OF %d RECORDS" % (count, record_count))
+                print("%-8s %-18s %10.1f %10.2f %10.1f" % (title, loader, file_size, elapsed, peak))
+            os.remove(path)
+    finally:
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,35 @@
+# Times parsing if/elseif/else blocks nested through their elseif branch, with and without the packrat memo.
+# Usage: python -m Benchmarks.NestedIf [max_depth]
+import sys
+import time
+
+from Benchmarks.Programs import generate_nested_if_tokens
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+# Without the memo each extra level multiplies the time, so deeper levels are skipped once a parse gets this slow.
+slow_parse_seconds = 5.0
+
+
+def parse_time(tokens, packrat):
+    start = time.perf_counter()
+    SyntaxAnalyzer(packrat=packrat).parse_tokens(tokens)
+    return time.perf_counter() - start
+
+
+def main(max_depth):
+    print("%6s %8s %14s %14s" % ("depth", "tokens", "packrat ms", "plain ms"))
+    plain_too_slow = False
+    for depth in range(2, max_depth + 1, 2):
+        tokens = generate_nested_if_tokens(depth)
+        packrat = parse_time(tokens, True)
+        if plain_too_slow:
+            plain = "-"
+        else:
+            plain_seconds = parse_time(tokens, False)
+            plain_too_slow = plain_seconds > slow_parse_seconds
+            plain = "%.1f" % (plain_seconds * 1000)
+        print("%6d %8d %14.1f %14s" % (depth, len(tokens), packrat * 1000, plain))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 24)
@@ -0,0 +1,43 @@
+# Parses one large generated program serially and with ParallelParser on several worker counts, checks
+# that every tree is the serial one, and reports the speedups. The pre-scan and rebuilding the chunk trees
+# run in the parent process, so their times bound the speedup however many cores there are.
+# Usage: python -m Benchmarks.ParallelParse [line_count]
+import os
+import sys
+import time
+
+from Benchmarks.Generator import ProgramGenerator
+from Model.BinaryTree import BinaryTree, encode_tree
+from ParallelParser import ParallelParser, find_statement_starts
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main(line_count):
+    tokens = ProgramGenerator(seed=1, line_count=line_count).generate_tokens()
+    serial_time, tree = timed(lambda: SyntaxAnalyzer().parse_tokens(tokens))
+    expected = encode_tree(tree)
+    scan_time, starts = timed(lambda: find_statement_starts(tokens))
+    rebuild_time, _ = timed(lambda: BinaryTree(expected).to_syntax_node())
+    del tree
+
+    print("%d lines, %d tokens, %d top-level statements, %d CPUs" % (line_count, len(tokens), len(starts),
+                                                                    os.cpu_count() or 1))
+    print("pre-scan %.2f s, rebuilding the tree %.2f s" % (scan_time, rebuild_time))
+    print("%-12s %10s %10s" % ("", "s", "speedup"))
+    print("%-12s %10.2f %10.2f" % ("serial", serial_time, 1.0))
+    for workers in sorted(set((2, 4, os.cpu_count() or 1)) - set((1,))):
+        elapsed, tree = timed(lambda: ParallelParser(workers=workers).parse_tokens(tokens))
+        if encode_tree(tree) != expected:
+            raise ValueError("PARALLEL TREE DIFFERS WITH %d WORKERS" % workers)
+        del tree
+        print("%-12s %10.2f %10.2f" % ("%d workers" % workers, elapsed, serial_time / elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,40 @@
+# Parses a generated program without and with a Profiler, reports what profiling costs, and prints
+# the statistics of the productions that took the most time.
+# Usage: python -m Benchmarks.ProductionProfile [line_count]
+import sys
+import time
+
+from Benchmarks.Programs import generate_tokens
+from Profiler import Profiler
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def time_parse(tokens, profiler, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        SyntaxAnalyzer(profiler=profiler).parse_tokens(tokens)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(line_count):
+    tokens = generate_tokens(line_count)
+    plain = time_parse(tokens, None)
+    profiled = time_parse(tokens, Profiler())
+    print("%d tokens: %.1f ms, %.1f ms profiled (x%.2f)" % (len(tokens), plain * 1000, profiled * 1000,
+                                                             profiled / plain))
+
+    profiler = Profiler()
+    SyntaxAnalyzer(profiler=profiler).parse_tokens(tokens)
+    print("%-52s %8s %8s %8s %8s %8s %9s %9s" % ("production", "calls", "memo", "success", "fail", "tokens",
+                                                 "total ms", "self ms"))
+    for stats in profiler.get_stats()[:10]:
+        print("%-52s %8d %8d %8d %8d %8d %9.1f %9.1f" % (stats.name, stats.calls, stats.memo_hits, stats.successes,
+                                                         stats.failures, stats.tokens, stats.total_time * 1000,
+                                                         stats.self_time * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
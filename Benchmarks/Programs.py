@@ -0,0 +1,135 @@
+from Model.Token import Token
+from Utils import Lexem
+
+
+class ProgramBuilder(object):
+
+    def __init__(self):
+        self.tokens = []
+        self.line_number = 0
+
+    def add_line(self, *lexems):
+        for position_number, (lexem_class, lexem) in enumerate(lexems):
+            self.tokens.append(Token(lexem_class=lexem_class,
+                                     lexem=lexem,
+                                     line_number=self.line_number,
+                                     position_number=position_number))
+        self.line_number += 1
+
+
+def _add_statement(builder, index):
+    kind = index % 4
+    if kind == 0:
+        builder.add_line((Lexem.identifier, "x"), (Lexem.assign, "="),
+                         (Lexem.identifier, "x"), (Lexem.arithmetic_operation, "+"), (Lexem.number, "1"))
+    elif kind == 1:
+        builder.add_line((Lexem.number, "1"), (Lexem.arithmetic_operation, "*"),
+                         (Lexem.l_par, "("), (Lexem.identifier, "y"), (Lexem.arithmetic_operation, "-"),
+                         (Lexem.number, "2"), (Lexem.r_par, ")"))
+    elif kind == 2:
+        builder.add_line((Lexem.identifier, "a"), (Lexem.logical_operation, "&&"),
+                         (Lexem.number, "1"), (Lexem.comparison_operation, "<"), (Lexem.identifier, "y"))
+    else:
+        builder.add_line((Lexem.identifier, "p"), (Lexem.comma, ","), (Lexem.identifier, "q"),
+                         (Lexem.assign, "="), (Lexem.number, "1"), (Lexem.comma, ","), (Lexem.identifier, "x"))
+
+
+def generate_tokens(line_count):
+    # Builds roughly line_count lines of while/for/if blocks, each wrapping a few simple statements.
+    builder = ProgramBuilder()
+    index = 0
+    while builder.line_number < line_count:
+        block = index % 3
+        if block == 0:
+            builder.add_line((Lexem.while_keyword, "while"), (Lexem.identifier, "x"),
+                             (Lexem.comparison_operation, "<"), (Lexem.number, "10"), (Lexem.do_keyword, "do"))
+        elif block == 1:
+            builder.add_line((Lexem.for_keyword, "for"), (Lexem.identifier, "i"), (Lexem.in_keyword, "in"),
+                             (Lexem.number, "1"), (Lexem.dot, "."), (Lexem.dot, "."), (Lexem.identifier, "n"))
+        else:
+            builder.add_line((Lexem.if_keyword, "if"), (Lexem.identifier, "x"),
+                             (Lexem.comparison_operation, ">"), (Lexem.number, "3"))
+        for statement in range(4):
+            _add_statement(builder, index + statement)
+        if block == 2:
+            builder.add_line((Lexem.else_keyword, "else"))
+            _add_statement(builder, index)
+        builder.add_line((Lexem.end_keyword, "end"))
+        index += 1
+    return builder.tokens
+
+
+def render_source(tokens):
+    # Ruby text for tokens, one line per line number and one space between lexems.
+    lines = []
+    line = []
+    line_number = 0
+    for token in tokens:
+        if token.line_number != line_number:
+            lines.append(" ".join(line))
+            line = []
+            line_number = token.line_number
+        line.append(token.lexem)
+    lines.append(" ".join(line))
+    return "\n".join(lines) + "\n"
+
+
+def generate_source(byte_count):
+    # Renders generated tokens as Ruby text. Whole blocks are repeated until the text reaches
+    # byte_count bytes, so it may run over by part of a block.
+    block = render_source(generate_tokens(min(1000, max(1, byte_count // 16))))
+    return block * max(1, -(-byte_count // len(block)))
+
+
+def _add_nested_if(builder, depth):
+    builder.add_line((Lexem.if_keyword, "if"), (Lexem.identifier, "x"),
+                     (Lexem.comparison_operation, ">"), (Lexem.number, "3"))
+    _add_statement(builder, 0)
+    builder.add_line((Lexem.elseif_keyword, "elseif"), (Lexem.identifier, "a"))
+    if depth > 1:
+        _add_nested_if(builder, depth - 1)
+    else:
+        _add_statement(builder, 2)
+    builder.add_line((Lexem.else_keyword, "else"))
+    _add_statement(builder, 1)
+    builder.add_line((Lexem.end_keyword, "end"))
+
+
+def generate_nested_if_tokens(depth):
+    # if/elseif/else blocks nested depth levels deep through their elseif branch.
+    builder = ProgramBuilder()
+    _add_nested_if(builder, depth)
+    return builder.tokens
+
+
+def generate_long_expression_tokens(term_count):
+    # One line: x = 1 + y * 1 + y * ... with term_count operands.
+    builder = ProgramBuilder()
+    lexems = [(Lexem.identifier, "x"), (Lexem.assign, "=")]
+    for term in range(term_count):
+        if term:
+            lexems.append((Lexem.arithmetic_operation, "+" if term % 2 else "*"))
+        lexems.append((Lexem.number, "1") if term % 2 == 0 else (Lexem.identifier, "y"))
+    builder.add_line(*lexems)
+    return builder.tokens
+
+
+def generate_nested_par_tokens(depth):
+    # One line: ( ( ... ( 1 + y ) ... ) ) with depth pairs of parentheses.
+    builder = ProgramBuilder()
+    builder.add_line(*([(Lexem.l_par, "(")] * depth +
+                       [(Lexem.number, "1"), (Lexem.arithmetic_operation, "+"), (Lexem.identifier, "y")] +
+                       [(Lexem.r_par, ")")] * depth))
+    return builder.tokens
+
+
+def generate_nested_while_tokens(depth):
+    # while blocks nested depth levels deep, a statement in each.
+    builder = ProgramBuilder()
+    for level in range(depth):
+        builder.add_line((Lexem.while_keyword, "while"), (Lexem.identifier, "x"),
+                         (Lexem.comparison_operation, "<"), (Lexem.number, "10"), (Lexem.do_keyword, "do"))
+        _add_statement(builder, level)
+    for level in range(depth):
+        builder.add_line((Lexem.end_keyword, "end"))
+    return builder.tokens
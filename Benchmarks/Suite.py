@@ -0,0 +1,169 @@
+# Times parse_tokens and check_tree and measures their peak memory on generated programs, then compares
+# the results with a stored baseline. Exits with status 1 on any regression, or if the baseline is missing
+# or was recorded for different programs. Run with --update to record a new baseline instead.
+# Timings depend on the machine, so record the baseline on the machine that checks against it.
+# Usage: python -m Benchmarks.Suite [--update] [--baseline path] [--repeat N] [--tolerance T]
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from Benchmarks.Generator import ProgramGenerator
+from SymbolTable import SymbolTable
+from SyntaxAnalyzer import SemanticAnalyzer, SyntaxAnalyzer
+
+default_baseline = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Name and ProgramGenerator settings of each case. Changing a case needs a new baseline.
+cases = (("mixed", {"seed": 1, "line_count": 2000}),
+         ("deep_blocks", {"seed": 2, "line_count": 2000, "max_depth": 40, "block_size": 2,
+                          "weights": {"while": 3, "for": 3, "if": 3}}),
+         ("long_chains", {"seed": 3, "line_count": 100, "chain_length": 200}),
+         ("multiple_assignment", {"seed": 4, "line_count": 2000, "weights": {"multiple_assignment": 20}}))
+
+# What each measure is and whether it is compared with the time or the memory tolerance.
+measures = (("parse_ms", "time"),
+            ("check_ms", "time"),
+            ("parse_peak_kb", "memory"),
+            ("check_peak_kb", "memory"))
+
+
+def count_nodes(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(function):
+    # Peak KB allocated while function runs, over what was allocated before it.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(settings, repeat):
+    generator = ProgramGenerator(**settings)
+    tokens = generator.generate_tokens()
+    tree = SyntaxAnalyzer().parse_tokens(tokens)
+    identifiers = generator.name_table(tree)
+
+    def parse():
+        SyntaxAnalyzer().parse_tokens(tokens)
+
+    def check():
+        # Only the check is measured: the symbol table is built before, outside of it.
+        semantic_analyzer = SemanticAnalyzer(symbol_tables.pop())
+        semantic_analyzer.check_tree(tree)
+
+    # check consumes its table's records, so each run gets a fresh one.
+    symbol_tables = [SymbolTable(identifiers) for _ in range(repeat)]
+    check_time = best_time(check, repeat)
+    symbol_tables = [SymbolTable(identifiers)]
+    check_peak = peak_memory(check)
+
+    return {"settings": settings,
+            "tokens": len(tokens),
+            "nodes": count_nodes(tree),
+            "parse_ms": round(best_time(parse, repeat) * 1000, 3),
+            "check_ms": round(check_time * 1000, 3),
+            "parse_peak_kb": round(peak_memory(parse), 1),
+            "check_peak_kb": round(check_peak, 1)}
+
+
+def compare(name, result, expected, tolerance, memory_tolerance):
+    # Returns the regressions in result against expected, the baseline of the same case.
+    if expected is None:
+        return ["%s: not in the baseline" % name]
+    if expected["settings"] != result["settings"] or expected["tokens"] != result["tokens"] or \
+            expected["nodes"] != result["nodes"]:
+        return ["%s: generated %d tokens and %d nodes, the baseline has %d and %d for its settings" %
+                (name, result["tokens"], result["nodes"], expected["tokens"], expected["nodes"])]
+    regressions = []
+    for measure, kind in measures:
+        limit = expected[measure] * (1 + (tolerance if kind == "time" else memory_tolerance))
+        if result[measure] > limit:
+            regressions.append("%s: %s %.1f, baseline %.1f (+%.0f%%)" %
+                               (name, measure, result[measure], expected[measure],
+                                (result[measure] / expected[measure] - 1) * 100))
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the analyzers against a stored baseline.")
+    parser.add_argument("--update", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--baseline", default=default_baseline, help="baseline JSON file")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timing, the best is kept")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="how much slower than the baseline a timing may be, as a fraction")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1,
+                        help="how much more memory than the baseline a case may use, as a fraction")
+    arguments = parser.parse_args(argv)
+
+    baseline = None
+    if not arguments.update:
+        if not os.path.exists(arguments.baseline):
+            print("REGRESSION: no baseline at %s, record one with --update" % arguments.baseline,
+                  file=sys.stderr)
+            return 1
+        with open(arguments.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["cases"]
+
+    print("%-20s %8s %8s %10s %10s %12s %12s" % ("case", "tokens", "nodes", "parse ms", "check ms",
+                                                 "parse KB", "check KB"))
+    results = {}
+    regressions = []
+    for name, settings in cases:
+        result = results[name] = run_case(settings, arguments.repeat)
+        if baseline is not None:
+            case_regressions = compare(name, result, baseline.get(name), arguments.tolerance,
+                                       arguments.memory_tolerance)
+            if case_regressions:
+                # A regression has to show in a second measurement too, so one noisy run doesn't fail.
+                retry = run_case(settings, arguments.repeat)
+                for measure, _ in measures:
+                    result[measure] = min(result[measure], retry[measure])
+                case_regressions = compare(name, result, baseline.get(name), arguments.tolerance,
+                                           arguments.memory_tolerance)
+            regressions.extend(case_regressions)
+        print("%-20s %8d %8d %10.1f %10.1f %12.1f %12.1f" % (name, result["tokens"], result["nodes"],
+                                                             result["parse_ms"], result["check_ms"],
+                                                             result["parse_peak_kb"], result["check_peak_kb"]))
+
+    if arguments.update:
+        with open(arguments.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({"python": sys.version.split()[0], "cases": results}, baseline_file, indent=2,
+                      sort_keys=True)
+            baseline_file.write("\n")
+        print("baseline written to " + arguments.baseline)
+        return 0
+
+    for regression in regressions:
+        print("REGRESSION " + regression, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
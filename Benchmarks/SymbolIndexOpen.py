@@ -0,0 +1,68 @@
+# Compares getting a name table ready for SemanticAnalyzer by loading its JSON with mapping a compiled
+# SymbolIndex, on generated tables of growing size, and the time per lookup in each.
+# Usage: python -m Benchmarks.SymbolIndexOpen [max_record_count]
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+from Benchmarks.NameTableLoad import write_table
+from SymbolIndex import open_symbol_index
+from TreeBuilder import TreeBuilder
+
+
+def time_lookups(symbol_table, keys):
+    start = time.perf_counter()
+    for name, scope in keys:
+        if symbol_table.lookup(name, scope) is None:
+            raise ValueError("MISSING RECORD " + name)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main(max_record_count):
+    directory = tempfile.mkdtemp()
+    json_path = os.path.join(directory, "table.json")
+    index_path = os.path.join(directory, "table.index")
+    print("%10s %12s %12s %12s %14s %14s" % ("records", "compile s", "load ms", "open ms", "load lookup us",
+                                             "index lookup us"))
+    try:
+        record_count = 10000
+        while record_count <= max_record_count:
+            write_table(json_path, record_count, False)
+            start = time.perf_counter()
+            TreeBuilder(json_path).build_symbol_index(index_path)
+            compiled = time.perf_counter() - start
+
+            # Collected first, so a collection owed by the previous step doesn't land in the timings.
+            symbol_table = None
+            gc.collect()
+            start = time.perf_counter()
+            symbol_index = open_symbol_index(index_path)
+            opened = time.perf_counter() - start
+            gc.collect()
+            start = time.perf_counter()
+            symbol_table = TreeBuilder(json_path).build_name_table().get_symbol_table()
+            loaded = time.perf_counter() - start
+
+            # write_table names its records variable_<index mod 50000> in scope index // 50000.
+            random.seed(record_count)
+            keys = []
+            for _ in range(10000):
+                index = random.randrange(record_count)
+                keys.append(("variable_%d" % (index % 50000), index // 50000))
+            print("%10d %12.2f %12.1f %12.3f %14.2f %14.2f" % (record_count, compiled, loaded * 1000, opened * 1000,
+                                                               time_lookups(symbol_table, keys) * 1e6,
+                                                               time_lookups(symbol_index, keys) * 1e6))
+            symbol_index.close()
+            record_count *= 10
+    finally:
+        for path in (json_path, index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,55 @@
+# Compares the SyntaxNode tree returned by parse_tokens with the treelib Tree built from it by to_treelib().
+# Usage: python -m Benchmarks.SyntaxTree [line_count]
+import sys
+import time
+import tracemalloc
+
+from Benchmarks.Programs import generate_tokens
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def count_nodes(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def main(line_count):
+    tokens = generate_tokens(line_count)
+
+    start = time.perf_counter()
+    tree = SyntaxAnalyzer().parse_tokens(tokens)
+    parse_time = time.perf_counter() - start
+
+    node_count = count_nodes(tree)
+    start = time.perf_counter()
+    tree.to_treelib()
+    convert_time = time.perf_counter() - start
+
+    # Memory is measured separately from timing, tracemalloc slows allocation down.
+    tree, _, native_size = measure(lambda: SyntaxAnalyzer().parse_tokens(tokens))
+    _, _, treelib_size = measure(tree.to_treelib)
+
+    print("%d lines, %d tokens, %d nodes" % (line_count, len(tokens), node_count))
+    print("SyntaxNode  parse %8.3f s %10.0f tokens/s %7.1f bytes/node" %
+          (parse_time, len(tokens) / parse_time, float(native_size) / node_count))
+    print("to_treelib  +%7.3f s %10.0f tokens/s %7.1f bytes/node" %
+          (convert_time, len(tokens) / (parse_time + convert_time), float(treelib_size) / node_count))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
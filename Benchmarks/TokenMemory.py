@@ -0,0 +1,34 @@
+# Compares the memory held by a list of Token objects with a TokenBuffer of the same tokens.
+# Usage: python -m Benchmarks.TokenMemory [line_count]
+import sys
+import time
+import tracemalloc
+
+from Benchmarks.Programs import generate_tokens
+from Model.TokenBuffer import TokenBuffer
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(line_count):
+    tokens, list_size = measure(lambda: generate_tokens(line_count))
+    buffer, buffer_size = measure(lambda: TokenBuffer(generate_tokens(line_count)))
+
+    print("%d lines, %d tokens" % (line_count, len(tokens)))
+    for title, token_source, size in (("Token list", tokens, list_size), ("TokenBuffer", buffer, buffer_size)):
+        start = time.perf_counter()
+        SyntaxAnalyzer().parse_tokens(token_source)
+        elapsed = time.perf_counter() - start
+        print("%-12s %12d bytes %7.1f bytes/token   parse %7.3f s" %
+              (title, size, float(size) / len(tokens), elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,69 @@
+# Compares the size and load time of a parse tree pickled as treelib and SyntaxNode objects with BinaryTree.
+# Usage: python -m Benchmarks.TreeFormat [line_count]
+import pickle
+import sys
+import time
+
+from Benchmarks.Programs import generate_tokens
+from Model.BinaryTree import BinaryTree, encode_tree
+from SyntaxAnalyzer import SyntaxAnalyzer
+from Utils import Lexem
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def count_identifiers(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.kind == Lexem.identifier:
+            count += 1
+        stack.extend(node.children)
+    return count
+
+
+def count_identifiers_in_view(view):
+    count = 0
+    for index in range(len(view)):
+        if view.kind(index) == Lexem.identifier:
+            count += 1
+    return count
+
+
+def main(line_count):
+    tree = SyntaxAnalyzer().parse_tokens(generate_tokens(line_count))
+    node_count = len(BinaryTree(encode_tree(tree)))
+    print("%d lines, %d nodes" % (line_count, node_count))
+    print("%-22s %12s %10s %12s %12s" % ("format", "bytes", "B/node", "load ms", "walk ms"))
+
+    treelib_data = pickle.dumps(tree.to_treelib(), pickle.HIGHEST_PROTOCOL)
+    node_data = pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)
+    binary_data = encode_tree(tree)
+
+    loaded, load_time = timed(lambda: pickle.loads(treelib_data))
+    print("%-22s %12d %10.1f %12.1f %12s" %
+          ("pickled treelib.Tree", len(treelib_data), float(len(treelib_data)) / node_count, load_time * 1000, "-"))
+
+    loaded, load_time = timed(lambda: pickle.loads(node_data))
+    _, walk_time = timed(lambda: count_identifiers(loaded))
+    print("%-22s %12d %10.1f %12.1f %12.1f" %
+          ("pickled SyntaxNode", len(node_data), float(len(node_data)) / node_count, load_time * 1000, walk_time * 1000))
+
+    loaded, load_time = timed(lambda: BinaryTree(binary_data).to_syntax_node())
+    _, walk_time = timed(lambda: count_identifiers(loaded))
+    print("%-22s %12d %10.1f %12.1f %12.1f" %
+          ("BinaryTree, rebuilt", len(binary_data), float(len(binary_data)) / node_count, load_time * 1000, walk_time * 1000))
+
+    view, load_time = timed(lambda: BinaryTree(binary_data))
+    _, walk_time = timed(lambda: count_identifiers_in_view(view))
+    print("%-22s %12d %10.1f %12.3f %12.1f" %
+          ("BinaryTree, in place", len(binary_data), float(len(binary_data)) / node_count, load_time * 1000, walk_time * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,243 @@
+import re
+
+from Model.Diagnostic import DiagnosticError
+from Utils import Constants, DiagnosticCode, Lexem
+
+# Python orders and groups these operators as Ruby does, so expressions keep their shape when written as
+# Python. Comparisons and ** don't associate to the left, and / is a call to divide.
+precedences = {"||": 1, "&&": 2,
+               "<": 3, "<=": 3, ">": 3, ">=": 3, "==": 3, "!=": 3,
+               "+": 4, "-": 4,
+               "*": 5, "/": 5, "%": 5,
+               "**": 6}
+atom_precedence = 7
+python_operators = {"||": "or", "&&": "and"}
+python_literals = {"true": "True", "false": "False"}
+
+operand_kinds = (Lexem.identifier, Lexem.number, Lexem.bool, Lexem.string)
+operator_kinds = (Lexem.arithmetic_operation, Lexem.comparison_operation, Lexem.logical_operation)
+
+# Python refuses source indented more deeply than this.
+max_depth = 99
+
+# The value of a variable that has none yet.
+undefined = object()
+
+
+def divide(left, right):
+    # Ruby's /: integers divide to the floor, anything else exactly.
+    if type(left) is int and type(right) is int:
+        return left // right
+    return left / right
+
+
+class Program(object):
+    # A program compiled from a tree returned by SyntaxAnalyzer.parse_tokens. The tree is translated once
+    # into the source of a Python function, in source, whose local variables are the program's variables, so
+    # a variable is a slot in the function's frame and every statement runs as Python bytecode.
+    # run(variables) runs it from the given values and returns the values the program's variables end with.
+    # Values are Python's: integers, floats, strings and booleans. Types aren't checked at run time, which
+    # is SemanticAnalyzer's job; a checked program only puts booleans where Ruby and Python truth differ.
+    # A multiple assignment assigns every variable at once, as in Ruby, so a, b = b, a swaps.
+    source = ""
+    __function = None
+
+    def __init__(self, tree):
+        self.__slots = {}
+        self.__names = []
+        body = []
+        positions = []
+        self.__add_block(tree, 1, body, positions)
+
+        # Variables run() has no value for are left unbound, so reading one raises UnboundLocalError.
+        lines = ["def program(values):"]
+        for slot in range(len(self.__names)):
+            lines.extend(("    v%d = values[%d]" % (slot, slot),
+                          "    if v%d is undefined:" % slot,
+                          "        del v%d" % slot))
+        self.__positions = [None] * len(lines) + positions + [None]
+        lines.extend(body)
+        lines.append("    return locals()")
+        self.source = "\n".join(lines) + "\n"
+
+        namespace = {"divide": divide, "undefined": undefined}
+        try:
+            exec(compile(self.source, "<program>", "exec"), namespace)
+        except SyntaxError as error:
+            # e.g. more than 20 nested loops, which CPython doesn't compile.
+            raise ValueError("CAN'T COMPILE PROGRAM: " + str(error.msg).upper())
+        self.__function = namespace["program"]
+
+    def get_variables(self):
+        # The program's variable names, in slot order.
+        return list(self.__names)
+
+    def run(self, variables=None):
+        # variables maps names to starting values; names the program doesn't use are ignored.
+        values = [undefined] * len(self.__names)
+        for name, value in (variables or {}).items():
+            slot = self.__slots.get(name)
+            if slot is not None:
+                values[slot] = value
+        try:
+            frame = self.__function(values)
+        except (NameError, ArithmeticError, TypeError) as error:
+            raise self.__runtime_error(error)
+        return dict((self.__names[int(name[1:])], value) for name, value in frame.items() if name != "values")
+
+    def __runtime_error(self, error):
+        # A DiagnosticError at the statement the innermost line of the program's frame came from.
+        position = None
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == "<program>":
+                position = self.__positions[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        line_number, position_number = position or (0, 0)
+        if isinstance(error, NameError):
+            match = re.search(r"'v(\d+)'", str(error))
+            name = self.__names[int(match.group(1))] if match else "?"
+            return DiagnosticError(DiagnosticCode.undefined_variable, line_number, position_number,
+                                   "UNDEFINED VARIABLE " + name + " AT LINE NUMBER: " + str(line_number))
+        if isinstance(error, ZeroDivisionError):
+            return DiagnosticError(DiagnosticCode.division_by_zero, line_number, position_number,
+                                   "DIVISION BY ZERO AT LINE NUMBER: " + str(line_number))
+        return DiagnosticError(DiagnosticCode.invalid_operand, line_number, position_number,
+                               "INVALID OPERAND " + str(error).upper() + " AT LINE NUMBER: " + str(line_number))
+
+    def __variable(self, name):
+        slot = self.__slots.get(name)
+        if slot is None:
+            slot = self.__slots[name] = len(self.__names)
+            self.__names.append(name)
+        return "v%d" % slot
+
+    def __get_position(self, node):
+        # Line and position of the first token under node.
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.token is not None:
+                return node.token.line_number, node.token.position_number
+            stack.extend(reversed(node.children))
+        return None
+
+    def __add_block(self, block, depth, lines, positions):
+        if depth > max_depth:
+            raise ValueError("CAN'T COMPILE PROGRAM: BLOCKS NESTED MORE THAN %d DEEP" % max_depth)
+        indent = "    " * depth
+        statements = block.children
+        if not statements:
+            lines.append(indent + "pass")
+            positions.append(None)
+        index = 0
+        while index < len(statements):
+            statement = statements[index]
+            index += 1
+            if statement.kind == Lexem.identifier_expression:
+                # Statements never share a line, so assignments whose values start on the same line are the
+                # parser's split of one multiple assignment.
+                assignments = [statement]
+                position = self.__get_position(statement.children[2])
+                while index < len(statements) and statements[index].kind == Lexem.identifier_expression and \
+                        self.__get_position(statements[index].children[2])[0] == position[0]:
+                    assignments.append(statements[index])
+                    index += 1
+                lines.append(indent + "%s = %s" % (
+                    ", ".join(self.__variable(assignment.children[0].children[0].kind) for assignment in assignments),
+                    ", ".join(self.__expression(assignment.children[2]) for assignment in assignments)))
+                positions.append(position)
+            elif statement.kind == Constants.while_block:
+                condition = statement.children[1]
+                lines.append(indent + "while %s:" % self.__expression(condition))
+                positions.append(self.__get_position(condition))
+                self.__add_block(statement.children[3], depth + 1, lines, positions)
+            elif statement.kind == Constants.for_block:
+                # FOR, the variable, IN, the range, the block and END; the range is start, DOT, DOT, end.
+                iterator = statement.children[3]
+                start, end = iterator.children[0], iterator.children[3]
+                lines.append(indent + "for %s in range(%s, %s + 1):" % (
+                    self.__variable(statement.children[1].children[0].children[0].kind),
+                    self.__expression(start), self.__expression(end)))
+                positions.append(self.__get_position(start))
+                self.__add_block(statement.children[4], depth + 1, lines, positions)
+            elif statement.kind == Constants.if_block:
+                # IF, a condition and a block, the same for each ELSEIF, then ELSE and a block, then END.
+                children = statement.children
+                for child_index, child in enumerate(children):
+                    if child.kind == "IF" or child.kind == "ELSEIF":
+                        condition = children[child_index + 1]
+                        lines.append(indent + "%s %s:" % ("if" if child.kind == "IF" else "elif",
+                                                         self.__expression(condition)))
+                        positions.append(self.__get_position(condition))
+                        self.__add_block(children[child_index + 2], depth + 1, lines, positions)
+                    elif child.kind == "ELSE":
+                        lines.append(indent + "else:")
+                        positions.append(None)
+                        self.__add_block(children[child_index + 1], depth + 1, lines, positions)
+            elif statement.kind == Constants.arithmetic_expression or statement.kind == Lexem.logical_expression:
+                # Evaluated for its errors; the value is dropped.
+                lines.append(indent + self.__expression(statement))
+                positions.append(self.__get_position(statement))
+            else:
+                raise ValueError("CAN'T COMPILE STATEMENT " + statement.kind)
+
+    def __expression(self, node):
+        # The tree nests expressions to the right whatever their operators, so the operands and operators are
+        # taken in source order and regrouped by precedence, with a shunting yard.
+        operands = []
+        operators = []
+        stack = [(node, None)]
+        while stack:
+            node, parent_kind = stack.pop()
+            if node.children:
+                stack.extend((child, node.kind) for child in reversed(node.children))
+            elif parent_kind in operand_kinds:
+                operands.append((self.__operand(parent_kind, node.kind), atom_precedence))
+            elif parent_kind in operator_kinds:
+                precedence = precedences[node.kind]
+                while operators and operators[-1] != "(" and \
+                        (precedences[operators[-1]] > precedence or
+                         precedences[operators[-1]] == precedence and node.kind != "**"):
+                    self.__reduce(operators, operands)
+                operators.append(node.kind)
+            elif node.kind == "(":
+                operators.append("(")
+            elif node.kind == ")":
+                while operators[-1] != "(":
+                    self.__reduce(operators, operands)
+                operators.pop()
+            else:
+                raise ValueError("CAN'T COMPILE EXPRESSION " + node.kind)
+        while operators:
+            self.__reduce(operators, operands)
+        return operands[-1][0]
+
+    def __operand(self, kind, lexem):
+        if kind == Lexem.identifier:
+            return self.__variable(lexem)
+        if kind == Lexem.number:
+            if "." in lexem:
+                return repr(float(lexem))
+            # Leading zeros are ignored, so 010 is ten, as in the tree interpreter of Benchmarks/Evaluation.py.
+            return repr(int(lexem))
+        if kind == Lexem.bool:
+            return python_literals[lexem]
+        # Quotes stripped and the rest taken as written; escapes aren't interpreted.
+        return repr(lexem[1:-1])
+
+    def __reduce(self, operators, operands):
+        # Parenthesizes an operand only where Python would otherwise group it differently.
+        operator = operators.pop()
+        right, right_precedence = operands.pop()
+        left, left_precedence = operands.pop()
+        precedence = precedences[operator]
+        if operator == "/":
+            operands.append(("divide(%s, %s)" % (left, right), atom_precedence))
+            return
+        left_associative = precedence != 3 and operator != "**"
+        if left_precedence < precedence or left_precedence == precedence and not left_associative:
+            left = "(" + left + ")"
+        if right_precedence < precedence or right_precedence == precedence and operator != "**":
+            right = "(" + right + ")"
+        operands.append(("%s %s %s" % (left, python_operators.get(operator, operator), right), precedence))
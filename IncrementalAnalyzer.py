@@ -0,0 +1,237 @@
+from bisect import bisect_right
+
+from Lexer import Lexer
+from Model.StatementSpan import StatementSpan
+from SyntaxAnalyzer import SyntaxAnalyzer, SemanticAnalyzer
+from Utils import Constants
+
+
+class IncrementalAnalyzer(object):
+    __block_kinds = (Constants.while_block, Constants.for_block, Constants.if_block)
+
+    __tree = None
+    __semantic_analyzer = None
+
+    def __init__(self, tokens, name_table=None):
+        # The tree is parsed here; call check() for the first semantic check, update() re-checks what it touches.
+        self.__lines = []
+        for token in tokens:
+            while len(self.__lines) <= token.line_number:
+                self.__lines.append([])
+            self.__lines[token.line_number].append(token)
+
+        if name_table is not None:
+            self.__semantic_analyzer = SemanticAnalyzer(name_table)
+
+        self.__full_parse()
+
+    def get_tree(self):
+        return self.__tree
+
+    def get_line_count(self):
+        return len(self.__lines)
+
+    def get_line_tokens(self, line_number):
+        return list(self.__lines[line_number])
+
+    def check(self):
+        self.__check(0, len(self.__spans), None)
+
+    def update_source(self, first_line, last_line, text):
+        new_lines = [[] for _ in range(text.count("\n") + 1)]
+        for token in Lexer(text):
+            new_lines[token.line_number].append(token)
+        return self.update(first_line, last_line, new_lines)
+
+    def update(self, first_line, last_line, new_lines):
+        # Replaces lines first_line..last_line with new_lines, one list of tokens per line.
+        # A last_line of first_line - 1 inserts the new lines before first_line.
+        if first_line < 0 or last_line < first_line - 1 or last_line >= len(self.__lines):
+            raise IndexError("LINE RANGE OUT OF BOUNDS " + str(first_line) + " " + str(last_line))
+
+        line_delta = len(new_lines) - (last_line - first_line + 1)
+        new_last_line = last_line + line_delta
+
+        if self.__tree is None:
+            self.__replace_lines(first_line, last_line, new_lines, line_delta)
+            self.__full_parse()
+            self.check()
+            return self.__tree
+
+        spans = self.__spans
+        end = bisect_right(self.__first_lines, last_line)
+        start = end
+        while start > 0 and spans[start - 1].last_line >= first_line:
+            start -= 1
+
+        # Blocks containing the whole edit, innermost first; each is tried before falling back to the next.
+        units = []
+        if end - start == 1 and spans[start].contains(first_line, last_line):
+            unit = spans[start]
+            while unit is not None:
+                units.append(unit)
+                unit = self.__find_nested_block(unit, first_line, last_line)
+            units.reverse()
+
+        # Region lines are worked out before the spans are shifted and in the numbering after the edit.
+        unit_regions = [(unit.first_line, unit.last_line + line_delta) for unit in units]
+        if units:
+            old_uses = units[-1].uses
+        else:
+            old_uses = self.__merge_uses(spans[start:end])
+            region_first_line = first_line
+            region_last_line = new_last_line
+            if start < end:
+                region_first_line = min(first_line, spans[start].first_line)
+                if spans[end - 1].last_line > last_line:
+                    region_last_line = spans[end - 1].last_line + line_delta
+
+        self.__shift_spans(start, first_line, last_line, line_delta)
+        self.__replace_lines(first_line, last_line, new_lines, line_delta)
+
+        top_start = None
+        for unit, (region_first_line, region_last_line) in zip(units, unit_regions):
+            siblings = unit.parent.children if unit.parent is not None else spans
+            span_index = siblings.index(unit)
+            child_index = unit.block.children.index(unit.node)
+            new_spans = self.__reparse(region_first_line, region_last_line,
+                                       unit.block, unit.parent, siblings,
+                                       span_index, span_index + 1, child_index, child_index + 1)
+            if new_spans is not None:
+                top_start, top_end = start, end
+                if unit.parent is None:
+                    top_end = start + len(new_spans)
+                break
+
+        if top_start is None and not units:
+            new_spans = self.__reparse(region_first_line, region_last_line, self.__tree, None, spans,
+                                       start, end, start, end)
+            if new_spans is not None:
+                top_start, top_end = start, start + len(new_spans)
+
+        if top_start is None:
+            self.__full_parse()
+            self.check()
+            return self.__tree
+
+        self.__first_lines = [span.first_line for span in self.__spans]
+        self.__check(top_start, top_end, old_uses)
+        return self.__tree
+
+    def __find_nested_block(self, span, first_line, last_line):
+        for child in span.children:
+            if child.node.kind in self.__block_kinds and child.contains(first_line, last_line):
+                return child
+        return None
+
+    def __replace_lines(self, first_line, last_line, new_lines, line_delta):
+        for line_offset, line in enumerate(new_lines):
+            for token in line:
+                token.line_number = first_line + line_offset
+        if line_delta != 0:
+            for line in self.__lines[last_line + 1:]:
+                for token in line:
+                    token.line_number += line_delta
+        self.__lines[first_line:last_line + 1] = new_lines
+
+    def __shift_spans(self, start, first_line, last_line, line_delta):
+        # Moves spans below the edit and stretches the ones around it; spans inside it are about to be replaced.
+        if line_delta == 0:
+            return
+        pending = [self.__spans[start:]]
+        while pending:
+            for span in pending.pop():
+                if span.first_line > last_line:
+                    span.shift(line_delta)
+                elif span.last_line > last_line:
+                    span.last_line += line_delta
+                    pending.append(span.children)
+
+    def __reparse(self, region_first_line, region_last_line, block, parent, siblings,
+                  span_start, span_end, child_start, child_end):
+        tokens = [token for line in self.__lines[region_first_line:region_last_line + 1] for token in line]
+        recorded = []
+        try:
+            region_tree = SyntaxAnalyzer().parse_tokens(tokens, recorded)
+        except ValueError:
+            return None
+        if region_tree is None:
+            return None
+
+        new_spans = self.__collect_spans(region_tree, block, parent, recorded, tokens)
+        if not block.children:
+            block.children = []
+        block.children[child_start:child_end] = region_tree.children
+        siblings[span_start:span_end] = new_spans
+        return new_spans
+
+    def __full_parse(self):
+        tokens = [token for line in self.__lines for token in line]
+        recorded = []
+        self.__tree = None
+        self.__spans = []
+        self.__first_lines = []
+
+        tree = SyntaxAnalyzer().parse_tokens(tokens, recorded)
+        if tree is None:
+            raise ValueError("CAN'T BUILD SYNTAX TREE")
+        self.__tree = tree
+        self.__spans = self.__collect_spans(tree, tree, None, recorded, tokens)
+        self.__first_lines = [span.first_line for span in self.__spans]
+        if self.__semantic_analyzer is not None:
+            for span in self.__spans:
+                span.uses = self.__semantic_analyzer.count_identifiers(span.node, 0)
+
+    def __collect_spans(self, region_tree, block, parent, recorded, tokens):
+        lines = {}
+        for node, start, end in recorded:
+            lines[id(node)] = (tokens[start].line_number, tokens[end - 1].line_number)
+
+        # The statements of region_tree land in block; the ones below them stay in their own blocks.
+        spans = []
+        pending = [(region_tree, block, parent, spans)]
+        while pending:
+            source_block, target_block, parent_span, siblings = pending.pop()
+            for node in source_block.children:
+                first_line, last_line = lines[id(node)]
+                span = StatementSpan(node, target_block, parent_span, first_line, last_line)
+                siblings.append(span)
+                for nested_block in reversed(self.__nested_blocks(node)):
+                    pending.append((nested_block, nested_block, span, span.children))
+        return spans
+
+    def __nested_blocks(self, node):
+        blocks = []
+        pending = list(reversed(node.children))
+        while pending:
+            child = pending.pop()
+            if child.kind == Constants.common_block:
+                blocks.append(child)
+            else:
+                pending.extend(reversed(child.children))
+        return blocks
+
+    def __merge_uses(self, spans):
+        uses = {}
+        for span in spans:
+            if span.uses is not None:
+                for key, count in span.uses.items():
+                    uses[key] = uses.get(key, 0) + count
+        return uses
+
+    def __check(self, start, end, old_uses):
+        # old_uses holds what the replaced statements consumed. Records are consumed in order, so when
+        # the new statements consume a different number, every statement after them is re-checked too.
+        if self.__semantic_analyzer is None:
+            return
+        spans = self.__spans
+
+        if old_uses is not None:
+            for span in spans[start:end]:
+                span.uses = self.__semantic_analyzer.count_identifiers(span.node, 0)
+            if self.__merge_uses(spans[start:end]) != old_uses:
+                end = len(spans)
+
+        self.__semantic_analyzer.get_symbol_table().set_consumed(self.__merge_uses(spans[:start]))
+        for span in spans[start:end]:
+            self.__semantic_analyzer.check_tree(span.node, 0)
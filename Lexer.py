@@ -0,0 +1,130 @@
+import re
+
+from Utils import Lexem, DiagnosticCode
+from Model.Diagnostic import DiagnosticError
+from Model.Token import Token
+
+
+class Lexer(object):
+    __keywords = {
+        "if": Lexem.if_keyword,
+        "else": Lexem.else_keyword,
+        "elsif": Lexem.elseif_keyword,
+        "elseif": Lexem.elseif_keyword,
+        "for": Lexem.for_keyword,
+        "while": Lexem.while_keyword,
+        "and": Lexem.and_keyword,
+        "or": Lexem.or_keyword,
+        "end": Lexem.end_keyword,
+        "do": Lexem.do_keyword,
+        "in": Lexem.in_keyword,
+        "true": Lexem.bool,
+        "false": Lexem.bool,
+    }
+
+    # One alternation for every lexem, so a single match classifies a token by the group that matched.
+    # Leading blanks are eaten by the prefix rather than matched as tokens of their own.
+    # Longer operators come before their prefixes; ERROR catches anything no other group accepts.
+    __groups = (
+        ("NEWLINE", r"\n", None),
+        ("COMMENT", r"#[^\n]*", None),
+        ("IDENTIFIER", r"[A-Za-z_]\w*", Lexem.identifier),
+        ("NUMBER", r"\d+(?:\.\d+)?", Lexem.number),
+        ("STRING", r"\"[^\"\n]*\"|'[^'\n]*'", Lexem.string),
+        ("COMPARISON", r"<=|>=|==|!=|<|>", Lexem.comparison_operation),
+        ("LOGICAL", r"&&|\|\|", Lexem.logical_operation),
+        ("ARITHMETIC", r"\*\*|[-+*/%]", Lexem.arithmetic_operation),
+        ("ASSIGN", r"=", Lexem.assign),
+        ("L_PAR", r"\(", Lexem.l_par),
+        ("R_PAR", r"\)", Lexem.r_par),
+        ("L_CURL", r"\{", Lexem.l_curl),
+        ("R_CURL", r"\}", Lexem.r_curl),
+        ("L_SQUARE", r"\[", Lexem.l_square),
+        ("R_SQUARE", r"\]", Lexem.r_square),
+        ("DOT", r"\.", Lexem.dot),
+        ("COMMA", r",", Lexem.comma),
+        ("ERROR", r"[^ \t\r]", None),
+    )
+
+    __pattern = re.compile(r"[ \t\r]*(?:" + "|".join("(?P<%s>%s)" % (name, pattern)
+                                                    for name, pattern, _ in __groups) + ")")
+
+    # Indexed by match.lastindex; the named groups are the only capturing groups in the pattern.
+    __lexem_classes = (None,) + tuple(lexem_class for _, _, lexem_class in __groups)
+
+    __newline_index = 1
+    __comment_index = 2
+    __identifier_index = 3
+    __error_index = len(__groups)
+
+    __diagnostics = None
+
+    def __init__(self, source, chunk_size=65536, recover=False):
+        # source is a string or anything with read(), e.g. an open file. With recover, unexpected
+        # symbols are recorded in get_diagnostics() and skipped instead of raising.
+        self.__source = source
+        self.__chunk_size = chunk_size
+        self.__diagnostics = [] if recover else None
+
+    def get_diagnostics(self):
+        return list(self.__diagnostics or ())
+
+    def __iter__(self):
+        return self.tokens()
+
+    def tokens(self):
+        line_number = 0
+        for text in self.__chunks():
+            for token in self.__tokenize(text, line_number):
+                yield token
+            line_number += text.count("\n")
+
+    def __chunks(self):
+        # Chunks are cut after a newline so no token is split between two of them.
+        if isinstance(self.__source, str):
+            yield self.__source
+            return
+
+        pending = ""
+        while True:
+            chunk = self.__source.read(self.__chunk_size)
+            if not chunk:
+                break
+            last_newline = chunk.rfind("\n")
+            if last_newline < 0:
+                pending += chunk
+                continue
+            yield pending + chunk[:last_newline + 1]
+            pending = chunk[last_newline + 1:]
+        if pending:
+            yield pending
+
+    def __tokenize(self, text, line_number):
+        keywords = self.__keywords
+        lexem_classes = self.__lexem_classes
+        line_start = 0
+
+        for match in self.__pattern.finditer(text):
+            index = match.lastindex
+            if index is None or index == self.__comment_index:
+                continue
+            if index == self.__newline_index:
+                line_number += 1
+                line_start = match.end()
+                continue
+
+            lexem = match.group(index)
+            position = match.start(index) - line_start
+            if index == self.__identifier_index:
+                lexem_class = keywords.get(lexem, Lexem.identifier)
+            elif index == self.__error_index:
+                error = DiagnosticError(DiagnosticCode.unexpected_symbol, line_number, position,
+                                        "UNEXPECTED SYMBOL " + lexem + " AT LINE NUMBER: " +
+                                        str(line_number) + " POSITION: " + str(position))
+                if self.__diagnostics is None:
+                    raise error
+                self.__diagnostics.append(error.diagnostic)
+                continue
+            else:
+                lexem_class = lexem_classes[index]
+            yield Token(lexem_class, lexem, line_number, position)
@@ -0,0 +1,23 @@
+class AnalysisResult(object):
+    path = ""
+    tree = None
+    token_count = 0
+    node_count = 0
+    semantic_checked = False
+    elapsed = 0.0
+
+    def __init__(self, path, tree=None, token_count=0, node_count=0, semantic_checked=False, errors=None,
+                 diagnostics=None, elapsed=0.0):
+        # errors holds a line per problem; diagnostics the structured form of those found in the source.
+        # elapsed is the wall time in seconds it took to produce the result, cache lookup included.
+        self.path = path
+        self.tree = tree
+        self.token_count = token_count
+        self.node_count = node_count
+        self.semantic_checked = semantic_checked
+        self.errors = errors if errors is not None else []
+        self.diagnostics = diagnostics if diagnostics is not None else []
+        self.elapsed = elapsed
+
+    def is_ok(self):
+        return not self.errors
@@ -0,0 +1,229 @@
+import gc
+import mmap
+import struct
+import sys
+from array import array
+
+from Model.SyntaxNode import SyntaxNode
+from Model.Token import Token
+
+
+# Little-endian layout, every section starting on a 4 byte boundary. Identifier leaves use the
+# identifier name as their kind, so kinds index the same string table as lexems:
+#   header          magic, format version, node count, token count, string count, string bytes
+#   kinds           I per node, string table index of the node kind
+#   child counts    I per node
+#   subtree sizes   I per node, so a node's next sibling is at index + subtree size
+#   token indices   i per node, -1 for nodes without a token
+#   token classes   I per token, string table index
+#   token lexems    I per token, string table index
+#   token lines     I per token
+#   token positions I per token
+#   string offsets  I per string plus one, into the string bytes
+#   string bytes    UTF-8
+# Nodes are stored in pre-order, so the root is node 0 and a node's children follow it.
+header = struct.Struct("<4sHHIIII")
+magic = b"SATR"
+format_version = 1
+
+
+def encode_tree(tree):
+    strings = {}
+    kinds = array('I')
+    child_counts = array('I')
+    parents = []
+    token_indices = array('i')
+    token_classes = array('I')
+    token_lexems = array('I')
+    token_lines = array('I')
+    token_positions = array('I')
+
+    stack = [(tree, -1)]
+    while stack:
+        node, parent = stack.pop()
+        kinds.append(strings.setdefault(node.kind, len(strings)))
+        child_counts.append(len(node.children))
+        parents.append(parent)
+        token = node.token
+        if token is None:
+            token_indices.append(-1)
+        else:
+            token_indices.append(len(token_classes))
+            token_classes.append(strings.setdefault(token.lexem_class, len(strings)))
+            token_lexems.append(strings.setdefault(token.lexem, len(strings)))
+            token_lines.append(token.line_number)
+            token_positions.append(token.position_number)
+        index = len(parents) - 1
+        for child in reversed(node.children):
+            stack.append((child, index))
+
+    subtree_sizes = array('I', [1]) * len(parents)
+    for index in range(len(parents) - 1, 0, -1):
+        subtree_sizes[parents[index]] += subtree_sizes[index]
+
+    string_table = [None] * len(strings)
+    for string, index in strings.items():
+        string_table[index] = string.encode("utf-8")
+    string_offsets = array('I', [0])
+    for string in string_table:
+        string_offsets.append(string_offsets[-1] + len(string))
+
+    sections = [header.pack(magic, format_version, 0, len(parents), len(token_classes),
+                            len(string_table), string_offsets[-1])]
+    for section in (kinds, child_counts, subtree_sizes, token_indices, token_classes, token_lexems,
+                    token_lines, token_positions, string_offsets):
+        if sys.byteorder != "little":
+            section.byteswap()
+        data = section.tobytes()
+        sections.append(data + b"\0" * (-len(data) % 4))
+    sections.extend(string_table)
+    return b"".join(sections)
+
+
+def open_tree(path):
+    # Maps the file instead of reading it; nothing is copied until a node is asked for.
+    with open(path, "rb") as tree_file:
+        mapping = mmap.mmap(tree_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return BinaryTree(mapping, mapping=mapping)
+
+
+class BinaryTree(object):
+    # A read-only view of an encode_tree buffer. Node accessors read the buffer in place;
+    # only to_syntax_node builds SyntaxNode objects.
+    __mapping = None
+
+    def __init__(self, buffer, offset=0, mapping=None):
+        view = memoryview(buffer)[offset:]
+        if len(view) < header.size:
+            raise ValueError("TRUNCATED TREE BUFFER")
+        buffer_magic, buffer_version, _, node_count, token_count, string_count, string_bytes = \
+            header.unpack_from(view)
+        if buffer_magic != magic or buffer_version != format_version:
+            raise ValueError("UNSUPPORTED TREE FORMAT " + repr(buffer_magic) + " " + str(buffer_version))
+
+        self.__view = view
+        self.__mapping = mapping
+        self.__node_count = node_count
+        self.__strings = {}
+
+        position = header.size
+        self.__kinds, position = self.__section(view, position, 'I', node_count)
+        self.__child_counts, position = self.__section(view, position, 'I', node_count)
+        self.__subtree_sizes, position = self.__section(view, position, 'I', node_count)
+        self.__token_indices, position = self.__section(view, position, 'i', node_count)
+        self.__token_classes, position = self.__section(view, position, 'I', token_count)
+        self.__token_lexems, position = self.__section(view, position, 'I', token_count)
+        self.__token_lines, position = self.__section(view, position, 'I', token_count)
+        self.__token_positions, position = self.__section(view, position, 'I', token_count)
+        self.__string_offsets, position = self.__section(view, position, 'I', string_count + 1)
+        self.__string_bytes = view[position:position + string_bytes]
+        if len(self.__string_bytes) != string_bytes:
+            raise ValueError("TRUNCATED TREE BUFFER")
+
+        self.__sections = [self.__kinds, self.__child_counts, self.__subtree_sizes, self.__token_indices,
+                           self.__token_classes, self.__token_lexems, self.__token_lines,
+                           self.__token_positions, self.__string_offsets, self.__string_bytes, view]
+
+    def __section(self, view, position, typecode, count):
+        size = count * array(typecode).itemsize
+        data = view[position:position + size]
+        if len(data) != size:
+            raise ValueError("TRUNCATED TREE BUFFER")
+        if sys.byteorder == "little":
+            section = data.cast(typecode)
+        else:
+            section = array(typecode, data.tobytes())
+            section.byteswap()
+        return section, position + size + (-size % 4)
+
+    def __string(self, index):
+        string = self.__strings.get(index)
+        if string is None:
+            offsets = self.__string_offsets
+            string = self.__strings[index] = \
+                bytes(self.__string_bytes[offsets[index]:offsets[index + 1]]).decode("utf-8")
+        return string
+
+    def __len__(self):
+        return self.__node_count
+
+    def kind(self, index):
+        return self.__string(self.__kinds[index])
+
+    def child_count(self, index):
+        return self.__child_counts[index]
+
+    def subtree_size(self, index):
+        return self.__subtree_sizes[index]
+
+    def children(self, index):
+        child = index + 1
+        for _ in range(self.__child_counts[index]):
+            yield child
+            child += self.__subtree_sizes[child]
+
+    def has_token(self, index):
+        return self.__token_indices[index] >= 0
+
+    def lexem_class(self, index):
+        return self.__string(self.__token_classes[self.__token_indices[index]])
+
+    def lexem(self, index):
+        return self.__string(self.__token_lexems[self.__token_indices[index]])
+
+    def line_number(self, index):
+        return self.__token_lines[self.__token_indices[index]]
+
+    def position_number(self, index):
+        return self.__token_positions[self.__token_indices[index]]
+
+    def token(self, index):
+        token_index = self.__token_indices[index]
+        if token_index < 0:
+            return None
+        return Token(self.__string(self.__token_classes[token_index]),
+                     self.__string(self.__token_lexems[token_index]),
+                     self.__token_lines[token_index],
+                     self.__token_positions[token_index])
+
+    def to_syntax_node(self):
+        # Every string and token is decoded in one pass, then nodes are linked up in pre-order. Nothing
+        # built here can be garbage, yet collections would keep walking the growing tree, so the
+        # collector is paused for the build.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            strings = [self.__string(index) for index in range(len(self.__string_offsets) - 1)]
+            tokens = [Token(strings[lexem_class], strings[lexem], line_number, position_number)
+                      for lexem_class, lexem, line_number, position_number in
+                      zip(self.__token_classes, self.__token_lexems, self.__token_lines, self.__token_positions)]
+            tokens.append(None)
+            root = None
+            # Each entry is the children list of a node still waiting for children, and how many it has left.
+            pending = []
+            for kind, token_index, child_count in zip(self.__kinds, self.__token_indices, self.__child_counts):
+                node = SyntaxNode(strings[kind], tokens[token_index])
+                if pending:
+                    parent = pending[-1]
+                    parent[0].append(node)
+                    parent[1] -= 1
+                    if parent[1] == 0:
+                        pending.pop()
+                else:
+                    root = node
+                if child_count:
+                    node.children = []
+                    pending.append([node.children, child_count])
+            return root
+        finally:
+            if collecting:
+                gc.enable()
+
+    def close(self):
+        # Views into an mmap have to be released before the mapping can be closed.
+        for section in self.__sections:
+            if isinstance(section, memoryview):
+                section.release()
+        if self.__mapping is not None:
+            self.__mapping.close()
+            self.__mapping = None
@@ -0,0 +1,27 @@
+class Diagnostic(object):
+    code = ""
+    line_number = 0
+    position_number = 0
+    message = ""
+
+    def __init__(self, code="", line_number=0, position_number=0, message=""):
+        self.code = code
+        self.line_number = line_number
+        self.position_number = position_number
+        self.message = message
+
+    def __str__(self):
+        return "%d:%d: %s: %s" % (self.line_number, self.position_number, self.code, self.message)
+
+
+class DiagnosticError(ValueError):
+    # Raised for a problem in the analyzed source. str() is the message alone, as for a plain ValueError;
+    # the recovering analyzers record the diagnostic and carry on instead of raising.
+    def __init__(self, code, line_number, position_number, message):
+        ValueError.__init__(self, message)
+        self.diagnostic = Diagnostic(code, line_number, position_number, message)
+
+    def __reduce__(self):
+        diagnostic = self.diagnostic
+        return DiagnosticError, (diagnostic.code, diagnostic.line_number, diagnostic.position_number,
+                                 diagnostic.message)
@@ -1,9 +1,8 @@
 class Identifier(object):
-    name = ""
-    type = ""
-    scope = 0
+    # Name tables hold millions of these, so no per-instance dict.
+    __slots__ = ("name", "type", "scope")
 
     def __init__(self, name, type, scope):
         self.name = name
         self.type = type
-        self.scope = scope
\ No newline at end of file
+        self.scope = scope
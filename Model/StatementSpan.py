@@ -0,0 +1,23 @@
+class StatementSpan(object):
+    # The source lines of one statement, plus the spans of the statements nested in it.
+    __slots__ = ("node", "block", "parent", "first_line", "last_line", "children", "uses")
+
+    def __init__(self, node, block, parent, first_line, last_line):
+        self.node = node
+        self.block = block
+        self.parent = parent
+        self.first_line = first_line
+        self.last_line = last_line
+        self.children = []
+        self.uses = None
+
+    def contains(self, first_line, last_line):
+        return self.first_line <= first_line and last_line <= self.last_line
+
+    def shift(self, line_delta):
+        stack = [self]
+        while stack:
+            span = stack.pop()
+            span.first_line += line_delta
+            span.last_line += line_delta
+            stack.extend(span.children)
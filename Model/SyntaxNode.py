@@ -0,0 +1,46 @@
+class SyntaxNode(object):
+    __slots__ = ("kind", "children", "token")
+
+    def __init__(self, kind, token=None, children=()):
+        self.kind = kind
+        self.token = token
+        self.children = children
+
+    def add(self, child):
+        # Leaves share the empty tuple default; the list is only created for nodes that get children.
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
+        return child
+
+    def is_leaf(self):
+        return not self.children
+
+    def to_treelib(self):
+        from treelib import Tree
+
+        tree = Tree()
+        stack = [(self, None)]
+        while stack:
+            node, parent = stack.pop()
+            tree_node = tree.create_node(tag=node.kind, parent=parent, data=node.token)
+            for child in reversed(node.children):
+                stack.append((child, tree_node.identifier))
+        return tree
+
+    def to_text(self):
+        # Drawn as treelib's show() draws it, but with children in source order, and without recursing,
+        # so a tree of any depth the parser accepts can be printed.
+        lines = []
+        stack = [(self, "", "")]
+        while stack:
+            node, line_prefix, child_prefix = stack.pop()
+            lines.append(line_prefix + node.kind)
+            last = len(node.children) - 1
+            for index in range(last, -1, -1):
+                if index == last:
+                    stack.append((node.children[index], child_prefix + "└── ", child_prefix + "    "))
+                else:
+                    stack.append((node.children[index], child_prefix + "├── ", child_prefix + "│   "))
+        return "\n".join(lines)
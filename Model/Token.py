@@ -4,7 +4,7 @@ class Token(object):
     line_number = 0
     position_number = 0
 
-    def __init__(self, lexem_class, lexem, line_number, position_number):
+    def __init__(self, lexem_class="", lexem="", line_number=0, position_number=0):
         self.lexem_class = lexem_class
         self.lexem = lexem
         self.line_number = line_number
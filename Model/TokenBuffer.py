@@ -0,0 +1,75 @@
+from array import array
+
+from Model.Token import Token
+
+
+class TokenBuffer(object):
+
+    def __init__(self, tokens=()):
+        self.__lexem_classes = []
+        self.__lexem_class_codes = {}
+        self.__lexem_offsets = {}
+        self.__lexem_pieces = []
+        self.__lexem_pool = ""
+        self.__pool_length = 0
+
+        self.lexem_class_codes = array('H')
+        self.line_numbers = array('I')
+        self.position_numbers = array('I')
+        self.lexem_starts = array('I')
+        self.lexem_ends = array('I')
+
+        for token in tokens:
+            self.append(token.lexem_class, token.lexem, token.line_number, token.position_number)
+
+    def __len__(self):
+        return len(self.line_numbers)
+
+    def __getitem__(self, index):
+        return Token(self.__lexem_classes[self.lexem_class_codes[index]],
+                     self.__get_lexem_pool()[self.lexem_starts[index]:self.lexem_ends[index]],
+                     self.line_numbers[index],
+                     self.position_numbers[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, lexem_class, lexem, line_number, position_number):
+        code = self.__lexem_class_codes.get(lexem_class)
+        if code is None:
+            code = len(self.__lexem_classes)
+            self.__lexem_classes.append(lexem_class)
+            self.__lexem_class_codes[lexem_class] = code
+
+        # Equal lexems share one slice of the pool.
+        start = self.__lexem_offsets.get(lexem)
+        if start is None:
+            start = self.__pool_length
+            self.__lexem_offsets[lexem] = start
+            self.__lexem_pieces.append(lexem)
+            self.__pool_length += len(lexem)
+
+        self.lexem_class_codes.append(code)
+        self.line_numbers.append(line_number)
+        self.position_numbers.append(position_number)
+        self.lexem_starts.append(start)
+        self.lexem_ends.append(start + len(lexem))
+
+    def lexem_class(self, index):
+        return self.__lexem_classes[self.lexem_class_codes[index]]
+
+    def lexem(self, index):
+        return self.__get_lexem_pool()[self.lexem_starts[index]:self.lexem_ends[index]]
+
+    def __get_lexem_pool(self):
+        if len(self.__lexem_pool) != self.__pool_length:
+            self.__lexem_pool = "".join(self.__lexem_pieces)
+            self.__lexem_pieces = [self.__lexem_pool]
+        return self.__lexem_pool
+
+    def line_number(self, index):
+        return self.line_numbers[index]
+
+    def position_number(self, index):
+        return self.position_numbers[index]
@@ -0,0 +1,117 @@
+from array import array
+
+from Model.TokenBuffer import TokenBuffer
+
+
+class TokenStream(object):
+    position = 0
+
+    def __init__(self, tokens):
+        self.position = 0
+        self.__offset = 0
+
+        if isinstance(tokens, (list, tuple, TokenBuffer)):
+            self.__source = None
+            self.__lazy = False
+            self.__tokens = tokens
+            self.__line_ends = self.__build_line_ends(tokens)
+            self.__loaded = len(tokens)
+        else:
+            # Tokens are pulled from the iterator at most one line ahead of the parser.
+            self.__source = iter(tokens)
+            self.__lazy = True
+            self.__tokens = []
+            self.__line_ends = array('I')
+            self.__loaded = 0
+            self.__line_start = 0
+            self.__line_number = None
+
+    def __build_line_ends(self, tokens):
+        if isinstance(tokens, TokenBuffer):
+            line_numbers = tokens.line_numbers
+        else:
+            line_numbers = [token.line_number for token in tokens]
+
+        line_ends = array('I', [0]) * len(line_numbers)
+
+        line_start = 0
+        for position in range(1, len(line_numbers) + 1):
+            if position == len(line_numbers) or \
+                    line_numbers[position] != line_numbers[line_start]:
+                for index in range(line_start, position):
+                    line_ends[index] = position
+                line_start = position
+
+        return line_ends
+
+    def __load(self):
+        token = next(self.__source, None)
+        if token is None:
+            self.__close_line()
+            self.__source = None
+            return
+
+        if token.line_number != self.__line_number:
+            self.__close_line()
+            self.__line_number = token.line_number
+
+        self.__tokens.append(token)
+        self.__loaded += 1
+
+    def __close_line(self):
+        for _ in range(self.__line_start, self.__loaded):
+            self.__line_ends.append(self.__loaded)
+        self.__line_start = self.__loaded
+
+    def __ensure(self, index):
+        while index >= self.__loaded and self.__source is not None:
+            self.__load()
+        return index < self.__loaded
+
+    def token(self, index):
+        if index >= self.__loaded:
+            self.__ensure(index)
+        return self.__tokens[index - self.__offset]
+
+    def lexem_class(self, index):
+        if index >= self.__loaded:
+            self.__ensure(index)
+        if isinstance(self.__tokens, TokenBuffer):
+            return self.__tokens.lexem_class(index)
+        return self.__tokens[index - self.__offset].lexem_class
+
+    def peek(self):
+        if self.__ensure(self.position):
+            return self.__tokens[self.position - self.__offset]
+        return None
+
+    def at_end(self):
+        return not self.__ensure(self.position)
+
+    def advance(self, count=1):
+        self.position += count
+
+    def seek(self, position):
+        self.position = position
+
+    def mark(self):
+        return self.position
+
+    def reset(self, mark):
+        self.position = mark
+
+    def line_end(self, index):
+        # A line is complete once the first token of the next line, or the end of input, has been read.
+        while index - self.__offset >= len(self.__line_ends) and self.__source is not None:
+            self.__load()
+        return self.__line_ends[index - self.__offset]
+
+    def release(self):
+        # Drops the tokens the parser has moved past. Sequences passed in by the caller are never touched.
+        if not self.__lazy:
+            return
+        count = min(self.position - self.__offset, len(self.__line_ends))
+        if count > 0:
+            del self.__tokens[:count]
+            del self.__line_ends[:count]
+            self.__offset += count
@@ -1,11 +1,20 @@
+from SymbolTable import SymbolTable
+
+
 class NameTable(object):
-    __identifiers = []
+    __symbol_table = None
 
     def __init__(self, identifiers):
-        self.__identifiers = identifiers
+        self.__symbol_table = SymbolTable(identifiers)
 
     def add_token(self, identifier):
-        self.__identifiers.append(identifier)
+        self.__symbol_table.add(identifier)
 
     def get_identfier_by_name(self, name):
-        return list(filter(lambda x: x.name == name, self.__identifiers))[0]
+        identifier = self.__symbol_table.find(name)
+        if identifier is None:
+            raise IndexError("UNDEFINED IDENTIFIER " + name)
+        return identifier
+
+    def get_symbol_table(self):
+        return self.__symbol_table
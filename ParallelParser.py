@@ -0,0 +1,130 @@
+import os
+
+from Model.BinaryTree import BinaryTree, encode_tree
+from Model.Diagnostic import DiagnosticError
+from Model.SyntaxNode import SyntaxNode
+from Model.Token import Token
+from SyntaxAnalyzer import SyntaxAnalyzer
+from Utils import Constants, Lexem
+
+# Keywords that open a block closed by END.
+block_keywords = (Lexem.while_keyword, Lexem.for_keyword, Lexem.if_keyword)
+
+
+def find_statement_starts(tokens):
+    # Indexes of the tokens that start a top-level statement: the first token of a line when every block
+    # opened before it is closed. Returns None when the blocks don't balance, e.g. an END too many.
+    starts = []
+    depth = 0
+    line_number = None
+    for index, token in enumerate(tokens):
+        if token.line_number != line_number:
+            line_number = token.line_number
+            if depth == 0:
+                starts.append(index)
+        lexem_class = token.lexem_class
+        if lexem_class in block_keywords:
+            depth += 1
+        elif lexem_class == Lexem.end_keyword:
+            depth -= 1
+            if depth < 0:
+                return None
+    return starts if depth == 0 else None
+
+
+def split_tokens(tokens, chunk_count, min_chunk_tokens=0):
+    # (start, end) token ranges of at most chunk_count chunks of about equal size, each cut where a
+    # top-level statement starts, or None if the blocks don't balance.
+    starts = find_statement_starts(tokens)
+    if starts is None:
+        return None
+    chunk_tokens = max(min_chunk_tokens, -(-len(tokens) // max(1, chunk_count)), 1)
+    chunks = []
+    chunk_start = 0
+    for start in starts:
+        if start - chunk_start >= chunk_tokens:
+            chunks.append((chunk_start, start))
+            chunk_start = start
+    if chunk_start < len(tokens):
+        chunks.append((chunk_start, len(tokens)))
+    return chunks
+
+
+def parse_chunk(lexem_classes, lexems, line_numbers, position_numbers):
+    # Runs in a worker. Tokens come as columns, which pickle faster than Token objects, and the tree goes
+    # back in BinaryTree format. None means the chunk didn't parse cleanly.
+    tokens = list(map(Token, lexem_classes, lexems, line_numbers, position_numbers))
+    try:
+        tree = SyntaxAnalyzer().parse_tokens(tokens)
+    except DiagnosticError:
+        return None
+    return encode_tree(tree) if tree is not None else None
+
+
+class ParallelParser(object):
+    # Parses one large token list on a process pool. The tokens are cut into chunks of whole top-level
+    # statements, found by counting WHILE, FOR and IF against END, each chunk is parsed by a worker, and
+    # the statements of the chunk trees are joined in order under one COMMON_BLOCK.
+    # A top-level statement parses the same whatever comes before or after it, so the tree is the one
+    # SyntaxAnalyzer.parse_tokens returns. Input with any problem in it is parsed again in this process,
+    # so errors and diagnostics are exactly the serial ones too.
+    __workers = None
+    __recover = False
+    __min_chunk_tokens = 0
+    __diagnostics = None
+
+    def __init__(self, workers=None, recover=False, min_chunk_tokens=50000):
+        # Inputs too short for two chunks of min_chunk_tokens are parsed in this process, as are all with
+        # one worker: starting the pool would cost more than it saves.
+        self.__workers = workers or os.cpu_count() or 1
+        self.__recover = recover
+        self.__min_chunk_tokens = min_chunk_tokens
+
+    def get_diagnostics(self):
+        return list(self.__diagnostics or ())
+
+    def parse_tokens(self, tokens):
+        if not isinstance(tokens, (list, tuple)):
+            tokens = list(tokens)
+        self.__diagnostics = None
+        chunks = None
+        if self.__workers > 1 and len(tokens) >= 2 * self.__min_chunk_tokens:
+            # A few chunks per worker keep them all busy when chunks parse at different speeds, and let
+            # the first trees be joined while the rest are still being parsed.
+            chunks = split_tokens(tokens, self.__workers * 4, self.__min_chunk_tokens)
+        if chunks is not None and len(chunks) > 1:
+            tree = self.__parse_chunks(tokens, chunks)
+            if tree is not None:
+                return tree
+        syntax_analyzer = SyntaxAnalyzer(recover=self.__recover)
+        try:
+            return syntax_analyzer.parse_tokens(tokens)
+        finally:
+            self.__diagnostics = syntax_analyzer.get_diagnostics()
+
+    def __parse_chunks(self, tokens, chunks):
+        # The joined tree, or None as soon as a chunk fails.
+        # Imported here: concurrent.futures pulls in multiprocessing, which costs more than the rest of startup.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(self.__workers, len(chunks))) as executor:
+            futures = []
+            for start, end in chunks:
+                chunk = tokens[start:end]
+                futures.append(executor.submit(parse_chunk, [token.lexem_class for token in chunk],
+                                               [token.lexem for token in chunk],
+                                               [token.line_number for token in chunk],
+                                               [token.position_number for token in chunk]))
+            statements = []
+            for future in futures:
+                buffer = future.result()
+                if buffer is None:
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+                statements.extend(BinaryTree(buffer).to_syntax_node().children)
+
+        tree = SyntaxNode(Constants.common_block)
+        if statements:
+            tree.children = statements
+        return tree
@@ -0,0 +1,208 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from Model.AnalysisResult import AnalysisResult
+from Model.BinaryTree import BinaryTree, encode_tree
+from Model.Diagnostic import Diagnostic
+from Utils import Constants
+
+
+class ParseCache(object):
+    # Analysis results on disk, one file per key. Files are written to a temporary name and moved into
+    # place with os.replace, so processes sharing the directory only ever see complete entries.
+    # A hit touches the file's modification time, which is what eviction orders by. The cache's size is
+    # kept in a record file that every process sharing the directory updates under a lock, so max_bytes
+    # caps them all together.
+    __directory = ""
+    __max_bytes = 0
+    __size = None
+
+    __suffix = ".entry"
+    __size_name = "size"
+    __temporary_prefix = ".tmp"
+    __stale_temporary_age = 3600
+    __length = struct.Struct("<I")
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, source, name_table=None, recover=False):
+        # source and name_table are the raw bytes the result was computed from; name_table is None without one.
+        digest = hashlib.sha256()
+        name_table = b"-" if name_table is None else b"+" + name_table
+        mode = b"recover" if recover else b"strict"
+        for part in (Constants.analyzer_version.encode("utf-8"), mode, name_table, source):
+            digest.update(str(len(part)).encode("ascii") + b":")
+            digest.update(part)
+        return digest.hexdigest()
+
+    def load(self, key, keep_tree=True):
+        path = self.__get_path(key)
+        try:
+            with open(path, "rb") as entry_file:
+                data = entry_file.read()
+            os.utime(path)
+        except OSError:
+            return None
+
+        try:
+            header, tree_offset = self.__read_header(data)
+            if header is None:
+                return None
+            token_count, node_count, semantic_checked, errors, diagnostics, has_tree = header
+            tree = None
+            if keep_tree and has_tree:
+                tree = BinaryTree(data, tree_offset).to_syntax_node()
+        except (EOFError, ValueError, TypeError, IndexError, struct.error):
+            if self.__remove(path):
+                self.__update_size(-len(data))
+            return None
+
+        return AnalysisResult(None, tree=tree, token_count=token_count, node_count=node_count,
+                              semantic_checked=semantic_checked, errors=list(errors),
+                              diagnostics=[Diagnostic(*diagnostic) for diagnostic in diagnostics])
+
+    def load_tree_view(self, key):
+        # The cached tree as a BinaryTree over a memory map of the entry, or None. Close it when done.
+        path = self.__get_path(key)
+        try:
+            with open(path, "rb") as entry_file:
+                mapping = mmap.mmap(entry_file.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            header, tree_offset = self.__read_header(mapping)
+            if header is not None and header[-1]:
+                return BinaryTree(mapping, tree_offset, mapping=mapping)
+        except (EOFError, ValueError, TypeError, IndexError, struct.error):
+            pass
+        mapping.close()
+        return None
+
+    def store(self, key, result):
+        # An entry is the length of a marshalled header, the header, then the tree in BinaryTree
+        # format on a 4 byte boundary so it can be viewed in place.
+        # tempfile is imported here since it costs more to import than everything a cache hit needs.
+        import tempfile
+
+        diagnostics = [(diagnostic.code, diagnostic.line_number, diagnostic.position_number, diagnostic.message)
+                       for diagnostic in result.diagnostics]
+        header = marshal.dumps((Constants.analyzer_version, result.token_count, result.node_count,
+                                result.semantic_checked, list(result.errors), diagnostics,
+                                result.tree is not None))
+        padding = b"\0" * (-(self.__length.size + len(header)) % 4)
+        data = self.__length.pack(len(header)) + header + padding
+        if result.tree is not None:
+            data += encode_tree(result.tree)
+
+        path = self.__get_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            replaced_size = os.stat(path).st_size
+        except OSError:
+            replaced_size = 0
+        descriptor, temporary_path = tempfile.mkstemp(prefix=self.__temporary_prefix, dir=directory)
+        try:
+            with os.fdopen(descriptor, "wb") as entry_file:
+                entry_file.write(data)
+            os.replace(temporary_path, path)
+        except OSError:
+            self.__remove(temporary_path)
+            raise
+
+        self.__update_size(len(data) - replaced_size)
+
+    def __read_header(self, data):
+        header_length, = self.__length.unpack_from(data)
+        header_end = self.__length.size + header_length
+        header = marshal.loads(bytes(data[self.__length.size:header_end]))
+        if header[0] != Constants.analyzer_version:
+            return None, 0
+        return header[1:], header_end + (-header_end % 4)
+
+    def evict(self):
+        # Drops the least recently used entries until the cache is back under 90% of its cap.
+        self.__update_size(0, True)
+
+    def __update_size(self, delta, evict=False):
+        # Adds delta to the recorded size and evicts once it passes the cap. The record is read and
+        # rewritten under an exclusive lock; a missing or unreadable one is rebuilt by scanning, which
+        # already counts the write being recorded. Without fcntl, e.g. on Windows, there is no shared
+        # record and each process only counts its own writes.
+        if fcntl is None:
+            size = self.__scan()[0] if self.__size is None else self.__size + delta
+            if evict or size > self.__max_bytes:
+                size = self.__remove_oldest()
+            self.__size = size
+            return
+
+        descriptor = os.open(os.path.join(self.__directory, self.__size_name), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            try:
+                size = int(os.read(descriptor, 32)) + delta
+            except ValueError:
+                size = self.__scan()[0]
+            if evict or size > self.__max_bytes:
+                size = self.__remove_oldest()
+            os.ftruncate(descriptor, 0)
+            os.pwrite(descriptor, str(size).encode("ascii"), 0)
+        finally:
+            # Closing the descriptor releases the lock.
+            os.close(descriptor)
+
+    def __remove_oldest(self):
+        size, entries = self.__scan()
+        entries.sort()
+        limit = self.__max_bytes * 9 // 10
+        for _, entry_size, path in entries:
+            if size <= limit:
+                break
+            if self.__remove(path):
+                size -= entry_size
+        return size
+
+    def __scan(self):
+        size = 0
+        entries = []
+        now = time.time()
+        for directory, _, files in os.walk(self.__directory):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                if file_name.endswith(self.__suffix):
+                    size += status.st_size
+                    entries.append((status.st_mtime, status.st_size, path))
+                elif file_name.startswith(self.__temporary_prefix) and \
+                        now - status.st_mtime > self.__stale_temporary_age:
+                    # Left behind by a process that died between writing and renaming.
+                    self.__remove(path)
+        return size, entries
+
+    def __get_path(self, key):
+        return os.path.join(self.__directory, key[:2], key[2:] + self.__suffix)
+
+    def __remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,160 @@
+import functools
+import json
+import time
+
+# Flag set on the code of generator functions, as inspect.CO_GENERATOR.
+generator_flag = 0x20
+
+
+class ProductionStats(object):
+    # Counts for one production. A call either succeeds, fails so its caller backtracks, or raises.
+    # total_time includes the productions it called, self_time doesn't; both are wall time in seconds.
+    # A call nested in another call of the same production only adds to self_time, so a recursive
+    # production's total_time is still the time spent inside it.
+    name = ""
+    calls = 0
+    memo_hits = 0
+    successes = 0
+    failures = 0
+    errors = 0
+    tokens = 0
+    total_time = 0.0
+    self_time = 0.0
+    active = 0
+
+    def __init__(self, name):
+        self.name = name
+
+    def to_dict(self):
+        return {"name": self.name,
+                "calls": self.calls,
+                "memo_hits": self.memo_hits,
+                "successes": self.successes,
+                "failures": self.failures,
+                "errors": self.errors,
+                "tokens": self.tokens,
+                "total_time": self.total_time,
+                "self_time": self.self_time}
+
+
+class Profiler(object):
+    # Collects statistics from the analyzers it is passed to, e.g. SyntaxAnalyzer(profiler=profiler).
+    # Counts add up over every analyzer and run that share a profiler. Each call also charges its self
+    # time to the stack of productions that led to it, which dump_collapsed writes out for flame graphs.
+    def __init__(self):
+        self.__stats = {}
+        self.__frames = []
+        self.__paths = {}
+        self.__path_names = []
+        self.__path_parents = []
+        self.__path_times = []
+
+    def wrap(self, function, name, position=None):
+        # A wrapper that reports each call of function under name. position, when given, returns the
+        # current token index: a call then succeeds if it returns anything but None and is credited with
+        # the tokens it consumed. Without it, a call succeeds unless it raises.
+        if function.__code__.co_flags & generator_flag:
+            @functools.wraps(function)
+            def call(*arguments):
+                # Runs from the generator's first resumption to its last, so the productions it asks
+                # for in between are nested in it.
+                frame = self.enter(name, position() if position is not None else 0)
+                try:
+                    result = yield from function(*arguments)
+                except BaseException:
+                    self.leave(frame, None)
+                    raise
+                self.leave(frame, result is not None or position is None, position() if position is not None else 0)
+                return result
+        else:
+            @functools.wraps(function)
+            def call(*arguments):
+                frame = self.enter(name, position() if position is not None else 0)
+                try:
+                    result = function(*arguments)
+                except BaseException:
+                    self.leave(frame, None)
+                    raise
+                self.leave(frame, result is not None or position is None, position() if position is not None else 0)
+                return result
+        return call
+
+    def enter(self, name, position=0):
+        stats = self.__stats.get(name)
+        if stats is None:
+            stats = self.__stats[name] = ProductionStats(name)
+        parent = self.__frames[-1][1] if self.__frames else -1
+        path = self.__paths.get((parent, name))
+        if path is None:
+            path = self.__paths[(parent, name)] = len(self.__path_names)
+            self.__path_names.append(name)
+            self.__path_parents.append(parent)
+            self.__path_times.append(0.0)
+        stats.active += 1
+        frame = [stats, path, position, 0.0, time.perf_counter()]
+        self.__frames.append(frame)
+        return frame
+
+    def leave(self, frame, outcome, position=0):
+        # outcome is True for a success, False for a failure and None for a call that raised.
+        elapsed = time.perf_counter() - frame[4]
+        frames = self.__frames
+        if not frames or frames[-1] is not frame:
+            # Already unwound: a generator abandoned by an error is only closed when it is collected.
+            return
+        frames.pop()
+        stats, path, start_position, child_time, _ = frame
+        stats.calls += 1
+        stats.active -= 1
+        if not stats.active:
+            stats.total_time += elapsed
+        stats.self_time += elapsed - child_time
+        self.__path_times[path] += elapsed - child_time
+        if frames:
+            frames[-1][3] += elapsed
+        if outcome is None:
+            stats.errors += 1
+        elif outcome:
+            stats.successes += 1
+            stats.tokens += position - start_position
+        else:
+            stats.failures += 1
+
+    def count_memo_hit(self, name):
+        stats = self.__stats.get(name)
+        if stats is None:
+            stats = self.__stats[name] = ProductionStats(name)
+        stats.memo_hits += 1
+
+    def get_depth(self):
+        return len(self.__frames)
+
+    def unwind(self, depth):
+        # Closes the calls above depth that an error left open, as if each had raised.
+        while len(self.__frames) > depth:
+            self.leave(self.__frames[-1], None)
+
+    def get_stats(self):
+        # The ProductionStats of every production seen, most self time first.
+        return sorted(self.__stats.values(), key=lambda stats: (-stats.self_time, stats.name))
+
+    def to_dict(self):
+        return {"productions": [stats.to_dict() for stats in self.get_stats()]}
+
+    def dump_json(self, output):
+        json.dump(self.to_dict(), output, indent=2)
+        output.write("\n")
+
+    def dump_collapsed(self, output):
+        # One line per call stack: production names from the outermost, separated by ;, then the stack's
+        # self time in whole microseconds. flamegraph.pl and speedscope read this format.
+        names = []
+        for path, self_time in enumerate(self.__path_times):
+            microseconds = int(round(self_time * 1e6))
+            if microseconds <= 0:
+                continue
+            del names[:]
+            while path >= 0:
+                names.append(self.__path_names[path])
+                path = self.__path_parents[path]
+            output.write(";".join(reversed(names)) + " " + str(microseconds) + "\n")
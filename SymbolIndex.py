@@ -0,0 +1,261 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from Model.Identifier import Identifier
+
+
+# Little-endian layout, every section starting on a 4 byte boundary. Strings hold every name and
+# type once, sorted by their UTF-8 bytes, so comparing string indices orders them as strings:
+#   header              magic, format version, string count, string bytes, key count, record count
+#   string offsets      I per string plus one, into the string bytes
+#   string first keys   I per string, the key holding the first record named by it, or no_key
+#   key scopes          i per key
+#   key names           I per key, string index
+#   key record starts   I per key plus one, so a key's records are start to the next key's start
+#   record types        I per record, string index
+#   string bytes        UTF-8
+# Keys are sorted by (scope, name) and each key's records keep the order of the name table.
+header = struct.Struct("<4sHHIIII")
+magic = b"SAIX"
+format_version = 1
+no_key = 0xFFFFFFFF
+
+
+def write_symbol_index(identifiers, path):
+    # identifiers in name table order. The file is written under another name and moved into place,
+    # since rewriting a file that another process has mapped would change it under that process.
+    records = {}
+    first_keys = {}
+    for identifier in identifiers:
+        key = (identifier.scope, identifier.name)
+        types = records.get(key)
+        if types is None:
+            records[key] = [identifier.type]
+        else:
+            types.append(identifier.type)
+        first_keys.setdefault(identifier.name, key)
+
+    strings = set(first_keys)
+    for types in records.values():
+        strings.update(types)
+    string_table = sorted(string.encode("utf-8") for string in strings)
+    string_indices = dict((string.decode("utf-8"), index) for index, string in enumerate(string_table))
+    string_offsets = array('I', [0])
+    for string in string_table:
+        string_offsets.append(string_offsets[-1] + len(string))
+
+    keys = sorted(records, key=lambda key: (key[0], string_indices[key[1]]))
+    key_indices = dict((key, index) for index, key in enumerate(keys))
+    string_first_keys = array('I', [no_key]) * len(string_table)
+    for name, key in first_keys.items():
+        string_first_keys[string_indices[name]] = key_indices[key]
+    key_scopes = array('i', [key[0] for key in keys])
+    key_names = array('I', [string_indices[key[1]] for key in keys])
+    key_record_starts = array('I', [0])
+    record_types = array('I')
+    for key in keys:
+        record_types.extend(string_indices[record_type] for record_type in records[key])
+        key_record_starts.append(len(record_types))
+
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as index_file:
+        index_file.write(header.pack(magic, format_version, 0, len(string_table), string_offsets[-1],
+                                     len(keys), len(record_types)))
+        for section in (string_offsets, string_first_keys, key_scopes, key_names, key_record_starts,
+                        record_types):
+            if sys.byteorder != "little":
+                section.byteswap()
+            data = section.tobytes()
+            index_file.write(data + b"\0" * (-len(data) % 4))
+        for string in string_table:
+            index_file.write(string)
+    os.replace(temporary_path, path)
+
+
+def open_symbol_index(path):
+    # Maps the file instead of reading it, so opening takes the same time whatever the table's size.
+    with open(path, "rb") as index_file:
+        mapping = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return SymbolIndex(mapping, mapping=mapping)
+
+
+def open_name_table(path):
+    # A file written by write_symbol_index is mapped; anything else is loaded as a JSON name table.
+    with open(path, "rb") as table_file:
+        is_index = table_file.read(len(magic)) == magic
+    if is_index:
+        return open_symbol_index(path)
+
+    from TreeBuilder import TreeBuilder
+
+    return TreeBuilder(path).build_name_table()
+
+
+class SymbolIndex(object):
+    # A read-only SymbolTable over a write_symbol_index buffer. Lookups binary-search the buffer in
+    # place; only the records asked for become Identifier objects, and each only once, so a record
+    # is the same object every time, as in SymbolTable.
+    __mapping = None
+
+    def __init__(self, buffer, offset=0, mapping=None):
+        view = memoryview(buffer)[offset:]
+        if len(view) < header.size:
+            raise ValueError("TRUNCATED SYMBOL INDEX")
+        buffer_magic, buffer_version, _, string_count, string_bytes, key_count, record_count = \
+            header.unpack_from(view)
+        if buffer_magic != magic or buffer_version != format_version:
+            raise ValueError("UNSUPPORTED SYMBOL INDEX FORMAT " + repr(buffer_magic) + " " + str(buffer_version))
+
+        self.__view = view
+        self.__mapping = mapping
+        self.__string_count = string_count
+        self.__key_count = key_count
+        self.__record_count = record_count
+        self.__consumed = {}
+        self.__keys = {}
+        self.__records = {}
+
+        position = header.size
+        self.__string_offsets, position = self.__section(view, position, 'I', string_count + 1)
+        self.__string_first_keys, position = self.__section(view, position, 'I', string_count)
+        self.__key_scopes, position = self.__section(view, position, 'i', key_count)
+        self.__key_names, position = self.__section(view, position, 'I', key_count)
+        self.__key_record_starts, position = self.__section(view, position, 'I', key_count + 1)
+        self.__record_types, position = self.__section(view, position, 'I', record_count)
+        self.__string_bytes = view[position:position + string_bytes]
+        if len(self.__string_bytes) != string_bytes:
+            raise ValueError("TRUNCATED SYMBOL INDEX")
+
+        self.__sections = [self.__string_offsets, self.__string_first_keys, self.__key_scopes, self.__key_names,
+                           self.__key_record_starts, self.__record_types, self.__string_bytes, view]
+
+    def __section(self, view, position, typecode, count):
+        size = count * array(typecode).itemsize
+        data = view[position:position + size]
+        if len(data) != size:
+            raise ValueError("TRUNCATED SYMBOL INDEX")
+        if sys.byteorder == "little":
+            section = data.cast(typecode)
+        else:
+            section = array(typecode, data.tobytes())
+            section.byteswap()
+        return section, position + size + (-size % 4)
+
+    def __string(self, index):
+        offsets = self.__string_offsets
+        return bytes(self.__string_bytes[offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def __find_string(self, string):
+        encoded = string.encode("utf-8")
+        offsets = self.__string_offsets
+        low = 0
+        high = self.__string_count
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self.__string_bytes[offsets[middle]:offsets[middle + 1]]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.__string_count and \
+                bytes(self.__string_bytes[offsets[low]:offsets[low + 1]]) == encoded:
+            return low
+        return -1
+
+    def __find_key(self, name, scope):
+        key = self.__keys.get((name, scope))
+        if key is None:
+            key = -1
+            name_index = self.__find_string(name)
+            if name_index >= 0:
+                scopes = self.__key_scopes
+                names = self.__key_names
+                low = 0
+                high = self.__key_count
+                while low < high:
+                    middle = (low + high) // 2
+                    if (scopes[middle], names[middle]) < (scope, name_index):
+                        low = middle + 1
+                    else:
+                        high = middle
+                if low < self.__key_count and scopes[low] == scope and names[low] == name_index:
+                    key = low
+            self.__keys[(name, scope)] = key
+        return key
+
+    def __record(self, key, record_index):
+        record = self.__records.get(record_index)
+        if record is None:
+            record = self.__records[record_index] = \
+                Identifier(name=self.__string(self.__key_names[key]),
+                           type=self.__string(self.__record_types[record_index]),
+                           scope=self.__key_scopes[key])
+        return record
+
+    def find(self, name, scope=None):
+        if scope is None:
+            name_index = self.__find_string(name)
+            if name_index < 0 or self.__string_first_keys[name_index] == no_key:
+                return None
+            key = self.__string_first_keys[name_index]
+        else:
+            key = self.__find_key(name, scope)
+            if key < 0:
+                return None
+        return self.__record(key, self.__key_record_starts[key])
+
+    def lookup(self, name, scope):
+        # The first record for (name, scope) that has not been consumed yet.
+        key = self.__find_key(name, scope)
+        if key < 0:
+            return None
+        record_index = self.__key_record_starts[key] + self.__consumed.get((name, scope), 0)
+        if record_index >= self.__key_record_starts[key + 1]:
+            return None
+        return self.__record(key, record_index)
+
+    def consume(self, name, scope):
+        record = self.lookup(name, scope)
+        if record is not None:
+            key = (name, scope)
+            self.__consumed[key] = self.__consumed.get(key, 0) + 1
+        return record
+
+    def get_consumed(self):
+        return dict(self.__consumed)
+
+    def set_consumed(self, consumed):
+        # Rewinds consumption to a count taken earlier, e.g. to re-check part of a tree.
+        self.__consumed = dict(consumed)
+
+    def __len__(self):
+        return self.__record_count
+
+    def close(self):
+        # Views into an mmap have to be released before the mapping can be closed.
+        for section in self.__sections:
+            if isinstance(section, memoryview):
+                section.release()
+        if self.__mapping is not None:
+            self.__mapping.close()
+            self.__mapping = None
+
+
+def main(argv=None):
+    # The build step: compiles a JSON name table into an index file.
+    import argparse
+
+    from TreeBuilder import TreeBuilder
+
+    parser = argparse.ArgumentParser(description="Compile a JSON name table into a memory-mapped symbol index.")
+    parser.add_argument("name_table", help="JSON array or JSON lines name table")
+    parser.add_argument("index", help="index file to write")
+    arguments = parser.parse_args(argv)
+    TreeBuilder(arguments.name_table).build_symbol_index(arguments.index)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+class SymbolTable(object):
+    def __init__(self, identifiers=()):
+        self.__symbols = {}
+        self.__consumed = {}
+        self.__first_by_name = {}
+        for identifier in identifiers:
+            self.add(identifier)
+
+    def add(self, identifier):
+        key = (identifier.name, identifier.scope)
+        records = self.__symbols.get(key)
+        if records is None:
+            self.__symbols[key] = [identifier]
+        else:
+            records.append(identifier)
+        self.__first_by_name.setdefault(identifier.name, identifier)
+
+    def find(self, name, scope=None):
+        if scope is None:
+            return self.__first_by_name.get(name)
+        records = self.__symbols.get((name, scope))
+        if records is None:
+            return None
+        return records[0]
+
+    def lookup(self, name, scope):
+        # The first record for (name, scope) that has not been consumed yet.
+        key = (name, scope)
+        records = self.__symbols.get(key)
+        consumed = self.__consumed.get(key, 0)
+        if records is None or consumed >= len(records):
+            return None
+        return records[consumed]
+
+    def consume(self, name, scope):
+        record = self.lookup(name, scope)
+        if record is not None:
+            key = (name, scope)
+            self.__consumed[key] = self.__consumed.get(key, 0) + 1
+        return record
+
+    def get_consumed(self):
+        return dict(self.__consumed)
+
+    def set_consumed(self, consumed):
+        # Rewinds consumption to a count taken earlier, e.g. to re-check part of a tree.
+        self.__consumed = dict(consumed)
+
+    def __len__(self):
+        return sum(len(records) for records in self.__symbols.values())
@@ -1,897 +1,1086 @@
-from treelib import Node, Tree
-from Utils import Lexem, Constants
-
-class NameTableRecord(object):
-    name = ""
-    type = ""
-    scope = 0
-
-    def __init__(self, name="", type="", scope=0):
-        self.name = name
-        self.type = type
-        self.scope = scope
-
-class Token(object):
-    def __init__(self, lexem_class="", lexem="", line_number=0, position_number=0):
-        self.lexem_class = lexem_class
-        self.lexem = lexem
-        self.line_number = line_number
-        self.position_number = position_number
-
+import sys
+from types import GeneratorType, MethodType
+
+from Utils import Lexem, Constants, DiagnosticCode
+from Model.Diagnostic import Diagnostic, DiagnosticError
+from Model.SyntaxNode import SyntaxNode
+from Model.Token import Token
+from Model.TokenStream import TokenStream
+from NameTable import NameTable
+from SymbolIndex import SymbolIndex
+from SymbolTable import SymbolTable
 
 class SemanticAnalyzer(object):
-    __name_table = []
-
-    def __init__(self, name_table):
-        self.__name_table = name_table
-
-    def __get_type(self, name, scope):
-        record = next((x for x in self.__name_table if x.name == name and x.scope == scope), None)
-        if record is not None:
-            self.__name_table.remove(record)
-        else:
-            raise ValueError("UNDEFINED IDENTIFIER " + name)
-        return record
-
-    def __get_tree_paths(self, tree):
-        paths = tree.paths_to_leaves()
-        tokens_path = []
-        for outer in paths:
-            token_path = []
-            for path in outer:
-                token = tree.get_node(path)
-                token_path.append(token)
-            tokens_path.append(token_path)
-
-        return tokens_path
-
-    def check_tree(self, tree):
+    __symbol_table = None
+    __diagnostics = None
+
+    def __init__(self, name_table, recover=False, profiler=None):
+        # With recover, check_tree records every problem in get_diagnostics() instead of raising at the first.
+        # With a Profiler, its phases are timed: check_tree's own time is the tree walk, lookup is the name
+        # table and type_check is comparing types.
+        if isinstance(name_table, NameTable):
+            name_table = name_table.get_symbol_table()
+        if not isinstance(name_table, (SymbolTable, SymbolIndex)):
+            name_table = SymbolTable(name_table)
+        self.__symbol_table = name_table
+        self.__diagnostics = [] if recover else None
+        if profiler is not None:
+            self.check_tree = MethodType(profiler.wrap(SemanticAnalyzer.check_tree, "SemanticAnalyzer.check_tree"),
+                                         self)
+            self.__get_type = MethodType(profiler.wrap(SemanticAnalyzer.__get_type, "SemanticAnalyzer.lookup"), self)
+            self.__check_identifier = MethodType(profiler.wrap(SemanticAnalyzer.__check_identifier,
+                                                               "SemanticAnalyzer.type_check"), self)
+
+    def get_symbol_table(self):
+        return self.__symbol_table
+
+    def get_diagnostics(self):
+        return list(self.__diagnostics or ())
+
+    def __get_type(self, leaf, scope):
+        record = self.__symbol_table.consume(leaf.kind, scope)
+        if record is None:
+            raise DiagnosticError(DiagnosticCode.undefined_identifier,
+                                  leaf.token.line_number, leaf.token.position_number,
+                                  "UNDEFINED IDENTIFIER " + leaf.kind)
+        return record.type
+
+    def check_tree(self, tree, depth_level=-1):
+        # depth_level is the COMMON_BLOCK depth tree sits at; the default checks a whole program.
+        for leaf, expected_type, leaf_depth_level in self.__iterate_identifiers(tree, depth_level):
+            try:
+                self.__check_identifier(leaf, expected_type, leaf_depth_level)
+            except DiagnosticError as error:
+                if self.__diagnostics is None:
+                    raise
+                self.__diagnostics.append(error.diagnostic)
+
+    def count_identifiers(self, tree, depth_level=-1):
+        # How many records check_tree would consume from each (name, scope).
+        counts = {}
+        for leaf, _, leaf_depth_level in self.__iterate_identifiers(tree, depth_level):
+            key = (leaf.kind, leaf_depth_level)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def __iterate_identifiers(self, tree, depth_level):
         if tree is not None:
-            token_paths = self.__get_tree_paths(tree)
-
-            for token_path in token_paths:
-                identifier_token = token_path[-2]
-                if identifier_token.tag == Lexem.identifier:
-                    expr_node = token_path[-3]
-
-                    if expr_node.tag == Constants.arithmetic_expression or \
-                                    expr_node.tag == Constants.iterator_start or \
-                                    expr_node.tag == Constants.iterator_end:
-                        common_tokens = list(filter(lambda token: token.tag == Constants.common_block, token_path))
-                        depth_level = len(common_tokens) - 1
-                        name = token_path[-1].tag
-                        type = self.__get_type(name, depth_level)
-
-                        if type != Lexem.number:
-                            token = token_path[-1].data
-                            raise ValueError("SEMANTIC ERROR: EXPECTED TYPE " + \
-                                  str(Lexem.number) +\
-                                  " AT LINE NUMBER: " \
-                                  + str(token.line_number) + \
-                                  " POSITION NUMBER " + \
-                                  str(token.position_number))
-
-                    if expr_node.tag == Constants.logical_expression:
-                        common_tokens = list(filter(lambda token: token.tag == Constants.common_block, token_path))
-                        depth_level = len(common_tokens) - 1
-                        name = token_path[-1].tag
-                        type = self.__get_type(name, depth_level)
-
-                        if type != Lexem.bool:
-                            token = token_path[-1].data
-                            raise ValueError("SEMANTIC ERROR: EXPECTED TYPE " + \
-                                  str(Lexem.number) + \
-                                  " AT LINE NUMBER: " \
-                                  + str(token.line_number) + \
-                                  " POSITION NUMBER " + \
-                                  str(token.position_number))
+            # Each entry carries its parent's kind, the kind of the expression enclosing the
+            # parent and the COMMON_BLOCK depth, so no root-to-leaf path is ever built.
+            stack = [(tree, None, None, depth_level)]
+            while stack:
+                node, parent_kind, expression_kind, depth_level = stack.pop()
+                if node.kind == Constants.common_block:
+                    depth_level += 1
+
+                if node.children:
+                    for child in reversed(node.children):
+                        stack.append((child, node.kind, parent_kind, depth_level))
+                elif parent_kind == Lexem.identifier:
+                    if expression_kind == Constants.arithmetic_expression or \
+                            expression_kind == Constants.iterator_start or \
+                            expression_kind == Constants.iterator_end:
+                        yield node, Lexem.number, depth_level
+                    elif expression_kind == Constants.logical_expression:
+                        yield node, Lexem.bool, depth_level
+
+    def __check_identifier(self, leaf, expected_type, depth_level):
+        type = self.__get_type(leaf, depth_level)
+
+        if type != expected_type:
+            token = leaf.token
+            raise DiagnosticError(DiagnosticCode.type_mismatch, token.line_number, token.position_number,
+                  "SEMANTIC ERROR: EXPECTED TYPE " + \
+                  str(expected_type) + \
+                  " AT LINE NUMBER: " \
+                  + str(token.line_number) + \
+                  " POSITION NUMBER " + \
+                  str(token.position_number))
 
 
 class SyntaxAnalyzer(object):
-
-    def parse_tokens(self, tokens):
-        tree, _ = self.__handle_common_block(tokens[:], False, False, False)
-        return tree
-
-    def __handle_common_block(self, tokens_list, expect_end_token, expect_elseif_token, expect_else_token):
-        common_tree = Tree()
-        common_tree.create_node(tag=Constants.common_block)
+    __predictive = True
+    __packrat = True
+    __recover = False
+    __spans = None
+    __memo = None
+    __diagnostics = None
+    __profiler = None
+    __wrappers = None
+    __stream = None
+
+    def __init__(self, predictive=True, packrat=True, recover=False, profiler=None):
+        # With recover, a statement that fails to parse is recorded in get_diagnostics() and skipped,
+        # up to the end of its line or, for a block, up to its END, and parse_tokens returns the rest.
+        # With a Profiler, every __handle_* production reports its calls to it.
+        self.__predictive = predictive
+        self.__packrat = packrat
+        self.__recover = recover
+        if profiler is not None:
+            self.__profiler = profiler
+            self.__profile_productions()
+
+    def __profile_productions(self):
+        # This instance's productions are swapped for wrappers that report to the profiler, so an analyzer
+        # without one runs the same code as before. Direct calls find the wrappers as instance attributes,
+        # the handler tables are copied with them, and __run and __apply map the rules they are passed.
+        wrappers = {}
+        for attribute, rule in list(vars(SyntaxAnalyzer).items()):
+            if attribute.startswith("_SyntaxAnalyzer__handle_"):
+                wrappers[rule] = self.__profiler.wrap(rule, rule.__qualname__, lambda: self.__stream.position)
+                setattr(self, attribute, MethodType(wrappers[rule], self))
+        self.__statement_handlers = tuple(wrappers[rule] for rule in SyntaxAnalyzer.__statement_handlers)
+        self.__terminator_handlers = tuple(wrappers[rule] for rule in SyntaxAnalyzer.__terminator_handlers)
+        self.__statement_first_sets = dict((lexem_class, tuple(wrappers[rule] for rule in rules))
+                                           for lexem_class, rules in SyntaxAnalyzer.__statement_first_sets.items())
+        self.__terminator_first_sets = dict((lexem_class, tuple(wrappers[rule] for rule in rules))
+                                            for lexem_class, rules in SyntaxAnalyzer.__terminator_first_sets.items())
+        self.__wrappers = wrappers
+
+    def get_diagnostics(self):
+        return list(self.__diagnostics or ())
+
+    def parse_tokens(self, tokens, spans=None):
+        # spans, when given, receives (statement, first token index, end token index) for every statement parsed.
+        self.__spans = spans
+        self.__memo = {} if self.__packrat else None
+        self.__diagnostics = [] if self.__recover else None
+        self.__stream = TokenStream(tokens)
+        depth = self.__profiler.get_depth() if self.__profiler is not None else 0
+        try:
+            return self.__run(self.__stream, SyntaxAnalyzer.__handle_common_block, (False, False, False))
+        finally:
+            self.__spans = None
+            self.__memo = None
+            self.__stream = None
+            if self.__profiler is not None:
+                self.__profiler.unwind(depth)
+
+    def __apply(self, rule, stream, *arguments):
+        # Packrat memo: each rule runs once per (rule, position, arguments) and later calls replay the
+        # result and the position it left the stream at. Results are shared, so callers never modify them.
+        memo = self.__memo
+        if self.__wrappers is not None:
+            rule = self.__wrappers.get(rule, rule)
+        if memo is None:
+            return rule(self, stream, *arguments)
+
+        key = (rule, stream.position) + arguments
+        entry = memo.get(key)
+        if entry is None:
+            result = rule(self, stream, *arguments)
+            memo[key] = (result, stream.position, ())
+            return result
+
+        if self.__wrappers is not None:
+            self.__profiler.count_memo_hit(rule.__qualname__)
+        result, position, _ = entry
+        stream.seek(position)
+        return result
+
+    def __run(self, stream, rule, arguments):
+        # Runs a rule the way __apply does, without recursing into nested blocks. The block rules are
+        # generators: they yield (rule, arguments) for each sub-rule and are sent back its result, so
+        # nesting depth grows the running list instead of the Python stack.
+        # When recovering, an error is thrown into the generator that asked for the failed rule. The
+        # diagnostics a rule recorded are dropped if it returns None, since its caller backtracks and may
+        # parse the same lines again, and are replayed along with its result from the memo.
+        memo = self.__memo
+        diagnostics = self.__diagnostics
+        wrappers = self.__wrappers
+        running = []
+        request = (rule, arguments)
+        result = None
+        error = None
+        while True:
+            if request is not None:
+                rule, arguments = request
+                request = None
+                if wrappers is not None:
+                    rule = wrappers.get(rule, rule)
+                key = None
+                entry = None
+                if memo is not None:
+                    key = (rule, stream.position) + arguments
+                    entry = memo.get(key)
+                if entry is not None:
+                    if wrappers is not None:
+                        self.__profiler.count_memo_hit(rule.__qualname__)
+                    result, position, recorded = entry
+                    stream.seek(position)
+                    if recorded:
+                        diagnostics.extend(recorded)
+                else:
+                    try:
+                        result = rule(self, stream, *arguments)
+                    except DiagnosticError as rule_error:
+                        if diagnostics is None:
+                            raise
+                        error = rule_error
+                    else:
+                        if isinstance(result, GeneratorType):
+                            running.append((result, key, len(diagnostics) if diagnostics is not None else 0))
+                            result = None
+                        elif key is not None:
+                            memo[key] = (result, stream.position, ())
+
+            if not running:
+                if error is not None:
+                    raise error
+                return result
+
+            generator, key, mark = running[-1]
+            try:
+                if error is None:
+                    request = generator.send(result)
+                else:
+                    thrown, error = error, None
+                    request = generator.throw(thrown)
+            except StopIteration as stop:
+                running.pop()
+                result = stop.value
+                recorded = ()
+                if diagnostics is not None:
+                    if result is None:
+                        del diagnostics[mark:]
+                    else:
+                        recorded = tuple(diagnostics[mark:])
+                if key is not None:
+                    memo[key] = (result, stream.position, recorded)
+            except DiagnosticError as rule_error:
+                # What the failed rule recorded is kept: its statement is skipped, not parsed again.
+                if diagnostics is None:
+                    raise
+                running.pop()
+                error = rule_error
+
+    def __get_statement_handlers(self, lexem_class):
+        if self.__predictive:
+            return self.__statement_first_sets.get(lexem_class, ())
+        return self.__statement_handlers
+
+    def __get_terminator_handlers(self, lexem_class):
+        if self.__predictive:
+            return self.__terminator_first_sets.get(lexem_class, ())
+        return self.__terminator_handlers
+
+    def __handle_common_block(self, stream, expect_end_token, expect_elseif_token, expect_else_token):
+        block_start = stream.mark()
+        top_level = not (expect_end_token or expect_elseif_token or expect_else_token)
+
+        common_tree = SyntaxNode(Constants.common_block)
 
         receive_end_token = False
         receive_else_token = False
         receive_elseif_token = False
 
-        while len(tokens_list) != 0:
-            start_tokens_length = len(tokens_list)
-
-
-            tree, new_tokens = self.__handle_arithmetic_expression(tokens_list[:])
-            if tree is not None:
-                common_tree.paste(common_tree.root, tree)
-                tokens_list = new_tokens
-                continue
-
-            tree, new_tokens = self.__handle_logical_expression(tokens_list[:])
-            if tree is not None:
-                common_tree.paste(common_tree.root, tree)
-                tokens_list = new_tokens
-                continue
-
-            tree, new_tokens = self.__handle_identifier(tokens_list[:])
-            if tree is not None:
-                common_tree.paste(common_tree.root, tree)
-                tokens_list = new_tokens
+        while not stream.at_end():
+            start_position = stream.position
+            line_end = stream.line_end(start_position)
+            lexem_class = stream.lexem_class(start_position)
+
+            trees = None
+            try:
+                for handler in self.__get_statement_handlers(lexem_class):
+                    trees = yield handler, (line_end,)
+                    if trees is not None:
+                        break
+            except DiagnosticError as error:
+                if self.__diagnostics is None:
+                    raise
+                self.__diagnostics.append(error.diagnostic)
+                self.__skip_statement(stream, start_position, top_level)
                 continue
 
-            tree, new_tokens = self.__handle_while_block(tokens_list[:])
-            if tree is not None:
-                common_tree.paste(common_tree.root, tree)
-                tokens_list = new_tokens
-                continue
-
-            tree, new_tokens = self.__handle_for_block(tokens_list[:])
-            if tree is not None:
-                common_tree.paste(common_tree.root, tree)
-                tokens_list = new_tokens
-                continue
-
-            tree, new_tokens = self.__handle_if_else_block(tokens_list[:])
-            if tree is not None:
-                common_tree.paste(common_tree.root, tree)
-                tokens_list = new_tokens
-                continue
-
-
-            trees, new_tokens = self.__handle_multiple_assignment(tokens_list[:])
             if trees is not None:
-                tokens_list = new_tokens
+                if not isinstance(trees, list):
+                    trees = [trees]
                 for tree in trees:
-                    common_tree.paste(common_tree.root, tree)
-                    continue
+                    common_tree.add(tree)
+                if self.__spans is not None:
+                    for tree in trees:
+                        self.__spans.append((tree, start_position, stream.position))
+                if top_level:
+                    # Nothing backtracks past a finished top level statement, so the tokens
+                    # and memo entries before it are never needed again.
+                    stream.release()
+                    if self.__memo:
+                        self.__memo.clear()
+                continue
 
-            tree, new_tokens =  self.__handle_end_token(tokens_list[:])
-            if tree is not None:
-                if expect_end_token:
-                    receive_end_token = True
-                    tokens_list = new_tokens
+            terminator_token = None
+            for handler in self.__get_terminator_handlers(lexem_class):
+                terminator_token = handler(self, stream, line_end)
+                if terminator_token is not None:
                     break
-                else:
-                    return None, tokens_list
 
-            tree, new_tokens = self.__handle_else_token(tokens_list[:])
-            if tree is not None:
-                if expect_else_token:
+            if terminator_token is not None:
+                if terminator_token.lexem_class == Lexem.end_keyword and expect_end_token:
+                    receive_end_token = True
+                elif terminator_token.lexem_class == Lexem.else_keyword and expect_else_token:
                     receive_else_token = True
-                    tokens_list = new_tokens
-                    break
-                else:
-                    return None, tokens_list
-
-            tree, new_tokens = self.__handle_elseif_token(tokens_list[:])
-            if tree is not None:
-                if expect_elseif_token:
+                elif terminator_token.lexem_class == Lexem.elseif_keyword and expect_elseif_token:
                     receive_elseif_token = True
-                    tokens_list = new_tokens
-                    break
+                elif top_level and self.__diagnostics is not None:
+                    # Only the outermost block has nobody to hand the terminator back to.
+                    self.__diagnostics.append(Diagnostic(DiagnosticCode.unexpected_terminator,
+                                                         terminator_token.line_number,
+                                                         terminator_token.position_number,
+                                                         "UNEXPECTED " + terminator_token.lexem +
+                                                         " AT LINE NUMBER: " + str(terminator_token.line_number) +
+                                                         " POSITION: " + str(terminator_token.position_number)))
+                    self.__skip_statement(stream, start_position, top_level)
+                    continue
                 else:
-                    return None, tokens_list
-
-            if start_tokens_length == len(tokens_list):
-                raise ValueError("CAN'T RESOLVE SYMBOL AT LINE NUMBER " + str(tokens_list[0].line_number))
+                    stream.reset(block_start)
+                    return None
+                break
+
+            if start_position == stream.position:
+                token = stream.peek()
+                error = DiagnosticError(DiagnosticCode.unresolved_statement, token.line_number,
+                                        token.position_number,
+                                        "CAN'T RESOLVE SYMBOL AT LINE NUMBER " + str(token.line_number))
+                if self.__diagnostics is None:
+                    raise error
+                self.__diagnostics.append(error.diagnostic)
+                self.__skip_statement(stream, start_position, top_level)
 
         if expect_end_token and not receive_end_token:
-            raise ValueError("Expected END token")
-
+            token = self.__get_error_token(stream)
+            error = DiagnosticError(DiagnosticCode.expected_end, token.line_number, token.position_number,
+                                    "Expected END token")
+            if self.__diagnostics is None:
+                raise error
+            # The block runs to the end of the input, as if END were its last line.
+            self.__diagnostics.append(error.diagnostic)
+            return common_tree
 
         if not (expect_end_token or receive_end_token) and \
             not (expect_else_token or receive_else_token) and \
             not (expect_elseif_token or receive_elseif_token) and \
-            len(tokens_list) == 0:
-                return common_tree, tokens_list
+            stream.at_end():
+                return common_tree
 
         if expect_end_token and receive_end_token and not receive_else_token and not receive_elseif_token:
-            return common_tree, tokens_list
+            return common_tree
 
         if expect_else_token and receive_else_token and not receive_end_token and not receive_elseif_token:
-            return common_tree, tokens_list
+            return common_tree
 
         if expect_elseif_token and receive_elseif_token and not receive_end_token and not receive_else_token:
-            return common_tree, tokens_list
-
-        raise ValueError("DID RECEIVE SYNTAX ERROR")
-
-
-    def __handle_arithmetic_expression(self, tokens_list):
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
+            return common_tree
+
+        if self.__diagnostics is not None:
+            # Input ran out where an ELSE or ELSEIF was expected; the block expecting END reports it.
+            stream.reset(block_start)
+            return None
+
+        token = self.__get_error_token(stream)
+        raise DiagnosticError(DiagnosticCode.syntax_error, token.line_number, token.position_number,
+                              "DID RECEIVE SYNTAX ERROR")
+
+    def __skip_statement(self, stream, start, top_level):
+        # Recovery: moves past the statement starting at start. A block is skipped through the END
+        # matching its header, anything else to the end of its line.
+        depth = 0
+        position = start
+        while True:
+            lexem_class = stream.lexem_class(position)
+            if lexem_class in self.__block_keywords:
+                depth += 1
+            elif lexem_class == Lexem.end_keyword:
+                depth -= 1
+            position = stream.line_end(position)
+            stream.seek(position)
+            if depth <= 0 or stream.at_end():
+                break
+        if top_level:
+            stream.release()
+            if self.__memo:
+                self.__memo.clear()
+
+    def __get_error_token(self, stream):
+        # The token to report a problem at: the current one, or the last one at the end of the input.
+        token = stream.peek()
+        if token is None and stream.position > 0:
+            token = stream.token(stream.position - 1)
+        return token if token is not None else Token()
+
+    def __handle_arithmetic_expression(self, stream, end):
+        start = stream.mark()
+        if start < end:
+            first_token = stream.token(start)
             if first_token.lexem_class == Lexem.identifier or \
                             first_token.lexem_class == Lexem.l_par or \
                             first_token.lexem_class == Lexem.number or \
                             first_token.lexem_class == Lexem.string:
 
-                current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
+                line_end = self.__get_line_end(stream, end)
 
-                tree, new_tokens = self.__handle_arithmetic_expression_helper(current_tokens, False)
+                tree = self.__handle_arithmetic_expression_helper(stream, line_end, False)
                 if tree is not None:
-                    return tree, tokens_list[len(current_tokens):]
-        return None, tokens_list
-
-    def __handle_arithmetic_expression_helper(self, tokens_list, expecting_close_par):
-        if len(tokens_list) > 0:
-
-            first_token = tokens_list[0]
-
-            tree = None
-            if first_token.lexem_class == Lexem.l_par:
-                expr_tree, new_tokens = self.__handle_arithmetic_expression_helper(tokens_list[1:], True)
-                if expr_tree is not None:
-                    if len(new_tokens) == 0:
-                        raise ValueError("Expected close PAR")
-
-                    tree = Tree()
-                    tree.create_node(tag=Constants.arithmetic_expression)
-                    tree.create_node(tag="(", parent=tree.root)
-                    tree.paste(tree.root, expr_tree)
-                    tree.create_node(tag=")", parent=tree.root)
-                    tokens_list = new_tokens
-
-            if first_token.lexem_class == Lexem.identifier or \
-                first_token.lexem_class == Lexem.number or \
-                    first_token.lexem_class == Lexem.string:
+                    stream.seek(line_end)
+                    return tree
+                stream.reset(start)
+        return None
+
+    def __handle_arithmetic_expression_helper(self, stream, end, expecting_close_par):
+        # The grammar is right recursive: an operand, then optionally an operator and another expression.
+        # Instead of a call per operator and per parenthesis, pending holds what each of those calls still
+        # has to do once its inner expression is parsed: an operator node waiting for its right hand side,
+        # or, with no node, the start of a parenthesised group.
+        pending = []
+        result = None
+        enter = True
+        while True:
+            if enter:
+                enter = False
+                result = None
+                if stream.position >= end:
+                    continue
 
-                tree = Tree()
-                tree.create_node(tag=Constants.arithmetic_expression)
+                start = stream.mark()
+                first_token = stream.token(start)
 
-                lexem_class_node = tree.create_node(tag=first_token.lexem_class, parent=tree.root)
+                if first_token.lexem_class == Lexem.l_par:
+                    stream.advance()
+                    pending.append((None, start, expecting_close_par))
+                    expecting_close_par = True
+                    enter = True
+                    continue
 
-                tree.create_node(tag=first_token.lexem, parent=lexem_class_node.identifier, data=first_token)
+                tree = None
+                if first_token.lexem_class == Lexem.identifier or \
+                    first_token.lexem_class == Lexem.number or \
+                        first_token.lexem_class == Lexem.string:
 
-                if len(tokens_list) == 1 and not expecting_close_par:
-                    return tree, tokens_list[1:]
+                    tree = SyntaxNode(Constants.arithmetic_expression)
 
-            tokens_list = tokens_list[1:]
+                    lexem_class_node = tree.add(SyntaxNode(first_token.lexem_class))
 
-            if len(tokens_list) == 0:
-                return tree, []
+                    lexem_class_node.add(SyntaxNode(first_token.lexem, first_token))
 
-            if len(tokens_list) > 0:
+            elif pending:
+                tree, start, expecting_close_par = pending.pop()
+                if tree is not None:
+                    if result is not None:
+                        tree.add(result)
+                        result = tree
+                    continue
 
-                if tokens_list[0].lexem_class == Lexem.r_par:
-                    if expecting_close_par:
-                        return tree, tokens_list
-                    else:
-                        raise ValueError("Unexpected close brace")
+                if result is not None:
+                    if stream.position == end:
+                        token = stream.token(end - 1)
+                        raise DiagnosticError(DiagnosticCode.expected_close_par, token.line_number,
+                                              token.position_number, "Expected close PAR")
 
-                arithmetic_token = tokens_list[0]
+                    tree = SyntaxNode(Constants.arithmetic_expression)
+                    tree.add(SyntaxNode("("))
+                    tree.add(result)
+                    tree.add(SyntaxNode(")"))
+                else:
+                    stream.reset(start)
 
-                if arithmetic_token.lexem_class == Lexem.arithmetic_operation:
-                    arithmetic_class_node = tree.create_node(tag=Lexem.arithmetic_operation,
-                                                            parent=tree.root)
+            else:
+                return result
 
-                    tree.create_node(tag=arithmetic_token.lexem, parent=arithmetic_class_node.identifier)
+            stream.advance()
 
-                    subtree, new_tokens = self.__handle_arithmetic_expression_helper(tokens_list[1:], expecting_close_par)
+            if stream.position == end:
+                result = tree
+                continue
 
-                    if subtree is not None:
-                        tree.paste(tree.root, subtree)
-                        return tree, new_tokens
+            if stream.lexem_class(stream.position) == Lexem.r_par:
+                if expecting_close_par:
+                    result = tree
+                    continue
+                else:
+                    token = stream.token(stream.position)
+                    raise DiagnosticError(DiagnosticCode.unexpected_close_par, token.line_number,
+                                          token.position_number, "Unexpected close brace")
 
-        return None, tokens_list
+            arithmetic_token = stream.token(stream.position)
 
-    def __handle_comparasion_expression(self, tokens_list):
-        if len(tokens_list) >= 3:
+            result = None
+            if arithmetic_token.lexem_class == Lexem.arithmetic_operation and tree is not None:
+                arithmetic_class_node = tree.add(SyntaxNode(Lexem.arithmetic_operation))
 
-            current_line_number = tokens_list[0].line_number
+                arithmetic_class_node.add(SyntaxNode(arithmetic_token.lexem))
 
-            current_tokens = self.__get_tokens_for_line(tokens_list, current_line_number)
+                stream.advance()
+                pending.append((tree, None, expecting_close_par))
+                enter = True
 
-            logical_tokens = list(filter(lambda token: token.lexem_class == Lexem.comparison_operation, current_tokens))
+    def __handle_comparasion_expression(self, stream, end):
+        start = stream.mark()
+        if end - start >= 3:
 
-            if len(logical_tokens) == 1 and len(current_tokens) >= 3:
+            line_end = self.__get_line_end(stream, end)
 
-                tree = Tree()
-                tree.create_node(tag=Lexem.comparison_expression)
+            logical_indexes = [index for index in range(start, line_end)
+                               if stream.lexem_class(index) == Lexem.comparison_operation]
 
+            if len(logical_indexes) == 1 and line_end - start >= 3:
 
-                logical_index = current_tokens.index(logical_tokens[0])
+                tree = SyntaxNode(Lexem.comparison_expression)
 
-                expr1 = current_tokens[:logical_index]
-                expr2 = current_tokens[logical_index + 1:]
+                logical_index = logical_indexes[0]
+                logical_token = stream.token(logical_index)
 
-                tree1, _ = self.__handle_arithmetic_expression(expr1)
-                tree2, _ = self.__handle_arithmetic_expression(expr2)
+                tree1 = self.__apply(SyntaxAnalyzer.__handle_arithmetic_expression, stream, logical_index)
+                stream.seek(logical_index + 1)
+                tree2 = self.__apply(SyntaxAnalyzer.__handle_arithmetic_expression, stream, line_end)
 
                 if tree1 is None:
-                    raise ValueError("CAN'T RESOLVE SYMBOL AS ARITHMETIC EXPRESSION AT LINE NUMBER: " + \
-                          expr1[0].line_number + \
+                    expr1_token = stream.token(start) if start < logical_index else logical_token
+                    raise DiagnosticError(DiagnosticCode.invalid_arithmetic_expression,
+                          expr1_token.line_number, expr1_token.position_number,
+                          "CAN'T RESOLVE SYMBOL AS ARITHMETIC EXPRESSION AT LINE NUMBER: " + \
+                          str(expr1_token.line_number) + \
                           " POSITION: " + \
-                          expr1[0].line_number)
+                          str(expr1_token.position_number))
 
                 if tree2 is None:
-                    raise ValueError("CAN'T RESOLVE SYMBOL AS ARITHMETIC EXPRESSION AT LINE NUMBER: " + \
-                          str(expr2[0].line_number) + \
+                    expr2_token = stream.token(logical_index + 1) if logical_index + 1 < line_end else logical_token
+                    raise DiagnosticError(DiagnosticCode.invalid_arithmetic_expression,
+                          expr2_token.line_number, expr2_token.position_number,
+                          "CAN'T RESOLVE SYMBOL AS ARITHMETIC EXPRESSION AT LINE NUMBER: " + \
+                          str(expr2_token.line_number) + \
                           " POSITION: " + \
-                          str(expr2[0].line_number))
-                '''
-                if tree1 is None or tree2 is None:
-                    return None, tokens_list
-                '''
+                          str(expr2_token.position_number))
 
-                tree.paste(tree.root, tree1)
+                tree.add(tree1)
 
-                op_node = tree.create_node(tag=Lexem.comparison_operation, parent=tree.root)
+                op_node = tree.add(SyntaxNode(Lexem.comparison_operation))
 
-                tree.create_node(tag=logical_tokens[0].lexem, parent=op_node.identifier)
+                op_node.add(SyntaxNode(logical_token.lexem))
 
-                tree.paste(tree.root, tree2)
+                tree.add(tree2)
 
-                return tree, tokens_list[len(current_tokens):]
+                stream.seek(line_end)
+                return tree
 
-        return None, tokens_list
+        return None
 
-    def __handle_identifier(self, tokens_list):
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
+    def __handle_identifier(self, stream, end):
+        start = stream.mark()
+        if start < end:
+            first_token = stream.token(start)
             if first_token.lexem_class == Lexem.identifier:
 
-                tree = Tree()
-                tree.create_node(tag=Lexem.identifier_expression)
-
+                line_end = self.__get_line_end(stream, end)
 
-                id_node = tree.create_node(tag=Lexem.identifier, parent=tree.root)
+                if line_end - start == 1:
+                    stream.advance()
+                    return self.__build_identifier_tree(first_token)
 
+                if line_end - start >= 3:
 
-                tree.create_node(tag=first_token.lexem, parent=id_node.identifier)
-
-
-                current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
-
-                if len(current_tokens) == 1:
-                    return tree, tokens_list[1:]
-
-                if len(current_tokens) >= 3:
-
-                    second_token = current_tokens[1]
+                    second_token = stream.token(start + 1)
                     if second_token.lexem_class == Lexem.assign:
 
-                        sub_tokens = current_tokens[2:]
+                        stream.seek(start + 2)
+                        tree = self.__handle_assignment(first_token, stream, line_end)
+                        stream.seek(line_end)
+                        return tree
 
-                        expr_tree, _ = self.__handle_arithmetic_expression(sub_tokens)
-                        if expr_tree is not None:
-                            tree.create_node(tag="=", parent=tree.root)
+        return None
 
-                            tree.paste(tree.root, expr_tree)
+    def __handle_assignment(self, identifier_token, stream, end):
+        expr_start = stream.position
 
-                            return tree, tokens_list[len(current_tokens):]
+        expr_tree = self.__apply(SyntaxAnalyzer.__handle_arithmetic_expression, stream, end)
+        if expr_tree is None:
+            expr_tree = self.__apply(SyntaxAnalyzer.__handle_logical_expression, stream, end)
 
-                        expr_tree, _ = self.__handle_logical_expression(sub_tokens)
-                        if expr_tree is not None:
-                            tree.create_node(tag="=", parent=tree.root)
+        if expr_tree is None:
+            expr_token = stream.token(expr_start)
+            raise DiagnosticError(DiagnosticCode.invalid_expression,
+                    expr_token.line_number, expr_token.position_number,
+                    "CAN'T RESOLVE LOGICAL OR ARITHMETICAL EXPRESSION AT LINE NUMBER: " \
+                    + str(expr_token.line_number) \
+                    + " POSITION: " \
+                    + str(expr_token.position_number))
 
-                            tree.paste(tree.root, expr_tree)
+        tree = self.__build_identifier_tree(identifier_token)
 
-                            return tree, tokens_list[len(current_tokens):]
-                        else:
-                            raise ValueError("CAN'T RESOLVE LOGICAL OR ARITHMETICAL EXPRESSION AT LINE NUMBER: " \
-                                    + str(sub_tokens[0].line_number) \
-                                    + " POSITION: " \
-                                    + str(sub_tokens[0].position_number))
+        tree.add(SyntaxNode("="))
 
-        return None, tokens_list
+        tree.add(expr_tree)
 
-    def __handle_while_block(self, tokens_list):
-
-        if len(tokens_list) >= 3:
-
-            first_token = tokens_list[0]
-
-            current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
+        return tree
 
-            last_token = current_tokens[-1]
+    def __build_identifier_tree(self, identifier_token):
+        tree = SyntaxNode(Lexem.identifier_expression)
 
-            if len(current_tokens) >= 3 and \
-                            first_token.lexem_class == Lexem.while_keyword and \
-                            last_token.lexem_class == Lexem.do_keyword:
+        id_node = tree.add(SyntaxNode(Lexem.identifier))
 
-                comp_tokens = current_tokens[1:-1]
-                comp_tree, _ = self.__handle_logical_expression(comp_tokens)
-                if comp_tree is not None:
-                    del tokens_list[:len(current_tokens)]
-                    common_tree, new_tokens = self.__handle_common_block(tokens_list, True, False, False)
-                    if common_tree is not None:
+        id_node.add(SyntaxNode(identifier_token.lexem))
 
-                        tree = Tree()
-                        tree.create_node(tag=Constants.while_block)
+        return tree
 
-                        tree.create_node(tag="WHILE", parent=tree.root)
+    def __handle_while_block(self, stream, line_end):
+        start = stream.mark()
 
-                        tree.paste(tree.root, comp_tree)
+        first_token = stream.token(start)
 
-                        tree.create_node(tag="DO", parent=tree.root)
+        last_token = stream.token(line_end - 1)
 
-                        tree.paste(tree.root, common_tree)
+        if line_end - start >= 3 and \
+                        first_token.lexem_class == Lexem.while_keyword and \
+                        last_token.lexem_class == Lexem.do_keyword:
 
-                        tree.create_node(tag="END", parent=tree.root)
+            stream.seek(start + 1)
+            comp_tree = self.__apply(SyntaxAnalyzer.__handle_logical_expression, stream, line_end - 1)
+            if comp_tree is not None:
+                stream.seek(line_end)
+                common_tree = yield SyntaxAnalyzer.__handle_common_block, (True, False, False)
+                if common_tree is not None:
 
-                        return tree, new_tokens
-                else:
-                    raise ValueError("EXPECTED LOGICAL EXPRESSION AT LINE: " +\
-                          str(comp_tokens[0].line_number) +\
-                          " POSITION: " +\
-                          str(comp_tokens[0].position_number))
+                    tree = SyntaxNode(Constants.while_block)
 
-        return None, tokens_list
+                    tree.add(SyntaxNode("WHILE"))
 
-    def __handle_for_block(self, tokens_list):
+                    tree.add(comp_tree)
 
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
-            current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
-            if len(current_tokens) == 7:
-                if first_token.lexem_class == Lexem.for_keyword and \
-                    current_tokens[1].lexem_class == Lexem.identifier and \
-                    current_tokens[2].lexem_class == Lexem.in_keyword:
-                    iter_tokens = current_tokens[3:]
-                    iter_tree, _ = self.__handle_iterator_block(iter_tokens)
-                    if iter_tree is not None:
-                        common_tokens = tokens_list[7:]
-                        common_tree, new_tokens = self.__handle_common_block(common_tokens, True, False, False)
-                        if common_tree is not None:
-                            tree = Tree()
-                            tree.create_node(tag=Constants.for_block)
+                    tree.add(SyntaxNode("DO"))
 
-                            tree.create_node(tag="FOR", parent=tree.root)
+                    tree.add(common_tree)
 
-                            id_tree, _ = self.__handle_identifier([current_tokens[1]])
+                    tree.add(SyntaxNode("END"))
 
-                            if id_tree is None:
-                                raise ValueError("Identifier in FOR expression is missing")
+                    return tree
+                stream.reset(start)
+            else:
+                comp_token = stream.token(start + 1)
+                raise DiagnosticError(DiagnosticCode.expected_logical_expression,
+                      comp_token.line_number, comp_token.position_number,
+                      "EXPECTED LOGICAL EXPRESSION AT LINE: " +\
+                      str(comp_token.line_number) +\
+                      " POSITION: " +\
+                      str(comp_token.position_number))
+
+        return None
+
+    def __handle_for_block(self, stream, line_end):
+        start = stream.mark()
+
+        first_token = stream.token(start)
+        if line_end - start == 7:
+            identifier_token = stream.token(start + 1)
+            if first_token.lexem_class == Lexem.for_keyword and \
+                identifier_token.lexem_class == Lexem.identifier and \
+                stream.lexem_class(start + 2) == Lexem.in_keyword:
+                stream.seek(start + 3)
+                iter_tree = self.__handle_iterator_block(stream, line_end)
+                if iter_tree is not None:
+                    common_tree = yield SyntaxAnalyzer.__handle_common_block, (True, False, False)
+                    if common_tree is not None:
+                        tree = SyntaxNode(Constants.for_block)
 
-                            tree.paste(tree.root, id_tree)
+                        tree.add(SyntaxNode("FOR"))
 
-                            tree.create_node(tag="IN", parent=tree.root)
+                        tree.add(self.__build_identifier_tree(identifier_token))
 
-                            tree.paste(tree.root, iter_tree)
+                        tree.add(SyntaxNode("IN"))
 
-                            tree.paste(tree.root, common_tree)
+                        tree.add(iter_tree)
 
-                            tree.create_node(tag="END", parent=tree.root)
+                        tree.add(common_tree)
 
-                            return tree, new_tokens
-                    else:
-                        raise ValueError("EXPECTED VALID ITERATION EXPRESSION AT LINE NUMBER: " +\
-                              str(iter_tokens[0].line_number) +\
-                              " POSITION: " + str(iter_tokens[0].position_number))
+                        tree.add(SyntaxNode("END"))
 
-        return None, tokens_list
-
-    def __handle_iterator_block(self, tokens_list):
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
-            current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
-            if len(current_tokens) == 4:
+                        return tree
+                    stream.reset(start)
+                else:
+                    iter_token = stream.token(start + 3)
+                    raise DiagnosticError(DiagnosticCode.invalid_iterator,
+                          iter_token.line_number, iter_token.position_number,
+                          "EXPECTED VALID ITERATION EXPRESSION AT LINE NUMBER: " +\
+                          str(iter_token.line_number) +\
+                          " POSITION: " + str(iter_token.position_number))
+
+        return None
+
+    def __handle_iterator_block(self, stream, end):
+        start = stream.mark()
+        if start < end:
+            first_token = stream.token(start)
+            if self.__get_line_end(stream, end) - start == 4:
+                last_token = stream.token(start + 3)
                 if (first_token.lexem_class == Lexem.identifier or
                     first_token.lexem_class == Lexem.number) and \
-                    current_tokens[1].lexem_class == Lexem.dot and \
-                    current_tokens[2].lexem_class == Lexem.dot and \
-                    (current_tokens[3].lexem_class == Lexem.identifier or
-                    current_tokens[3].lexem_class == Lexem.number):
-
-                    tree = Tree()
-                    tree.create_node(tag=Constants.iterator_block)
-
-                    start_node = tree.create_node(tag=Constants.iterator_start, parent=tree.root)
-                    start_lexem_class_node = tree.create_node(tag=first_token.lexem_class, parent=start_node.identifier)
-                    tree.create_node(tag=first_token.lexem, parent=start_lexem_class_node.identifier, data=first_token)
-
-                    tree.create_node(tag=Lexem.dot, parent=tree.root)
-                    tree.create_node(tag=Lexem.dot, parent=tree.root)
-
-                    end_node = tree.create_node(tag=Constants.iterator_end, parent=tree.root)
-                    end_l_c_node = tree.create_node(tag=current_tokens[3].lexem_class, parent=end_node.identifier)
-                    tree.create_node(tag=current_tokens[3].lexem, parent=end_l_c_node.identifier, data=current_tokens[3])
-
-                    return tree, tokens_list[4:]
-        return None, tokens_list
-
-    def __handle_if_else_block(self, tokens_list):
-        if len(tokens_list) > 0:
-            if_token = tokens_list[0]
-            current_tokens = self.__get_tokens_for_line(tokens_list[:], if_token.line_number)
-
-            logic_tree, _ = self.__handle_logical_expression(current_tokens[1:])
-
-            if if_token.lexem_class == Lexem.if_keyword and logic_tree is not None:
-                common_tokens = tokens_list[len(current_tokens):]
-
-                tree = Tree()
-                tree.create_node(tag=Constants.if_block)
-                tree.create_node(tag="IF", parent=tree.root)
-                tree.paste(tree.root, logic_tree)
-
-                common_tree_elseif_token, new_tokens = self.__handle_common_block(tokens_list=common_tokens[:],
-                                                                                  expect_else_token=False,
-                                                                                  expect_end_token=False,
-                                                                                  expect_elseif_token=True)
-                while common_tree_elseif_token is not None:
-                    if len(new_tokens) > 0:
-                        sub_tokens = self.__get_tokens_for_line(new_tokens[0].line_number)
-
-                        l_tree, after_comp_tokens = self.__handle_logical_expression(sub_tokens[:])
-                        if l_tree is not None:
-                            tree.create_node(tag="ELSEIF", parent=tree.root)
-                            tree.paste(tree.root, l_tree)
-                            common_tree_elseif_token, new_tokens = self.__handle_common_block(
-                                tokens_list=new_tokens[after_comp_tokens[:]],
-                                expect_else_token=False,
-                                expect_end_token=False,
-                                expect_elseif_token=True)
-
-                            continue
-
-                common_tree_else_token, new_tokens = self.__handle_common_block(common_tokens[:], False, False, True)
-                if common_tree_else_token is not None:
-                    common_tokens = new_tokens
-                    tree.paste(tree.root, common_tree_else_token)
-                    tree.create_node(tag="ELSE", parent=tree.root)
-
-                common_tree_end_token, new_tokens = self.__handle_common_block(common_tokens[:], True, False, False)
-                if common_tree_end_token is not None:
-                    tree.paste(tree.root, common_tree_end_token)
-                    tree.create_node(tag="END", parent=tree.root)
-
-                    return tree, new_tokens
-            elif if_token.lexem_class == Lexem.if_keyword and logic_tree is None:
-                raise ValueError("EXPECTED VALID LOGICAL EXPRESSION AT LINE NUMBER: " + \
-                      str(current_tokens[1].line_number) + " POSITION: " + \
-                      str(current_tokens[1].position_number))
-
-        return None, tokens
-
-    def __handle_elseif_token(self, tokens_list):
-        if len(tokens_list) > 0:
-            elseif_token = tokens_list[0]
-            current_tokens = self.__get_tokens_for_line(tokens_list[:], elseif_token.line_number)
-            if len(current_tokens) > 1 and elseif_token.lexem_class == Lexem.elseif_keyword:
-                tree = Tree()
-                tree.create_node(tag="ELSEIF")
-                return tree, tokens_list[1:]
-        return None, tokens_list
-
-    def __handle_else_token(self, tokens_list):
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
-            current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
-            if len(current_tokens) == 1 and first_token.lexem_class == Lexem.else_keyword:
-                tree = Tree()
-                tree.create_node(tag="ELSE")
-                return tree, tokens_list[1:]
-        return None, tokens_list
-
-    def __handle_end_token(self, tokens_list):
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
-            current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
-            if len(current_tokens) == 1 and first_token.lexem_class == Lexem.end_keyword:
-                tree = Tree()
-                tree.create_node(tag="END")
-                return tree, tokens_list[1:]
-        return None, tokens_list
-
-    def __get_tokens_for_line(self, tokens, line):
-        return list(filter(lambda token: token.line_number == line, tokens))
-
-    def __handle_logical_expression(self, tokens_list):
-        if len(tokens_list) > 0:
-            first_token = tokens_list[0]
+                    stream.lexem_class(start + 1) == Lexem.dot and \
+                    stream.lexem_class(start + 2) == Lexem.dot and \
+                    (last_token.lexem_class == Lexem.identifier or
+                    last_token.lexem_class == Lexem.number):
+
+                    tree = SyntaxNode(Constants.iterator_block)
+
+                    start_node = tree.add(SyntaxNode(Constants.iterator_start))
+                    start_lexem_class_node = start_node.add(SyntaxNode(first_token.lexem_class))
+                    start_lexem_class_node.add(SyntaxNode(first_token.lexem, first_token))
+
+                    tree.add(SyntaxNode(Lexem.dot))
+                    tree.add(SyntaxNode(Lexem.dot))
+
+                    end_node = tree.add(SyntaxNode(Constants.iterator_end))
+                    end_l_c_node = end_node.add(SyntaxNode(last_token.lexem_class))
+                    end_l_c_node.add(SyntaxNode(last_token.lexem, last_token))
+
+                    stream.advance(4)
+                    return tree
+        return None
+
+    def __handle_if_else_block(self, stream, line_end):
+        start = stream.mark()
+        if_token = stream.token(start)
+        if if_token.lexem_class == Lexem.if_keyword:
+            stream.seek(start + 1)
+            logic_tree = self.__apply(SyntaxAnalyzer.__handle_logical_expression, stream, line_end)
+            if logic_tree is None:
+                self.__raise_expected_logical_expression(stream, start + 1, line_end, if_token)
+
+            tree = SyntaxNode(Constants.if_block)
+            tree.add(SyntaxNode("IF"))
+            tree.add(logic_tree)
+
+            common_tree_elseif_token = yield SyntaxAnalyzer.__handle_common_block, (False, True, False)
+            while common_tree_elseif_token is not None:
+                tree.add(common_tree_elseif_token)
+                tree.add(SyntaxNode("ELSEIF"))
+
+                elseif_start = stream.position
+                elseif_line_end = stream.line_end(elseif_start)
+                l_tree = self.__apply(SyntaxAnalyzer.__handle_logical_expression, stream, elseif_line_end)
+                if l_tree is None:
+                    self.__raise_expected_logical_expression(stream, elseif_start, elseif_line_end, if_token)
+                tree.add(l_tree)
+
+                common_tree_elseif_token = yield SyntaxAnalyzer.__handle_common_block, (False, True, False)
+
+            common_tree_else_token = yield SyntaxAnalyzer.__handle_common_block, (False, False, True)
+            if common_tree_else_token is not None:
+                tree.add(common_tree_else_token)
+                tree.add(SyntaxNode("ELSE"))
+
+            common_tree_end_token = yield SyntaxAnalyzer.__handle_common_block, (True, False, False)
+            if common_tree_end_token is not None:
+                tree.add(common_tree_end_token)
+                tree.add(SyntaxNode("END"))
+
+                return tree
+            stream.reset(start)
+
+        return None
+
+    def __raise_expected_logical_expression(self, stream, start, end, default_token):
+        token = stream.token(start) if start < end else default_token
+        raise DiagnosticError(DiagnosticCode.expected_logical_expression,
+              token.line_number, token.position_number,
+              "EXPECTED VALID LOGICAL EXPRESSION AT LINE NUMBER: " + \
+              str(token.line_number) + " POSITION: " + \
+              str(token.position_number))
+
+    def __handle_elseif_token(self, stream, line_end):
+        elseif_token = stream.peek()
+        if line_end - stream.position > 1 and \
+                elseif_token.lexem_class == Lexem.elseif_keyword:
+            stream.advance()
+            return elseif_token
+        return None
+
+    def __handle_else_token(self, stream, line_end):
+        first_token = stream.peek()
+        if line_end - stream.position == 1 and \
+                first_token.lexem_class == Lexem.else_keyword:
+            stream.advance()
+            return first_token
+        return None
+
+    def __handle_end_token(self, stream, line_end):
+        first_token = stream.peek()
+        if line_end - stream.position == 1 and \
+                first_token.lexem_class == Lexem.end_keyword:
+            stream.advance()
+            return first_token
+        return None
+
+    def __get_line_end(self, stream, end):
+        return min(stream.line_end(stream.position), end)
+
+    def __handle_logical_expression(self, stream, end):
+        start = stream.mark()
+        if start < end:
+            first_token = stream.token(start)
 
             if first_token.lexem_class == Lexem.identifier or \
                             first_token.lexem_class == Lexem.l_par or \
                             first_token.lexem_class == Lexem.bool or \
                             first_token.lexem_class == Lexem.number:
 
-                current_tokens = self.__get_tokens_for_line(tokens_list, first_token.line_number)
+                line_end = self.__get_line_end(stream, end)
 
-                tree, new_tokens = self.__handle_logical_expression_helper(current_tokens, False)
+                tree = self.__handle_logical_expression_helper(stream, line_end, False)
                 if tree is not None:
-                    return tree, tokens_list[len(current_tokens):]
-        return None, tokens_list
-
-    def __handle_logical_expression_helper(self, tokens_list, expecting_close_par):
-        if len(tokens_list) > 0:
-
-            tree = None
-            first_token = tokens_list[0]
-            if first_token.lexem_class == Lexem.l_par:
-                expr_tree, new_tokens = self.__handle_logical_expression_helper(tokens_list[1:], True)
-                if expr_tree is not None:
-                    if len(new_tokens) == 0:
-                        raise ValueError("Expected close PAR")
-
-                    tree = Tree()
-                    tree.create_node(tag=Constants.logical_expression)
-                    tree.create_node(tag="(", parent=tree.root)
-                    tree.paste(tree.root, expr_tree)
-                    tree.create_node(tag=")", parent=tree.root)
-                    tokens_list = new_tokens[1:]
-
-            else:
+                    stream.seek(line_end)
+                    return tree
+                stream.reset(start)
+        return None
+
+    def __handle_logical_expression_helper(self, stream, end, expecting_close_par):
+        # Same explicit stack as __handle_arithmetic_expression_helper.
+        pending = []
+        result = None
+        enter = True
+        while True:
+            if enter:
+                enter = False
+                result = None
+                if stream.position >= end:
+                    continue
 
-                stop_token = next((x for x in tokens_list
-                                   if x.lexem_class == Lexem.logical_operation or x.lexem_class == Lexem.r_par), None)
+                tree = None
+                start = stream.mark()
+                first_token = stream.token(start)
+                if first_token.lexem_class == Lexem.l_par:
+                    stream.advance()
+                    pending.append((None, start, expecting_close_par))
+                    expecting_close_par = True
+                    enter = True
+                    continue
 
-                stop_index = len(tokens_list)
-                if stop_token is not None:
-                    stop_index = tokens_list.index(stop_token)
+                stop_index = end
+                for index in range(start, end):
+                    lexem_class = stream.lexem_class(index)
+                    if lexem_class == Lexem.logical_operation or lexem_class == Lexem.r_par:
+                        stop_index = index
+                        break
 
-                if stop_index > 0:
-                    subtokens = tokens_list[:stop_index]
-                    if len(subtokens) == 1:
-                        token = subtokens[0]
+                if stop_index > start:
+                    if stop_index - start == 1:
+                        token = first_token
                         if token.lexem_class == Lexem.identifier or token.lexem_class == Lexem.bool:
-                            tree = Tree()
-                            tree.create_node(tag=Constants.logical_expression)
+                            tree = SyntaxNode(Constants.logical_expression)
 
-                            lexem_class_node = tree.create_node(tag=token.lexem_class, parent=tree.root)
-                            tree.create_node(tag=token.lexem, parent=lexem_class_node.identifier, data=token)
+                            lexem_class_node = tree.add(SyntaxNode(token.lexem_class))
+                            lexem_class_node.add(SyntaxNode(token.lexem, token))
 
                     else:
-                        comp_tree, _ = self.__handle_comparasion_expression(subtokens)
+                        comp_tree = self.__handle_comparasion_expression(stream, stop_index)
                         if comp_tree is not None:
 
-                            tree = Tree()
-                            tree.create_node(tag=Constants.logical_expression)
-                            tree.paste(tree.root, comp_tree)
-
-                tokens_list = tokens_list[len(subtokens):]
-
-            if len(tokens_list) == 0:
-                return tree, []
-
-            if len(tokens_list) > 0:
-
-                if tokens_list[0].lexem_class == Lexem.r_par:
-                    if expecting_close_par:
-                        return tree, tokens_list
-                    else:
-                        raise ValueError("Unexpected close brace")
-
-                logical_token = tokens_list[0]
-
-                if logical_token.lexem_class == Lexem.logical_operation:
-                    op_class_node = tree.create_node(tag=Lexem.logical_operation,
-                                                            parent=tree.root)
-
-                    tree.create_node(tag=logical_token.lexem, parent=op_class_node.identifier)
-
-                    subtree, new_tokens = self.__handle_logical_expression_helper(tokens_list[1:], expecting_close_par)
-
-                    if subtree is not None:
-                        tree.paste(tree.root, subtree)
-                        return tree, new_tokens
-
-
-        return None, tokens_list
-
-    def __handle_multiple_assignment(self, tokens_list):
-        if len(tokens_list) > 0:
-            current_tokens = self.__get_tokens_for_line(tokens_list, tokens_list[0].line_number)
-
-            assign_token = next((x for x in current_tokens
-                                 if x.lexem_class == Lexem.assign), None)
-
-            if assign_token is not None:
-                index = current_tokens.index(assign_token)
-
-                identifier_subtokens = current_tokens[:index]
-                value_tokens = current_tokens[index+1:]
-
-                valid_id = False
-                id_tokens = []
-                for i in range(len(identifier_subtokens)):
-                    if i % 2 == 1:
-                        valid_id = identifier_subtokens[i].lexem_class == Lexem.comma
-                    else:
-                        valid_id = identifier_subtokens[i].lexem_class == Lexem.identifier
-                        if valid_id:
-                            id_tokens.append(identifier_subtokens[i])
-
-                expr_tokens = []
-                expr_subtokens = []
-                for i in range(len(value_tokens)):
-                    if value_tokens[i].lexem_class == Lexem.comma:
-                        expr_tokens.append(expr_subtokens)
-                        expr_subtokens = []
-                        continue
-                    else:
-                        expr_subtokens.append(value_tokens[i])
-                expr_tokens.append(expr_subtokens)
-
-                if len(expr_tokens) == len(id_tokens) and valid_id:
-                    trees = []
-                    for i in range(len(expr_tokens)):
-                        line_number = id_tokens[0].line_number
-                        single_assign_tokens = [id_tokens[i]] + \
-                                               [Token(lexem_class=Lexem.assign, lexem="=", line_number=line_number, position_number=0)] + \
-                                                expr_tokens[i]
-
-                        tree, _ = self.__handle_identifier(single_assign_tokens)
-                        if tree is not None:
-                            trees.append(tree)
-                            continue
-                        return None, tokens_list
-
-                    return trees, tokens_list[len(current_tokens):]
-
-        return None, tokens_list
-
-
-"""
-token_1 = Token(lexem_class=Lexem.number, lexem="1", line_number=0, position_number=0)
-token_2 = Token(lexem_class=Lexem.arithmetic_operation, lexem="+", line_number=0, position_number=0)
-token_3 = Token(lexem_class=Lexem.number, lexem="3", line_number=0, position_number=0)
-token_4 = Token(lexem_class=Lexem.number, lexem="3", line_number=1, position_number=0)
-token_5 = Token(lexem_class=Lexem.arithmetic_operation, lexem="-", line_number=1, position_number=0)
-token_6 = Token(lexem_class=Lexem.number, lexem="4", line_number=1, position_number=0)
-
-
-token_4 = Token(lexem_class=Lexem.comparison_operation, lexem="<", line_number=0, position_number=0)
-
-token_5 = Token(lexem_class=Lexem.number, lexem="3", line_number=0, position_number=0)
-token_6 = Token(lexem_class=Lexem.arithmetic_operation, lexem="-", line_number=0, position_number=0)
-token_7 = Token(lexem_class=Lexem.number, lexem="4", line_number=0, position_number=0)
-
-tokens = [token_1, token_2, token_3, token_4, token_5, token_6]
-"""
-"""
-token_1 = Token(lexem_class=Lexem.for_keyword, lexem="for", line_number=0, position_number=0)
-
-token_2 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=0, position_number=0)
-token_3 = Token(lexem_class=Lexem.in_keyword, lexem="in", line_number=0, position_number=0)
-
-token_4 = Token(lexem_class=Lexem.number, lexem="3", line_number=0, position_number=0)
-token_5 = Token(lexem_class=Lexem.dot, lexem=".", line_number=0, position_number=0)
-token_6 = Token(lexem_class=Lexem.dot, lexem=".", line_number=0, position_number=0)
-token_7 = Token(lexem_class=Lexem.identifier, lexem="max", line_number=0, position_number=0)
-
-
-token_8 = Token(lexem_class=Lexem.number, lexem="1", line_number=1, position_number=0)
-token_9 = Token(lexem_class=Lexem.arithmetic_operation, lexem="+", line_number=1, position_number=0)
-token_10 = Token(lexem_class=Lexem.number, lexem="3", line_number=1, position_number=0)
-
-token_11 = Token(lexem_class=Lexem.number, lexem="1", line_number=2, position_number=0)
-token_12 = Token(lexem_class=Lexem.arithmetic_operation, lexem="+", line_number=2, position_number=0)
-token_13 = Token(lexem_class=Lexem.number, lexem="3", line_number=2, position_number=0)
-
-token_14 = Token(lexem_class=Lexem.end_keyword, lexem="end", line_number=3, position_number=0)
-
-tokens = [token_1, token_2, token_3,token_4,token_5, token_6, token_7, token_8, token_9, token_10, token_11, token_12, token_13, token_14]
-"""
-
-token_1 = Token(lexem_class=Lexem.if_keyword, lexem="IF", line_number=0, position_number=0)
-
-token_2 = Token(lexem_class=Lexem.number, lexem="4", line_number=0, position_number=0)
-token_3 = Token(lexem_class=Lexem.comparison_operation, lexem="<=", line_number=0, position_number=0)
-token_4 = Token(lexem_class=Lexem.number, lexem="3", line_number=0, position_number=0)
-
-token_5 = Token(lexem_class=Lexem.number, lexem="1", line_number=2, position_number=0)
-token_6 = Token(lexem_class=Lexem.arithmetic_operation, lexem="+", line_number=2, position_number=0)
-token_7 = Token(lexem_class=Lexem.number, lexem="3", line_number=2, position_number=0)
-
-token_8 = Token(lexem_class=Lexem.identifier, lexem="elses", line_number=3, position_number=0)
-token_9 = Token(lexem_class=Lexem.comma, lexem=",", line_number=3, position_number=0)
-token_10 = Token(lexem_class=Lexem.identifier, lexem="q", line_number=3, position_number=0)
-
-token_11 = Token(lexem_class=Lexem.assign, lexem="=", line_number=3, position_number=0)
-
-token_12 = Token(lexem_class=Lexem.string, lexem="4", line_number=3, position_number=0)
-token_13 = Token(lexem_class=Lexem.comma, lexem=",", line_number=3, position_number=0)
-token_14 = Token(lexem_class=Lexem.string, lexem="q value", line_number=3, position_number=0)
-
-'''
-token_15 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=4, position_number=0)
-token_16 = Token(lexem_class=Lexem.assign, lexem="=", line_number=4, position_number=0)
-token_17 = Token(lexem_class=Lexem.identifier, lexem="elses", line_number=4, position_number=0)
-token_18 = Token(lexem_class=Lexem.arithmetic_operation, lexem="+", line_number=4, position_number=0)
-token_19 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=4, position_number=0)
-'''
-
-token_20 = Token(lexem_class=Lexem.identifier, lexem="elses", line_number=5, position_number=0)
-token_21 = Token(lexem_class=Lexem.assign, lexem="=", line_number=5, position_number=0)
-token_22 = Token(lexem_class=Lexem.identifier, lexem="elses", line_number=5, position_number=0)
-token_23 = Token(lexem_class=Lexem.arithmetic_operation, lexem="*", line_number=5, position_number=0)
-token_24 = Token(lexem_class=Lexem.identifier, lexem="q", line_number=5, position_number=0)
-
-
-token_25 = Token(lexem_class=Lexem.while_keyword, lexem="WHILE", line_number=6, position_number=0)
-token_26 = Token(lexem_class=Lexem.number, lexem="4", line_number=6, position_number=0)
-token_27 = Token(lexem_class=Lexem.comparison_operation, lexem="<=", line_number=6, position_number=0)
-token_28 = Token(lexem_class=Lexem.number, lexem="3", line_number=6, position_number=0)
-token_29 = Token(lexem_class=Lexem.do_keyword, lexem="DO", line_number=6, position_number=0)
-
-token_30 = Token(lexem_class=Lexem.while_keyword, lexem="WHILE", line_number=7, position_number=0)
-token_31 = Token(lexem_class=Lexem.number, lexem="4", line_number=7, position_number=0)
-token_32 = Token(lexem_class=Lexem.comparison_operation, lexem="<=", line_number=7, position_number=0)
-token_33 = Token(lexem_class=Lexem.number, lexem="3", line_number=7, position_number=0)
-token_34 = Token(lexem_class=Lexem.do_keyword, lexem="DO", line_number=7, position_number=0)
-
-token_35 = Token(lexem_class=Lexem.for_keyword, lexem="FOR", line_number=8, position_number=0)
-token_36 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=8, position_number=0)
-token_37 = Token(lexem_class=Lexem.in_keyword, lexem="in", line_number=8, position_number=0)
-token_38 = Token(lexem_class=Lexem.number, lexem="3", line_number=8, position_number=0)
-token_39 = Token(lexem_class=Lexem.dot, lexem=".", line_number=8, position_number=0)
-token_40 = Token(lexem_class=Lexem.dot, lexem=".", line_number=8, position_number=0)
-token_41 = Token(lexem_class=Lexem.identifier, lexem="max", line_number=8, position_number=0)
-
-token_42 = Token(lexem_class=Lexem.if_keyword, lexem="IF", line_number=9, position_number=0)
-
-token_43 = Token(lexem_class=Lexem.l_par, lexem="(", line_number=9, position_number=0)
-
-token_44 = Token(lexem_class=Lexem.l_par, lexem="(", line_number=9, position_number=0)
-token_45 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=9, position_number=0)
-token_46 = Token(lexem_class=Lexem.comparison_operation, lexem="<", line_number=9, position_number=0)
-token_47 = Token(lexem_class=Lexem.identifier, lexem="j", line_number=9, position_number=0)
-token_48 = Token(lexem_class=Lexem.r_par, lexem=")", line_number=9, position_number=0)
-
-token_49 = Token(lexem_class=Lexem.logical_operation, lexem="||", line_number=9, position_number=0)
-
-token_50 = Token(lexem_class=Lexem.l_par, lexem="(", line_number=9, position_number=0)
-token_51 = Token(lexem_class=Lexem.identifier, lexem="j", line_number=9, position_number=0)
-token_52 = Token(lexem_class=Lexem.comparison_operation, lexem="!=", line_number=9, position_number=0)
-token_53 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=9, position_number=0)
-token_54 = Token(lexem_class=Lexem.r_par, lexem=")", line_number=9, position_number=0)
-
-token_55 = Token(lexem_class=Lexem.logical_operation, lexem="&&", line_number=9, position_number=0)
-
-token_56 = Token(lexem_class=Lexem.l_par, lexem="(", line_number=9, position_number=0)
-token_57 = Token(lexem_class=Lexem.identifier, lexem="j", line_number=9, position_number=0)
-token_58 = Token(lexem_class=Lexem.comparison_operation, lexem=">", line_number=9, position_number=0)
-token_59 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=9, position_number=0)
-token_60 = Token(lexem_class=Lexem.r_par, lexem=")", line_number=9, position_number=0)
-
-token_61 = Token(lexem_class=Lexem.r_par, lexem=")", line_number=9, position_number=0)
-
-token_62 = Token(lexem_class=Lexem.identifier, lexem="j", line_number=10, position_number=0)
-
-token_63 = Token(lexem_class=Lexem.end_keyword, lexem="END", line_number=11, position_number=0)
-token_64 = Token(lexem_class=Lexem.end_keyword, lexem="END", line_number=12, position_number=0)
-token_65 = Token(lexem_class=Lexem.end_keyword, lexem="END", line_number=13, position_number=0)
-token_66 = Token(lexem_class=Lexem.end_keyword, lexem="END", line_number=14, position_number=0)
-token_67 = Token(lexem_class=Lexem.end_keyword, lexem="END", line_number=15, position_number=0)
-
-
-
-
-
-
-
+                            tree = SyntaxNode(Constants.logical_expression)
+                            tree.add(comp_tree)
 
+                    stream.seek(stop_index)
 
+            elif pending:
+                tree, start, expecting_close_par = pending.pop()
+                if tree is not None:
+                    if result is not None:
+                        tree.add(result)
+                        result = tree
+                    continue
 
-'''
-token_9 = Token(lexem_class=Lexem.identifier, lexem="i", line_number=4, position_number=0)
-token_10 = Token(lexem_class=Lexem.assign, lexem="=", line_number=4, position_number=0)
+                if result is not None:
+                    if stream.position == end:
+                        token = stream.token(end - 1)
+                        raise DiagnosticError(DiagnosticCode.expected_close_par, token.line_number,
+                                              token.position_number, "Expected close PAR")
+
+                    tree = SyntaxNode(Constants.logical_expression)
+                    tree.add(SyntaxNode("("))
+                    tree.add(result)
+                    tree.add(SyntaxNode(")"))
+                    stream.advance()
+                else:
+                    stream.reset(start)
 
+            else:
+                return result
 
-token_11 = Token(lexem_class=Lexem.number, lexem="5", line_number=4, position_number=0)
-token_12 = Token(lexem_class=Lexem.arithmetic_operation, lexem="*", line_number=4, position_number=0)
-token_13 = Token(lexem_class=Lexem.number, lexem="2", line_number=4, position_number=0)
+            if stream.position == end:
+                result = tree
+                continue
 
+            if stream.lexem_class(stream.position) == Lexem.r_par:
+                if expecting_close_par:
+                    result = tree
+                    continue
+                else:
+                    token = stream.token(stream.position)
+                    raise DiagnosticError(DiagnosticCode.unexpected_close_par, token.line_number,
+                                          token.position_number, "Unexpected close brace")
 
-tokens = [token_1, token_2, token_3,token_4,token_5, token_6, token_7, token_8, token_9, token_10, token_11, token_12, token_13, token_14, token_15, token_16, token_18, token_19, token_20, token_21, token_22, token_23, token_24, token_25]
+            logical_token = stream.token(stream.position)
 
-'''
+            result = None
+            if logical_token.lexem_class == Lexem.logical_operation and tree is not None:
+                op_class_node = tree.add(SyntaxNode(Lexem.logical_operation))
 
-tokens = [token_1, token_2, token_3, token_4, token_5, token_6, token_7, token_8, token_9, token_10, token_11, token_12, token_13, token_14, token_20, token_21, token_22, token_23, token_24, token_25, token_26, token_27, token_28, token_29, token_30, token_31, token_32, token_33, token_34, token_35, token_36, token_37, token_38, token_39, token_40, token_41, token_42, token_43, token_44, token_45, token_46, token_47, token_48, token_49, token_50, token_51, token_52, token_53, token_54, token_55, token_56, token_57, token_58, token_59, token_60, token_61, token_63, token_64, token_65, token_66, token_67]
+                op_class_node.add(SyntaxNode(logical_token.lexem))
 
-syntaxAnalyzer = SyntaxAnalyzer()
-tree = syntaxAnalyzer.parse_tokens(tokens)
+                stream.advance()
+                pending.append((tree, None, expecting_close_par))
+                enter = True
 
+    def __handle_multiple_assignment(self, stream, line_end):
+        start = stream.mark()
 
-record_1 = NameTableRecord(name="elses", type=Lexem.string, scope=1)
-record_2 = NameTableRecord(name="q", type=Lexem.string, scope=1)
+        assign_index = next((index for index in range(start, line_end)
+                             if stream.lexem_class(index) == Lexem.assign), None)
 
-semanticAnalyzer = SemanticAnalyzer([record_1, record_2])
-semanticAnalyzer.check_tree(tree)
+        if assign_index is not None:
 
-tree.show()
\ No newline at end of file
+            valid_id = False
+            id_tokens = []
+            for index in range(start, assign_index):
+                if (index - start) % 2 == 1:
+                    valid_id = stream.lexem_class(index) == Lexem.comma
+                else:
+                    valid_id = stream.lexem_class(index) == Lexem.identifier
+                    if valid_id:
+                        id_tokens.append(stream.token(index))
+
+            expr_ranges = []
+            expr_start = assign_index + 1
+            for index in range(assign_index + 1, line_end):
+                if stream.lexem_class(index) == Lexem.comma:
+                    expr_ranges.append((expr_start, index))
+                    expr_start = index + 1
+            expr_ranges.append((expr_start, line_end))
+
+            if len(expr_ranges) == len(id_tokens) and valid_id:
+                trees = []
+                for id_token, (expr_start, expr_end) in zip(id_tokens, expr_ranges):
+                    if expr_start == expr_end:
+                        stream.reset(start)
+                        return None
+
+                    stream.seek(expr_start)
+                    trees.append(self.__handle_assignment(id_token, stream, expr_end))
+
+                stream.seek(line_end)
+                return trees
+
+        return None
+
+    # Ordered trial list, used as is when predictive dispatch is off.
+    __statement_handlers = (__handle_arithmetic_expression,
+                            __handle_logical_expression,
+                            __handle_identifier,
+                            __handle_while_block,
+                            __handle_for_block,
+                            __handle_if_else_block,
+                            __handle_multiple_assignment)
+
+    # Statements that open a block closed by END, which recovery skips as a whole.
+    __block_keywords = (Lexem.while_keyword, Lexem.for_keyword, Lexem.if_keyword)
+
+    __terminator_handlers = (__handle_end_token,
+                             __handle_else_token,
+                             __handle_elseif_token)
+
+    # FIRST sets: the handlers that can accept a statement starting with the given lexem class.
+    # Only identifier, number and l_par starts are ambiguous and keep the ordered trial.
+    __statement_first_sets = {
+        Lexem.identifier: (__handle_arithmetic_expression,
+                           __handle_logical_expression,
+                           __handle_identifier,
+                           __handle_multiple_assignment),
+        Lexem.number: (__handle_arithmetic_expression,
+                       __handle_logical_expression),
+        Lexem.l_par: (__handle_arithmetic_expression,
+                      __handle_logical_expression),
+        Lexem.string: (__handle_arithmetic_expression,),
+        Lexem.bool: (__handle_logical_expression,),
+        Lexem.while_keyword: (__handle_while_block,),
+        Lexem.for_keyword: (__handle_for_block,),
+        Lexem.if_keyword: (__handle_if_else_block,),
+    }
+
+    __terminator_first_sets = {
+        Lexem.end_keyword: (__handle_end_token,),
+        Lexem.else_keyword: (__handle_else_token,),
+        Lexem.elseif_keyword: (__handle_elseif_token,),
+    }
+
+
+
+def main(argv=None):
+    # Parses one file, or standard input, and prints its tree; problems go to standard error.
+    import argparse
+    from Lexer import Lexer
+    from SymbolIndex import open_name_table
+
+    parser = argparse.ArgumentParser(description="Parse a Ruby source file and print its syntax tree.")
+    parser.add_argument("source", nargs="?", default="-", help="source file, - for standard input")
+    parser.add_argument("--name-table", help="name table, JSON or a symbol index, to run the semantic check with")
+    parser.add_argument("--recover", action="store_true", help="report every problem instead of the first")
+    parser.add_argument("--profile", help="write per-production statistics to this file as JSON")
+    parser.add_argument("--profile-collapsed", help="write collapsed call stacks to this file, for flame graphs")
+    parser.add_argument("--workers", type=int,
+                        help="parse a large file on this many processes, split between top-level statements")
+    arguments = parser.parse_args(argv)
+    if arguments.workers is not None and (arguments.profile is not None or arguments.profile_collapsed is not None):
+        parser.error("--workers can't be combined with profiling")
+
+    profiler = None
+    if arguments.profile is not None or arguments.profile_collapsed is not None:
+        from Profiler import Profiler
+
+        profiler = Profiler()
+
+    diagnostics = []
+    try:
+        if arguments.workers is not None:
+            from ParallelParser import ParallelParser
+
+            tree_analyzer = ParallelParser(workers=arguments.workers, recover=arguments.recover)
+        else:
+            tree_analyzer = SyntaxAnalyzer(recover=arguments.recover, profiler=profiler)
+        if arguments.source == "-":
+            lexer = Lexer(sys.stdin, recover=arguments.recover)
+            tree = tree_analyzer.parse_tokens(lexer)
+        else:
+            with open(arguments.source) as source_file:
+                lexer = Lexer(source_file, recover=arguments.recover)
+                tree = tree_analyzer.parse_tokens(lexer)
+        diagnostics.extend(lexer.get_diagnostics())
+        diagnostics.extend(tree_analyzer.get_diagnostics())
+
+        if tree is not None and arguments.name_table is not None and not diagnostics:
+            name_table = open_name_table(arguments.name_table)
+            try:
+                semantic_analyzer = SemanticAnalyzer(name_table, recover=arguments.recover, profiler=profiler)
+                semantic_analyzer.check_tree(tree)
+                diagnostics.extend(semantic_analyzer.get_diagnostics())
+            finally:
+                if isinstance(name_table, SymbolIndex):
+                    name_table.close()
+    except DiagnosticError as error:
+        tree = None
+        diagnostics.append(error.diagnostic)
+
+    if arguments.profile is not None:
+        with open(arguments.profile, "w") as profile_file:
+            profiler.dump_json(profile_file)
+    if arguments.profile_collapsed is not None:
+        with open(arguments.profile_collapsed, "w") as profile_file:
+            profiler.dump_collapsed(profile_file)
+
+    if tree is not None:
+        print(tree.to_text())
+    elif not diagnostics:
+        print("CAN'T BUILD SYNTAX TREE", file=sys.stderr)
+        return 1
+    diagnostics.sort(key=lambda diagnostic: (diagnostic.line_number, diagnostic.position_number))
+    for diagnostic in diagnostics:
+        print(diagnostic, file=sys.stderr)
+    return 1 if diagnostics else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,7 @@
+import gc
 import json
+import json.scanner
+import re
 
 from NameTable import NameTable
 from Model.Identifier import Identifier
@@ -8,18 +11,119 @@ from Utils import Constants
 class TreeBuilder(object):
 
     __file_path = ""
+    __chunk_size = 1 << 16
+    __whitespace = re.compile(r"[ \t\n\r]*")
+    __array_separator = re.compile(r"[ \t\n\r]*,[ \t\n\r]*")
 
     def __init__(self, file_path):
         self.__file_path = file_path
 
     def build_name_table(self):
-        with open(self.__file_path) as data_file:
-            raw_identifiers = json.load(data_file)
-            identifiers = []
-            for raw_identifier in raw_identifiers:
-                identifier = Identifier(name=raw_identifier[Constants.Name],
-                                        type=raw_identifier[Constants.Type],
-                                        scope=raw_identifier[Constants.Scope])
-                identifiers.append(identifier)
-            name_table = NameTable(identifiers)
-            return name_table
+        # The file is either a JSON array of records or JSON lines, one record per line. Records go into the
+        # table as they are read, so besides the table only one chunk of the file is held at a time.
+        # Nothing loaded can be garbage, yet collections would keep walking the growing table, so the
+        # collector is paused for the load.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.__file_path, encoding="utf-8") as data_file:
+                return NameTable(self.__read_identifiers(data_file))
+        finally:
+            if collecting:
+                gc.enable()
+
+    def build_symbol_index(self, index_path):
+        # Compiles the name table into a SymbolIndex file, which later runs map instead of loading the JSON.
+        from SymbolIndex import write_symbol_index
+
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.__file_path, encoding="utf-8") as data_file:
+                write_symbol_index(self.__read_identifiers(data_file), index_path)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def __read_identifiers(self, data_file):
+        # Names and types repeat across scopes, so records share one string per distinct value.
+        strings = {}
+        for raw_identifier in self.__read_records(data_file):
+            name = raw_identifier[Constants.Name]
+            identifier_type = raw_identifier[Constants.Type]
+            yield Identifier(name=strings.setdefault(name, name),
+                             type=strings.setdefault(identifier_type, identifier_type),
+                             scope=raw_identifier[Constants.Scope])
+
+    def __read_records(self, data_file):
+        scan = json.scanner.make_scanner(json.JSONDecoder())
+        buffer = ""
+        position = 0
+        end_of_file = False
+        in_array = None
+        closed = False
+        expect_comma = False
+        after_comma = False
+
+        while True:
+            position = self.__whitespace.match(buffer, position).end()
+            if position == len(buffer) and not end_of_file:
+                buffer = data_file.read(self.__chunk_size)
+                position = 0
+                end_of_file = not buffer
+                continue
+
+            character = buffer[position:position + 1]
+            if in_array is None:
+                # Decided by the first character: an array opens with [, JSON lines with a record.
+                in_array = character == "["
+                if in_array:
+                    position += 1
+                separator = self.__array_separator if in_array else self.__whitespace
+                continue
+            if not character:
+                if in_array and not closed:
+                    raise ValueError("UNEXPECTED END OF NAME TABLE " + self.__file_path)
+                return
+            if closed:
+                raise ValueError("UNEXPECTED DATA AFTER NAME TABLE " + self.__file_path)
+            if in_array and character == "]" and not after_comma:
+                position += 1
+                closed = True
+                continue
+            if expect_comma:
+                if character != ",":
+                    raise ValueError("EXPECTED , IN NAME TABLE " + self.__file_path)
+                position += 1
+                expect_comma = False
+                after_comma = True
+                continue
+
+            try:
+                record, position = scan(buffer, position)
+            except (StopIteration, ValueError) as error:
+                if end_of_file:
+                    if isinstance(error, StopIteration):
+                        raise json.JSONDecodeError("Expecting value", buffer, position)
+                    raise
+                # The record runs past the end of the buffer: keep its start and read more. Reads grow with
+                # the buffer so a record spanning many chunks is still decoded in linear time.
+                more = data_file.read(max(self.__chunk_size, len(buffer)))
+                buffer = buffer[position:] + more
+                position = 0
+                end_of_file = not more
+                continue
+            expect_comma = in_array
+            after_comma = False
+            yield record
+
+            # Most records follow the previous one in the same chunk, so try for those directly first.
+            while True:
+                match = separator.match(buffer, position)
+                if match is None:
+                    break
+                try:
+                    record, position = scan(buffer, match.end())
+                except (StopIteration, ValueError):
+                    break
+                yield record
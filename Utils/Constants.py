@@ -14,4 +14,7 @@ iterator_end = "ITERATOR_END"
 for_block = "FOR_BLOCK"
 if_block = "IF_BLOCK"
 arithmetic_expression = "ARITHMETIC_EXPRESSION"
-logical_expression = "LOGICAL_EXPRESSION"
\ No newline at end of file
+logical_expression = "LOGICAL_EXPRESSION"
+
+# Bump whenever the trees or verdicts the analyzers produce change, so cached results are not reused.
+analyzer_version = "2"
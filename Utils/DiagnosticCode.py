@@ -0,0 +1,20 @@
+unexpected_symbol = "UNEXPECTED_SYMBOL"
+
+unresolved_statement = "UNRESOLVED_STATEMENT"
+unexpected_terminator = "UNEXPECTED_TERMINATOR"
+expected_end = "EXPECTED_END"
+syntax_error = "SYNTAX_ERROR"
+
+expected_close_par = "EXPECTED_CLOSE_PAR"
+unexpected_close_par = "UNEXPECTED_CLOSE_PAR"
+invalid_arithmetic_expression = "INVALID_ARITHMETIC_EXPRESSION"
+invalid_expression = "INVALID_EXPRESSION"
+expected_logical_expression = "EXPECTED_LOGICAL_EXPRESSION"
+invalid_iterator = "INVALID_ITERATOR"
+
+undefined_identifier = "UNDEFINED_IDENTIFIER"
+type_mismatch = "TYPE_MISMATCH"
+
+undefined_variable = "UNDEFINED_VARIABLE"
+division_by_zero = "DIVISION_BY_ZERO"
+invalid_operand = "INVALID_OPERAND"
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StdioTest(unittest.TestCase):
+    # The daemon's standard input and output can each be a pipe or a file.
+    requests = [{"id": 1, "source": "x = 1 + 2"},
+                {"id": 2, "source": "y = 1 +"},
+                {"id": "last", "method": "status"}]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.request_path = os.path.join(self.directory, "requests.jsonl")
+        with open(self.request_path, "w") as request_file:
+            for request in self.requests:
+                request_file.write(json.dumps(request) + "\n")
+        self.answer_path = os.path.join(self.directory, "answers.jsonl")
+
+    def run_daemon(self, input_file, output_file, input_data=None):
+        process = subprocess.run([sys.executable, "AnalysisDaemon.py", "--workers", "0"], cwd=root,
+                                 input=input_data, stdin=input_file, stdout=output_file,
+                                 stderr=subprocess.PIPE, timeout=60)
+        self.assertEqual(process.returncode, 0, process.stderr.decode("utf-8", "replace"))
+        return process.stdout
+
+    def check_answers(self, output):
+        answers = dict((answer["id"], answer) for answer in map(json.loads, output.decode("utf-8").splitlines()))
+        self.assertEqual(sorted(answers, key=str), [1, 2, "last"])
+        self.assertEqual(answers[1]["result"]["status"], "ok")
+        self.assertEqual(len(answers[2]["result"]["diagnostics"]), 1)
+        self.assertEqual(answers["last"]["result"]["workers"], 0)
+
+    def read_answers(self):
+        with open(self.answer_path, "rb") as answer_file:
+            return answer_file.read()
+
+    def test_files(self):
+        with open(self.request_path, "rb") as request_file, open(self.answer_path, "wb") as answer_file:
+            self.run_daemon(request_file, answer_file)
+        self.check_answers(self.read_answers())
+
+    def test_file_input(self):
+        with open(self.request_path, "rb") as request_file:
+            self.check_answers(self.run_daemon(request_file, subprocess.PIPE))
+
+    def test_file_output(self):
+        with open(self.request_path, "rb") as request_file, open(self.answer_path, "wb") as answer_file:
+            self.run_daemon(None, answer_file, request_file.read())
+        self.check_answers(self.read_answers())
+
+    def test_pipes(self):
+        with open(self.request_path, "rb") as request_file:
+            self.check_answers(self.run_daemon(None, subprocess.PIPE, request_file.read()))
+
+    def test_empty_input(self):
+        with open(os.devnull, "rb") as null_file, open(self.answer_path, "wb") as answer_file:
+            self.run_daemon(null_file, answer_file)
+        self.assertEqual(self.read_answers(), b"")
+
+    def test_requests_without_id(self):
+        # Each is answered, however many are in flight at once.
+        requests = b"".join(json.dumps({"source": "x = %d" % index}).encode("utf-8") + b"\n" for index in range(5))
+        answers = [json.loads(line) for line in self.run_daemon(None, subprocess.PIPE, requests).splitlines()]
+        self.assertEqual(len(answers), 5)
+        for answer in answers:
+            self.assertIsNone(answer["id"])
+            self.assertEqual(answer["result"]["status"], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from BatchAnalyzer import BatchAnalyzer
+
+
+class UnusableCacheTest(unittest.TestCase):
+    # A cache directory that can't be created is skipped; the files are still analyzed, serially or not.
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.paths = []
+        for name, source in (("a.rb", "x = 1\n"), ("b.rb", "y = 1 +\n")):
+            path = os.path.join(self.directory, name)
+            with open(path, "w") as source_file:
+                source_file.write(source)
+            self.paths.append(path)
+        blocker = os.path.join(self.directory, "blocker")
+        open(blocker, "w").close()
+        self.cache_directory = os.path.join(blocker, "cache")
+
+    def check_results(self, results):
+        self.assertEqual([result.path for result in results], self.paths)
+        self.assertEqual(results[0].errors, [])
+        self.assertGreater(results[0].node_count, 0)
+        self.assertEqual(len(results[1].diagnostics), 1)
+
+    def test_serial(self):
+        analyzer = BatchAnalyzer(workers=1, cache_directory=self.cache_directory)
+        self.check_results(analyzer.analyze(self.paths))
+        self.check_results(list(analyzer.analyze_stream(self.paths)))
+
+    def test_single_path(self):
+        analyzer = BatchAnalyzer(workers=2, cache_directory=self.cache_directory)
+        self.check_results(analyzer.analyze(self.paths[:1]) + analyzer.analyze(self.paths[1:]))
+
+    def test_pool(self):
+        analyzer = BatchAnalyzer(workers=2, cache_directory=self.cache_directory)
+        self.check_results(analyzer.analyze(self.paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from Benchmarks.Generator import ProgramGenerator
+from Lexer import Lexer
+from Model.BinaryTree import BinaryTree, encode_tree, open_tree
+from Model.SyntaxNode import SyntaxNode
+from Model.Token import Token
+from SyntaxAnalyzer import SyntaxAnalyzer
+from Utils import Constants
+
+
+def dump(tree):
+    # Nodes in pre-order with their tokens, so trees compare by value.
+    nodes = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        token = node.token
+        if token is None:
+            nodes.append((node.kind, len(node.children)))
+        else:
+            nodes.append((node.kind, len(node.children), token.lexem_class, token.lexem, token.line_number,
+                          token.position_number))
+        stack.extend(reversed(node.children))
+    return nodes
+
+
+def parse(source):
+    return SyntaxAnalyzer().parse_tokens(list(Lexer(source)))
+
+
+class BinaryTreeRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def open_mapped(self, tree):
+        # A file per tree: rewriting a file that is still mapped would change the earlier mapping.
+        path = os.path.join(self.directory, "tree%d.bin" % len(os.listdir(self.directory)))
+        with open(path, "wb") as tree_file:
+            tree_file.write(encode_tree(tree))
+        binary_tree = open_tree(path)
+        self.addCleanup(binary_tree.close)
+        return binary_tree
+
+    def check_nodes(self, binary_tree, tree):
+        # Walks both trees side by side through the node accessors, which read the buffer in place.
+        self.assertEqual(len(binary_tree), len(dump(tree)))
+        self.assertEqual(binary_tree.subtree_size(0), len(binary_tree))
+        stack = [(0, tree)]
+        while stack:
+            index, node = stack.pop()
+            self.assertEqual(binary_tree.kind(index), node.kind)
+            self.assertEqual(binary_tree.child_count(index), len(node.children))
+            self.assertEqual(binary_tree.has_token(index), node.token is not None)
+            token = binary_tree.token(index)
+            if node.token is None:
+                self.assertIsNone(token)
+            else:
+                self.assertEqual((token.lexem_class, token.lexem, token.line_number, token.position_number),
+                                 (node.token.lexem_class, node.token.lexem, node.token.line_number,
+                                  node.token.position_number))
+                self.assertEqual((binary_tree.lexem_class(index), binary_tree.lexem(index),
+                                  binary_tree.line_number(index), binary_tree.position_number(index)),
+                                 (token.lexem_class, token.lexem, token.line_number, token.position_number))
+            children = list(binary_tree.children(index))
+            self.assertEqual(len(children), len(node.children))
+            self.assertEqual(binary_tree.subtree_size(index),
+                             1 + sum(binary_tree.subtree_size(child) for child in children))
+            stack.extend(zip(children, node.children))
+
+    def check_round_trip(self, tree):
+        binary_tree = self.open_mapped(tree)
+        self.check_nodes(binary_tree, tree)
+        self.assertEqual(dump(binary_tree.to_syntax_node()), dump(tree))
+        self.assertEqual(dump(BinaryTree(encode_tree(tree)).to_syntax_node()), dump(tree))
+
+    def test_program(self):
+        self.check_round_trip(parse("x = 1 + 2 * 3\nwhile x < 10 do\nx = x + 1\nend\n"))
+
+    def test_generated_programs(self):
+        for seed in range(3):
+            generator = ProgramGenerator(seed=seed, line_count=200, max_depth=4)
+            self.check_round_trip(SyntaxAnalyzer().parse_tokens(generator.generate_tokens()))
+
+    def test_deep_tree(self):
+        depth = 1500
+        self.check_round_trip(parse("while a < 1 do\n" * depth + "x = 1\n" + "end\n" * depth))
+
+    def test_empty_tree(self):
+        tree = parse("")
+        self.assertEqual(tree.children, ())
+        self.check_round_trip(tree)
+
+    def test_single_leaf(self):
+        self.check_round_trip(SyntaxNode("x", Token("IDENTIFIER", "x", 3, 7)))
+        self.check_round_trip(SyntaxNode(Constants.common_block))
+
+    def test_non_ascii_strings(self):
+        self.check_round_trip(parse('s = "héllo ✓"\nt = "日本"\n'))
+
+    def test_offset(self):
+        tree = parse("x = 1\n")
+        data = b"\0" * 12 + encode_tree(tree)
+        self.assertEqual(dump(BinaryTree(data, 12).to_syntax_node()), dump(tree))
+
+    def test_bad_buffer(self):
+        data = encode_tree(parse("x = 1\n"))
+        for bad in (data[:10], data[:len(data) - 1], b"XXXX" + data[4:]):
+            with self.assertRaises(ValueError):
+                BinaryTree(bad)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,19 @@
+import io
+import unittest
+
+from Benchmarks.Evaluation import TreeInterpreter
+from Evaluator import Program
+from Lexer import Lexer
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+class IntegerLiteralTest(unittest.TestCase):
+    # Leading zeros don't make a literal octal, in the compiled program or in the reference interpreter.
+    def test_leading_zeros(self):
+        tree = SyntaxAnalyzer().parse_tokens(Lexer(io.StringIO("x = 010\ny = 09 + 08\n")))
+        self.assertEqual(Program(tree).run(), {"x": 10, "y": 17})
+        self.assertEqual(TreeInterpreter().run(tree), {"x": 10, "y": 17})
+
+
+if __name__ == "__main__":
+    unittest.main()
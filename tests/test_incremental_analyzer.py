@@ -0,0 +1,96 @@
+import unittest
+
+from IncrementalAnalyzer import IncrementalAnalyzer
+from Lexer import Lexer
+from SyntaxAnalyzer import SyntaxAnalyzer
+
+
+def dump(tree):
+    # Nodes in pre-order with their tokens, so trees compare by value, positions included.
+    nodes = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        token = node.token
+        if token is None:
+            nodes.append((node.kind, len(node.children)))
+        else:
+            nodes.append((node.kind, len(node.children), token.lexem_class, token.lexem, token.line_number,
+                          token.position_number))
+        stack.extend(reversed(node.children))
+    return nodes
+
+
+class IncrementalEditTest(unittest.TestCase):
+    # After every edit the tree has to be the one a full parse of the edited source gives.
+    source = ["x = 1",
+              "while x < 3 do",
+              "x = x + 1",
+              "if x == 2",
+              "y = 1",
+              "else",
+              "y = 2",
+              "end",
+              "end",
+              "z = 4"]
+
+    def setUp(self):
+        self.lines = list(self.source)
+        self.analyzer = IncrementalAnalyzer(Lexer("\n".join(self.lines)))
+
+    def edit(self, first_line, last_line, new_lines):
+        if new_lines:
+            tree = self.analyzer.update_source(first_line, last_line, "\n".join(new_lines))
+        else:
+            tree = self.analyzer.update(first_line, last_line, [])
+        self.lines[first_line:last_line + 1] = new_lines
+        expected = SyntaxAnalyzer().parse_tokens(list(Lexer("\n".join(self.lines))))
+        self.assertEqual(dump(tree), dump(expected))
+        self.assertEqual(dump(self.analyzer.get_tree()), dump(expected))
+
+    def test_replace_statement(self):
+        self.edit(0, 0, ["x = 2 * 3"])
+        self.edit(9, 9, ["z = x + y"])
+
+    def test_replace_in_nested_block(self):
+        self.edit(4, 4, ["y = 10 + x"])
+        self.edit(6, 6, ["y = 20", "w = 3"])
+        self.edit(3, 3, ["if x > 1"])
+
+    def test_insert(self):
+        self.edit(0, -1, ["a = 0"])
+        self.edit(3, 2, ["b = 1"])
+        self.edit(12, 11, ["c = 2"])
+
+    def test_insert_block(self):
+        self.edit(5, 4, ["while y < 2 do", "y = y + 1", "end"])
+        self.edit(13, 12, ["for i in 1..3", "z = z + i", "end"])
+
+    def test_delete(self):
+        self.edit(2, 2, [])
+        self.edit(8, 8, [])
+
+    def test_delete_block(self):
+        self.edit(3, 7, [])
+        self.edit(1, 3, [])
+
+    def test_across_block_boundaries(self):
+        # From the inner if, past both ends, to the statement after the loop.
+        self.edit(6, 9, ["y = 2", "end", "q = 1", "end", "z = 4"])
+        # From before the loop into its body.
+        self.edit(0, 2, ["x = 0", "r = 1", "while x < 5 do", "x = x + 2"])
+
+    def test_merge_blocks(self):
+        # Deleting the end of the loop makes the statement after it part of the loop.
+        self.edit(8, 9, ["z = 4", "end"])
+
+    def test_unbalanced_and_back(self):
+        # An edit that leaves an unclosed block fails; the one that closes it again gives a tree.
+        with self.assertRaises(ValueError):
+            self.analyzer.update_source(10, 9, "while z < 9 do")
+        self.lines.append("while z < 9 do")
+        self.edit(11, 10, ["z = z + 1", "end"])
+
+
+if __name__ == "__main__":
+    unittest.main()
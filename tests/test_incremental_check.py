@@ -0,0 +1,56 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from IncrementalAnalyzer import IncrementalAnalyzer
+from Lexer import Lexer
+from Model.Diagnostic import DiagnosticError
+from Model.Identifier import Identifier
+from SymbolIndex import open_symbol_index, write_symbol_index
+from Utils import DiagnosticCode
+
+
+class EditAfterFailedCheckTest(unittest.TestCase):
+    # A failed check leaves the counted uses of a statement above what the table holds; an edit after
+    # it has to report the undefined identifier again, not run past the records.
+    source = "1 + x + x\n1 + 2\n"
+
+    def get_name_table(self, identifiers):
+        return identifiers
+
+    def assert_undefined(self, call, line_number, position_number):
+        with self.assertRaises(DiagnosticError) as context:
+            call()
+        diagnostic = context.exception.diagnostic
+        self.assertEqual(diagnostic.code, DiagnosticCode.undefined_identifier)
+        self.assertEqual((diagnostic.line_number, diagnostic.position_number), (line_number, position_number))
+
+    def check_edit(self, identifiers):
+        analyzer = IncrementalAnalyzer(Lexer(io.StringIO(self.source)), name_table=self.get_name_table(identifiers))
+        self.assert_undefined(analyzer.check, 0, 8)
+        self.assert_undefined(lambda: analyzer.update_source(1, 1, "1 + x"), 1, 4)
+
+    def test_edit_after_failed_check(self):
+        self.check_edit([Identifier(name="x", type="NUM", scope=0)])
+
+    def test_edit_after_failed_check_with_next_key(self):
+        # Past its own records, x must not read the records of the key after it.
+        self.check_edit([Identifier(name="x", type="NUM", scope=0), Identifier(name="y", type="NUM", scope=0),
+                         Identifier(name="y", type="NUM", scope=0)])
+
+
+class SymbolIndexEditAfterFailedCheckTest(EditAfterFailedCheckTest):
+    def get_name_table(self, identifiers):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "names.index")
+        write_symbol_index(identifiers, path)
+        symbol_index = open_symbol_index(path)
+        self.addCleanup(symbol_index.close)
+        return symbol_index
+
+
+if __name__ == "__main__":
+    unittest.main()
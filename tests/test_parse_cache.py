@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from BatchAnalyzer import analyze_source
+from ParseCache import ParseCache
+
+
+def count_entries(directory):
+    # Entries and their total size, as they are on disk.
+    count = size = 0
+    for path, _, files in os.walk(directory):
+        for file_name in files:
+            if file_name.endswith(".entry"):
+                count += 1
+                size += os.path.getsize(os.path.join(path, file_name))
+    return count, size
+
+
+class ParseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def store(self, cache, source):
+        key = cache.get_key(source)
+        cache.store(key, analyze_source("a.rb", source))
+        return key
+
+    def get_entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".entry")
+
+    def get_entry_size(self):
+        # The size of an entry for a one digit x = n, measured in a directory of its own.
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store(ParseCache(directory), b"x = 0\n")
+        return count_entries(directory)[1]
+
+    def test_hit(self):
+        cache = ParseCache(self.directory)
+        source = b"x = 1 + 2\ny = x * 3\n"
+        key = self.store(cache, source)
+        expected = analyze_source("a.rb", source)
+
+        result = cache.load(key)
+        self.assertEqual((result.token_count, result.node_count, result.errors),
+                         (expected.token_count, expected.node_count, expected.errors))
+        self.assertEqual(result.tree.to_text(), expected.tree.to_text())
+        self.assertIsNone(cache.load(key, keep_tree=False).tree)
+
+        view = cache.load_tree_view(key)
+        try:
+            self.assertEqual(view.to_syntax_node().to_text(), expected.tree.to_text())
+        finally:
+            view.close()
+
+    def test_hit_keeps_diagnostics(self):
+        cache = ParseCache(self.directory)
+        key = self.store(cache, b"x = 1 +\n")
+        result = cache.load(key)
+        self.assertEqual([str(diagnostic) for diagnostic in result.diagnostics],
+                         [str(diagnostic) for diagnostic in analyze_source("a.rb", b"x = 1 +\n").diagnostics])
+
+    def test_miss(self):
+        cache = ParseCache(self.directory)
+        source = b"x = 1\n"
+        self.store(cache, source)
+        self.assertIsNone(cache.load(cache.get_key(b"x = 2\n")))
+        self.assertIsNone(cache.load(cache.get_key(source, recover=True)))
+        self.assertIsNone(cache.load(cache.get_key(source, name_table=b"[]")))
+        self.assertIsNone(cache.load_tree_view(cache.get_key(b"x = 2\n")))
+
+    def test_corrupt_entry(self):
+        cache = ParseCache(self.directory)
+        for data in (b"", b"\xff\xff\xff\xff", b"\x02\x00\x00\x00garbage"):
+            key = self.store(cache, b"x = 1\n")
+            with open(self.get_entry_path(key), "wb") as entry_file:
+                entry_file.write(data)
+            self.assertIsNone(cache.load(key))
+            self.assertFalse(os.path.exists(self.get_entry_path(key)))
+
+    def test_truncated_entry(self):
+        cache = ParseCache(self.directory)
+        key = self.store(cache, b"x = 1 + 2 + 3\n")
+        path = self.get_entry_path(key)
+        with open(path, "rb") as entry_file:
+            data = entry_file.read()
+        with open(path, "wb") as entry_file:
+            entry_file.write(data[:len(data) - 3])
+        self.assertIsNone(cache.load(key))
+
+    def test_eviction(self):
+        entry_size = self.get_entry_size()
+        cache = ParseCache(self.directory, max_bytes=entry_size * 10)
+        keys = []
+        for index in range(1, 30):
+            keys.append(self.store(cache, b"x = %d\n" % index))
+            # Modification times a second apart, so the order eviction sees is the order written.
+            stamp = time.time() - 100 + index
+            os.utime(self.get_entry_path(keys[-1]), (stamp, stamp))
+            self.assertLessEqual(count_entries(self.directory)[1], entry_size * 10)
+        self.assertIsNotNone(cache.load(keys[-1]))
+        self.assertIsNone(cache.load(keys[0]))
+
+    def test_eviction_keeps_recently_used(self):
+        entry_size = self.get_entry_size()
+        cache = ParseCache(self.directory, max_bytes=entry_size * 4)
+        first_key = self.store(cache, b"x = 1\n")
+        os.utime(self.get_entry_path(first_key), (1, 1))
+        for index in range(2, 5):
+            key = self.store(cache, b"x = %d\n" % index)
+            os.utime(self.get_entry_path(key), (index, index))
+        # A hit touches the entry, so the oldest write is now the most recently used.
+        self.assertIsNotNone(cache.load(first_key))
+        self.store(cache, b"x = 5\n")
+        self.assertIsNotNone(cache.load(first_key))
+
+    def test_cap_is_shared(self):
+        # Each ParseCache keeps its own state, as one in each worker process would.
+        entry_size = self.get_entry_size()
+        caches = [ParseCache(self.directory, max_bytes=entry_size * 10) for _ in range(4)]
+        for index in range(1, 40):
+            self.store(caches[index % len(caches)], b"x = %d\n" % index)
+            self.assertLessEqual(count_entries(self.directory)[1], entry_size * 10)
+
+    def test_eviction_without_fcntl(self):
+        # Where there is no lock to share the size under, a single process still keeps to the cap.
+        entry_size = self.get_entry_size()
+        with mock.patch("ParseCache.fcntl", None):
+            cache = ParseCache(self.directory, max_bytes=entry_size * 10)
+            for index in range(1, 30):
+                self.store(cache, b"x = %d\n" % index)
+                self.assertLessEqual(count_entries(self.directory)[1], entry_size * 10)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "size")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+
+from Benchmarks.Generator import ProgramGenerator
+from Lexer import Lexer
+from Model.Diagnostic import DiagnosticError
+from Model.Identifier import Identifier
+from SyntaxAnalyzer import SyntaxAnalyzer, SemanticAnalyzer
+from Utils import DiagnosticCode
+
+
+def dump(tree):
+    # Nodes in pre-order with their tokens, so trees compare by value.
+    nodes = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        token = node.token
+        if token is None:
+            nodes.append((node.kind, len(node.children)))
+        else:
+            nodes.append((node.kind, len(node.children), token.lexem_class, token.lexem, token.line_number,
+                          token.position_number))
+        stack.extend(reversed(node.children))
+    return nodes
+
+
+def parse_recovering(source, **options):
+    lexer = Lexer(source, recover=True)
+    tokens = list(lexer)
+    syntax_analyzer = SyntaxAnalyzer(recover=True, **options)
+    tree = syntax_analyzer.parse_tokens(tokens)
+    return tree, lexer.get_diagnostics() + syntax_analyzer.get_diagnostics()
+
+
+def get_statement_names(block):
+    # The assigned names of a block's statements, in order.
+    return [statement.children[0].children[0].kind for statement in block.children]
+
+
+class RecoverTest(unittest.TestCase):
+    def assert_diagnostics(self, diagnostics, expected):
+        self.assertEqual([(diagnostic.code, diagnostic.line_number, diagnostic.position_number)
+                          for diagnostic in diagnostics], expected)
+
+    def test_diagnostics(self):
+        # Every bad statement is reported in one pass, where strict mode stops at the first.
+        source = "x = 1 +\ny = 2\nz = * 3\nw = 4\n"
+        tree, diagnostics = parse_recovering(source)
+        self.assert_diagnostics(diagnostics, [(DiagnosticCode.invalid_expression, 0, 4),
+                                              (DiagnosticCode.invalid_expression, 2, 4)])
+        with self.assertRaises(DiagnosticError) as context:
+            SyntaxAnalyzer().parse_tokens(list(Lexer(source)))
+        self.assertEqual(str(context.exception.diagnostic), str(diagnostics[0]))
+
+    def test_lexer_diagnostics(self):
+        tree, diagnostics = parse_recovering("x = 1 $ 2\ny = 3\nz = 4 @\n")
+        self.assertEqual([(diagnostic.line_number, diagnostic.position_number) for diagnostic in diagnostics
+                          if diagnostic.code == DiagnosticCode.unexpected_symbol], [(0, 6), (2, 6)])
+        # The symbols are dropped by the lexer, so z = 4 still parses; x = 1 2 doesn't.
+        self.assertEqual(get_statement_names(tree), ["y", "z"])
+
+    def test_recovery_after_bad_statement(self):
+        tree, diagnostics = parse_recovering("x = 1 +\ny = 2\nz = * 3\nw = 4\n")
+        self.assertEqual(get_statement_names(tree), ["y", "w"])
+        self.assertEqual(dump(tree), dump(SyntaxAnalyzer().parse_tokens(list(Lexer("\ny = 2\n\nw = 4\n")))))
+
+    def test_bad_block_header(self):
+        # A block whose header fails is skipped through its END, with everything in it.
+        tree, diagnostics = parse_recovering("while x < do\ny = 1\nend\nz = 2\n")
+        self.assert_diagnostics(diagnostics, [(DiagnosticCode.expected_logical_expression, 0, 6)])
+        self.assertEqual(get_statement_names(tree), ["z"])
+
+    def test_partial_tree(self):
+        # A bad statement inside a block leaves the block in the tree, without that statement.
+        tree, diagnostics = parse_recovering("if x\ny = 1 +\nv = 3\nelse\ny = 2\nend\nq = 1\n")
+        self.assert_diagnostics(diagnostics, [(DiagnosticCode.invalid_expression, 1, 4)])
+        if_block, statement = tree.children
+        self.assertEqual(if_block.kind, "IF_BLOCK")
+        blocks = [child for child in if_block.children if child.kind == "COMMON_BLOCK"]
+        self.assertEqual([get_statement_names(block) for block in blocks], [["v"], ["y"]])
+        self.assertEqual(statement.children[0].children[0].kind, "q")
+
+    def test_stray_terminator(self):
+        # Strict mode gives no tree; recovering reports the END and keeps the statements around it.
+        self.assertIsNone(SyntaxAnalyzer().parse_tokens(list(Lexer("x = 1\nend\ny = 2\n"))))
+        tree, diagnostics = parse_recovering("x = 1\nend\ny = 2\n")
+        self.assert_diagnostics(diagnostics, [(DiagnosticCode.unexpected_terminator, 1, 0)])
+        self.assertEqual(get_statement_names(tree), ["x", "y"])
+
+    def test_unclosed_block(self):
+        tree, diagnostics = parse_recovering("x = 1\nwhile x < 3 do\nx = x + 1\n")
+        self.assertEqual([diagnostic.code for diagnostic in diagnostics], [DiagnosticCode.expected_end])
+        self.assertEqual([child.kind for child in tree.children], ["IDENTIFIER_EXPRESSION", "WHILE_BLOCK"])
+
+    def test_valid_input_matches_strict(self):
+        sources = ["x = 1 + 2 * 3\nwhile x < 10 do\nx = x + 1\nend\n",
+                   "if a > 1\nb = 2\nelseif a < 0\nb = 3\nelse\nb = 4\nend\n",
+                   "for i in 1..10\ns = s + i\nend\n", ""]
+        for seed in range(5):
+            generator = ProgramGenerator(seed=seed, line_count=300, max_depth=4)
+            sources.append(generator.generate_source())
+        for source in sources:
+            expected = dump(SyntaxAnalyzer().parse_tokens(list(Lexer(source))))
+            for options in ({}, {"packrat": False}, {"predictive": False}):
+                tree, diagnostics = parse_recovering(source, **options)
+                self.assertEqual(diagnostics, [])
+                self.assertEqual(dump(tree), expected)
+
+    def test_semantic_diagnostics(self):
+        # The check moves on after an undefined identifier or a type mismatch and reports the rest.
+        tree = SyntaxAnalyzer().parse_tokens(list(Lexer("x = a + b\ny = c + a\n")))
+        name_table = [Identifier(name="a", type="NUM", scope=0), Identifier(name="c", type="BOOL", scope=0),
+                      Identifier(name="x", type="NUM", scope=0), Identifier(name="y", type="NUM", scope=0)]
+        semantic_analyzer = SemanticAnalyzer(name_table, recover=True)
+        semantic_analyzer.check_tree(tree)
+        self.assertEqual([diagnostic.code for diagnostic in semantic_analyzer.get_diagnostics()],
+                         [DiagnosticCode.undefined_identifier, DiagnosticCode.type_mismatch,
+                          DiagnosticCode.undefined_identifier])
+        with self.assertRaises(DiagnosticError):
+            SemanticAnalyzer(name_table).check_tree(tree)
+
+
+if __name__ == "__main__":
+    unittest.main()